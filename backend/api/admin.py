@@ -1,24 +1,52 @@
 from django.contrib import admin
-from .models import UploadedDataset
+from .models import UploadedDataset, DatasetContent, EquipmentObservation, RetentionPolicy
 
 
 @admin.register(UploadedDataset)
 class UploadedDatasetAdmin(admin.ModelAdmin):
-    list_display = ('id', 'filename', 'upload_date', 'get_total_count')
+    list_display = ('id', 'filename', 'upload_date', 'file_size', 'get_total_count')
     list_filter = ('upload_date',)
     search_fields = ('filename',)
-    readonly_fields = ('upload_date', 'summary_json', 'data_json')
+    readonly_fields = ('upload_date', 'content', 'summary_json', 'data_json')
     
     def get_total_count(self, obj):
-        return obj.summary_json.get('total_count', 0)
+        return obj.get_summary().get('total_count', 0)
     get_total_count.short_description = 'Total Equipment'
     
     fieldsets = (
         ('File Information', {
-            'fields': ('filename', 'file_path', 'upload_date')
+            'fields': ('filename', 'file_path', 'file_size', 'upload_date', 'content')
         }),
         ('Analysis Data', {
             'fields': ('summary_json', 'data_json'),
             'classes': ('collapse',)
         }),
     )
+
+
+@admin.register(RetentionPolicy)
+class RetentionPolicyAdmin(admin.ModelAdmin):
+    list_display = ('user', 'max_count', 'max_age_days', 'max_bytes')
+    search_fields = ('user__username',)
+
+
+@admin.register(EquipmentObservation)
+class EquipmentObservationAdmin(admin.ModelAdmin):
+    list_display = ('equipment_name', 'equipment_type', 'user', 'dataset', 'upload_date', 'row_count')
+    list_filter = ('equipment_type', 'upload_date')
+    search_fields = ('equipment_name', 'user__username')
+    readonly_fields = ('user', 'dataset', 'upload_date', 'parameters')
+
+
+@admin.register(DatasetContent)
+class DatasetContentAdmin(admin.ModelAdmin):
+    list_display = ('sha256', 'size', 'created_at', 'get_reference_count')
+    search_fields = ('sha256',)
+    readonly_fields = (
+        'sha256', 'blob', 'size', 'created_at', 'summary_json', 'data_json',
+        'anomalies_json', 'resampled_json', 'equipment_json'
+    )
+    
+    def get_reference_count(self, obj):
+        return obj.datasets.count()
+    get_reference_count.short_description = 'Datasets'
@@ -0,0 +1,86 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from rest_framework.authentication import TokenAuthentication
+
+
+class TokenUserCache:
+    """
+    Bounded in-process map from token key to (user, token).
+
+    Entries expire after `ttl` seconds and the least recently used entry
+    is dropped once `max_size` is reached. The cache is per process, so
+    the TTL also bounds how long other workers can serve a stale entry.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, credentials = entry
+            if expires_at <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return credentials
+
+    def set(self, key, credentials):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, credentials)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def invalidate_user(self, user_id):
+        with self.lock:
+            stale = [key for key, (_, (user, _token)) in self.entries.items() if user.pk == user_id]
+            for key in stale:
+                del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+token_cache = TokenUserCache(
+    max_size=getattr(settings, 'TOKEN_AUTH_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'TOKEN_AUTH_CACHE_TTL', 300),
+)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that skips the Token + User query for recently
+    seen tokens.
+
+    Only successful lookups are cached; unknown or inactive tokens always
+    go to the database. Entries are dropped when the token is deleted or
+    the user is saved or deleted (see api.signals).
+
+    The cached instances are never handed out: every request gets its
+    own copies, so attributes and related-object caches set on
+    request.user are not shared between requests or threads.
+    """
+
+    def authenticate_credentials(self, key):
+        credentials = token_cache.get(key)
+        if credentials is None:
+            credentials = super().authenticate_credentials(key)
+            token_cache.set(key, credentials)
+        user, token = credentials
+        user, token = copy.copy(user), copy.copy(token)
+        token.user = user
+        return user, token
@@ -0,0 +1,472 @@
+import hashlib
+import os
+import shutil
+import uuid
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from chemequip_core import CSVBlockParser, calculate_equipment_statistics, decoder_for, detect_anomalies
+from chemequip_core.decompression import IdentityDecoder
+from .models import DatasetContent, EquipmentObservation, UploadedDataset
+from .retention import enforce_retention
+from .utils import calculate_summary, dataframe_to_columns
+from .workers import analysis_pool
+
+
+# Partial uploads are written here, next to their final location, so
+# storing them is a rename rather than a copy
+INCOMING_DIR = 'content/.incoming'
+
+# Decompressed bytes allowed before the ratio guard applies, so a small
+# but legitimately well-compressed file is not mistaken for a bomb
+DECOMPRESSION_ALLOWANCE = 1024 * 1024
+
+# Equipment observations written per INSERT statement
+OBSERVATION_BATCH_SIZE = 1000
+
+
+class StreamingIngest:
+    """
+    Takes in the bytes of one CSV as they arrive and, in that single pass,
+    writes them to a temporary file in the content store, decompresses
+    them (.csv.gz, .csv.zst and .zip), hashes the plain CSV and parses it
+    block by block.
+
+    The upload is kept as received (compressed files stay compressed);
+    the hash covers the decompressed CSV, so the same data deduplicates
+    whatever encoding it arrives in. max_size limits the decompressed
+    size and the decompressed/compressed ratio is capped by
+    MAX_DECOMPRESSION_RATIO, so decompression stops early for a bomb.
+
+    Once the last chunk is in, store() either reuses the DatasetContent
+    with the same hash or renames the temporary file into the content
+    store; the bytes are never read back from disk.
+    """
+
+    def __init__(self, filename='', max_size=None, parse=True):
+        self.max_size = max_size
+        self.decoder = decoder_for(filename) or IdentityDecoder()
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.decoded_size = 0
+        # Without parsing, store() needs the analysis from elsewhere
+        self.parser = CSVBlockParser(extra_columns=settings.EXTRA_NUMERIC_COLUMNS) if parse else None
+        self.error = None
+        # Set when the file cannot be accepted at all; the hash then only
+        # covers part of it
+        self.rejected = False
+        self.sha256 = None
+        self.dataframe = None
+        self.accumulator = None
+
+        incoming_dir = default_storage.path(INCOMING_DIR)
+        os.makedirs(incoming_dir, exist_ok=True)
+        self.temp_path = os.path.join(incoming_dir, f"{uuid.uuid4().hex}.part")
+        self.file = open(self.temp_path, 'wb+')
+
+    @classmethod
+    def from_file(cls, file, parse=True):
+        """Ingest an already received file (e.g. when no upload handler ran)"""
+        ingest = cls(file.name, parse=parse)
+        for chunk in file.chunks():
+            ingest.write(chunk)
+        ingest.close()
+        return ingest
+
+    def write(self, data):
+        """Add the next chunk of the file as received"""
+        self.size += len(data)
+        if self.rejected:
+            # Keep counting so the size check can report it, but stop storing
+            return
+        if self.max_size is not None and self.size > self.max_size:
+            self.reject(f"File size cannot exceed {self.max_size // (1024 * 1024)}MB")
+            return
+
+        self.file.write(data)
+        try:
+            for piece in self.decoder.decode(data):
+                self.consume(piece)
+                if self.rejected:
+                    return
+        except ValueError as e:
+            self.reject(str(e))
+
+    def consume(self, piece):
+        """Hash and parse a piece of the plain CSV, enforcing the limits"""
+        self.decoded_size += len(piece)
+        if self.max_size is not None and self.decoded_size > self.max_size:
+            self.reject(f"Decompressed file size cannot exceed {self.max_size // (1024 * 1024)}MB")
+            return
+        if self.decoded_size > DECOMPRESSION_ALLOWANCE + self.size * settings.MAX_DECOMPRESSION_RATIO:
+            self.reject("File expands too much when decompressed")
+            return
+
+        self.digest.update(piece)
+        if self.error is None and self.parser is not None:
+            try:
+                self.parser.feed(piece)
+            except ValueError as e:
+                self.error = str(e)
+
+    def reject(self, error):
+        self.rejected = True
+        self.error = error
+
+    def close(self):
+        """Finish receiving: finalise the hash and parse the last block"""
+        self.file.flush()
+        self.file.seek(0)
+        if not self.rejected:
+            try:
+                for piece in self.decoder.finish():
+                    self.consume(piece)
+            except ValueError as e:
+                self.reject(str(e))
+        self.sha256 = self.digest.hexdigest()
+        if self.error is None and self.parser is not None:
+            try:
+                self.dataframe = self.parser.finish()
+                self.accumulator = self.parser.accumulator
+            except ValueError as e:
+                self.error = str(e)
+        self.parser = None
+
+    def store(self, analysis=None):
+        """
+        Move the received file into the content store.
+
+        Args:
+            analysis: analyze_file() result, for ingests that did not parse
+
+        Returns:
+            tuple: (DatasetContent, True if the content was already stored)
+
+        Raises:
+            ValueError: If the file is invalid
+        """
+        if self.rejected:
+            self.discard()
+            raise ValueError(self.error)
+
+        content = DatasetContent.objects.filter(sha256=self.sha256).first()
+        if content is not None:
+            # The temporary file is kept until discard() in case the
+            # caller has to store it after all
+            return content, True
+
+        if analysis is not None and 'error' in analysis:
+            self.error = analysis['error']
+        if self.error is not None:
+            self.discard()
+            raise ValueError(self.error)
+
+        if analysis is not None:
+            summary, data_json = analysis['summary'], analysis['data']
+            anomalies, equipment = analysis['anomalies'], analysis['equipment']
+        else:
+            summary = calculate_summary(self.dataframe, self.accumulator)
+            data_json = dataframe_to_columns(self.dataframe)
+            anomalies = detect_anomalies(self.dataframe)
+            equipment = calculate_equipment_statistics(self.dataframe)
+
+        # Same hash means same data, so a concurrent upload of this
+        # content may safely replace the file too
+        name = f"content/{self.sha256}{self.decoder.extension}"
+        self.file.close()
+        os.replace(self.temp_path, default_storage.path(name))
+
+        content = DatasetContent(
+            sha256=self.sha256, blob=name, size=self.size,
+            summary_json=summary, data_json=data_json, anomalies_json=anomalies,
+            equipment_json=equipment
+        )
+        try:
+            with transaction.atomic():
+                content.save()
+        except IntegrityError:
+            content = DatasetContent.objects.get(sha256=self.sha256)
+        return content, False
+
+    def discard(self):
+        """Delete the temporary file (no-op once stored)"""
+        self.file.close()
+        try:
+            os.remove(self.temp_path)
+        except FileNotFoundError:
+            pass
+
+
+def import_content_file(path, sha256, extension):
+    """
+    Copy a local file into the content store under its hash.
+
+    Returns:
+        str: Storage name of the stored file
+    """
+    name = f"content/{sha256}{extension}"
+    incoming_dir = default_storage.path(INCOMING_DIR)
+    os.makedirs(incoming_dir, exist_ok=True)
+    temp_path = os.path.join(incoming_dir, f"{uuid.uuid4().hex}.part")
+    shutil.copyfile(path, temp_path)
+    os.replace(temp_path, default_storage.path(name))
+    return name
+
+
+def ingest_analyzed_files(user, analyzed):
+    """
+    Store local files already parsed with analyze_file as datasets.
+
+    Known contents are reused; new files are copied into the content
+    store. Contents and datasets are written with bulk inserts in a
+    single transaction.
+
+    Args:
+        user: Owner of the new datasets
+        analyzed: List of (path, analyze_file() result) for valid files
+
+    Returns:
+        tuple: (created UploadedDatasets, number of new contents)
+    """
+    with transaction.atomic():
+        contents = DatasetContent.objects.in_bulk(
+            {analysis['sha256'] for _, analysis in analyzed}, field_name='sha256'
+        )
+        new_contents = []
+        for path, analysis in analyzed:
+            sha256 = analysis['sha256']
+            if sha256 in contents:
+                continue
+            extension = (decoder_for(path) or IdentityDecoder()).extension
+            contents[sha256] = DatasetContent(
+                sha256=sha256,
+                blob=import_content_file(path, sha256, extension),
+                size=analysis['size'],
+                summary_json=analysis['summary'],
+                data_json=analysis['data'],
+                anomalies_json=analysis['anomalies'],
+                equipment_json=analysis['equipment'],
+            )
+            new_contents.append(contents[sha256])
+        DatasetContent.objects.bulk_create(new_contents)
+
+        datasets = UploadedDataset.objects.bulk_create([
+            UploadedDataset(
+                user=user,
+                content=contents[analysis['sha256']],
+                filename=os.path.basename(path),
+                file_path=contents[analysis['sha256']].blob.name,
+                file_size=contents[analysis['sha256']].size,
+            )
+            for path, analysis in analyzed
+        ])
+        record_observations(datasets)
+    return datasets, len(new_contents)
+
+
+def record_observations(datasets):
+    """
+    Add the equipment observations of new datasets to their owners' history.
+
+    Writes one EquipmentObservation per piece of equipment per dataset,
+    all with one bulk insert. Call inside the transaction that creates
+    the datasets, so a dataset never exists without its observations.
+
+    Args:
+        datasets: Saved UploadedDatasets (with their content)
+    """
+    EquipmentObservation.objects.bulk_create([
+        EquipmentObservation(
+            user_id=dataset.user_id,
+            dataset=dataset,
+            equipment_name=equipment['name'],
+            equipment_type=equipment['type'] or '',
+            upload_date=dataset.upload_date,
+            row_count=equipment['count'],
+            parameters=equipment['parameters'],
+        )
+        for dataset in datasets
+        for equipment in dataset.get_equipment_statistics()
+    ], batch_size=OBSERVATION_BATCH_SIZE)
+
+
+def create_dataset(user, filename, content):
+    """Create a user's dataset row pointing at stored content, with its equipment observations"""
+    with transaction.atomic():
+        dataset = UploadedDataset.objects.create(
+            user=user,
+            content=content,
+            filename=filename,
+            file_path=content.blob.name,
+            file_size=content.size,
+        )
+        record_observations([dataset])
+    return dataset
+
+
+def ingest_upload(user, file):
+    """
+    Store an uploaded CSV for a user, reusing known content.
+
+    Files received through IngestUploadHandler were already hashed and
+    parsed while the request body arrived; other files are ingested here
+    in one pass.
+
+    Args:
+        user: Owner of the new dataset
+        file: Django UploadedFile
+
+    Returns:
+        tuple: (UploadedDataset, True if the content was already stored)
+
+    Raises:
+        ValueError: If the CSV is invalid
+    """
+    ingest = getattr(file, 'ingest', None)
+    if ingest is None:
+        ingest = StreamingIngest.from_file(file)
+    return store_ingest(user, file.name, ingest)
+
+
+def store_ingest(user, filename, ingest):
+    """
+    Turn a fully received StreamingIngest into a dataset for a user.
+
+    Content seen before (by any upload) is reused as is and only new
+    content is summarised and kept. Either way the user gets a new
+    UploadedDataset referencing it, and their retention policy is
+    applied. The ingest's temporary file is always removed.
+
+    Args:
+        user: Owner of the new dataset
+        filename: Name shown for the dataset
+        ingest: Closed StreamingIngest
+
+    Returns:
+        tuple: (UploadedDataset, True if the content was already stored)
+
+    Raises:
+        ValueError: If the CSV is invalid
+    """
+    try:
+        content, duplicate = ingest.store()
+        try:
+            with transaction.atomic():
+                dataset = create_dataset(user, filename, content)
+        except IntegrityError:
+            # The orphan sweep deleted the matching unused content in
+            # between; store this upload's copy instead
+            content, duplicate = ingest.store()
+            dataset = create_dataset(user, filename, content)
+    finally:
+        ingest.discard()
+
+    # Drop datasets beyond the user's retention policy (files are
+    # removed in the background)
+    enforce_retention(user)
+
+    return dataset, duplicate
+
+
+def store_batch(ingests):
+    """
+    Store the contents of several received files.
+
+    Contents already in the store are reused; the others are parsed and
+    summarised in parallel by the analysis pool, each distinct content
+    once.
+
+    Returns:
+        list: (DatasetContent, duplicate) or a ValueError, per ingest
+    """
+    hashes = {ingest.sha256 for ingest in ingests if not ingest.rejected}
+    known = set(
+        DatasetContent.objects.filter(sha256__in=hashes)
+        .values_list('sha256', flat=True)
+    )
+
+    to_analyze = {}
+    for ingest in ingests:
+        if not ingest.rejected and ingest.sha256 not in known:
+            to_analyze.setdefault(ingest.sha256, ingest)
+    results = analysis_pool.analyze([
+        (ingest.temp_path, ingest.decoder.extension) for ingest in to_analyze.values()
+    ])
+    analyses = dict(zip(to_analyze, results))
+
+    outcomes = []
+    for ingest in ingests:
+        try:
+            outcomes.append(ingest.store(analyses.get(ingest.sha256)))
+        except ValueError as e:
+            outcomes.append(e)
+    return outcomes
+
+
+def ingest_batch(user, files):
+    """
+    Store many uploaded CSVs for a user in one go.
+
+    Files must have been received through HashUploadHandler (or are read
+    here without parsing). New contents are parsed in parallel, all
+    datasets are written with one bulk insert in one transaction and the
+    retention policy is applied once. An invalid file does not affect the
+    others.
+
+    Args:
+        user: Owner of the new datasets
+        files: Django UploadedFiles
+
+    Returns:
+        list: One dict per file with 'filename' and either 'dataset' and
+        'duplicate' or 'error'
+    """
+    ingests = [
+        getattr(file, 'ingest', None) or StreamingIngest.from_file(file, parse=False)
+        for file in files
+    ]
+
+    try:
+        for attempt in range(2):
+            outcomes = store_batch(ingests)
+            stored = [
+                (file, outcome) for file, outcome in zip(files, outcomes)
+                if not isinstance(outcome, ValueError)
+            ]
+            try:
+                with transaction.atomic():
+                    datasets = UploadedDataset.objects.bulk_create([
+                        UploadedDataset(
+                            user=user,
+                            content=content,
+                            filename=file.name,
+                            file_path=content.blob.name,
+                            file_size=content.size,
+                        )
+                        for file, (content, _) in stored
+                    ])
+                    record_observations(datasets)
+                break
+            except IntegrityError:
+                # The orphan sweep deleted a matching unused content in
+                # between; store the batch again
+                if attempt:
+                    raise
+    finally:
+        for ingest in ingests:
+            ingest.discard()
+
+    enforce_retention(user)
+
+    datasets = iter(datasets)
+    results = []
+    for file, outcome in zip(files, outcomes):
+        if isinstance(outcome, ValueError):
+            results.append({'filename': file.name, 'error': str(outcome)})
+        else:
+            results.append({
+                'filename': file.name,
+                'dataset': next(datasets),
+                'duplicate': outcome[1],
+            })
+    return results
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from api.ingestion import record_observations
+from api.models import UploadedDataset
+
+
+class Command(BaseCommand):
+    help = "Add the equipment observations of datasets uploaded before the equipment history existed"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=50,
+            help='Datasets written per transaction'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(options['batch_size'], 1)
+        # Rows are only loaded for contents whose equipment statistics
+        # were never computed
+        datasets = (
+            UploadedDataset.objects.filter(observations__isnull=True)
+            .select_related('content')
+            .defer(
+                'data_json', 'content__data_json', 'content__anomalies_json',
+                'content__resampled_json'
+            )
+            .order_by('id')
+        )
+
+        done = 0
+        last_id = 0
+        while True:
+            batch = list(datasets.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            with transaction.atomic():
+                record_observations(batch)
+            done += len(batch)
+            last_id = batch[-1].id
+            self.stdout.write(f"  {done} datasets")
+
+        self.stdout.write(self.style.SUCCESS(f"Recorded the equipment observations of {done} datasets."))
@@ -0,0 +1,183 @@
+import glob
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from chemequip_core import analyze_file, supported_extensions
+from api.ingestion import ingest_analyzed_files
+from api.models import UploadedDataset
+from api.reports import pregenerate_report
+from api.retention import enforce_retention, get_retention_limits
+
+
+# Parsed rows held in memory before a batch is written, whatever its size
+MAX_BATCH_ROWS = 1000000
+
+
+class Command(BaseCommand):
+    help = (
+        "Import CSV files (optionally compressed) as datasets of a user, "
+        "parsing them in parallel worker processes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='+',
+            help='CSV files, directories (searched recursively) or glob patterns'
+        )
+        parser.add_argument(
+            '--user', required=True,
+            help='Username of the owner of the imported datasets'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=settings.ANALYSIS_WORKERS,
+            help='Worker processes parsing files and generating reports'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=20,
+            help='Datasets written per transaction'
+        )
+        parser.add_argument(
+            '--reports', action='store_true',
+            help='Pre-generate the PDF report of every imported dataset'
+        )
+        parser.add_argument(
+            '--apply-retention', action='store_true',
+            help=(
+                "Apply the user's retention policy once the files are imported "
+                "(this deletes datasets over the limits, imported ones included)"
+            )
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User \"{options['user']}\" does not exist")
+
+        paths = self.find_files(options['paths'])
+        if not paths:
+            raise CommandError("No CSV files found")
+
+        # Retention keeps only the newest datasets, so applying it to a
+        # larger import would delete most of what was just imported
+        max_count = get_retention_limits(user)['max_count']
+        if max_count is not None and len(paths) > max_count:
+            message = (
+                f"{len(paths)} files exceed the limit of {max_count} datasets kept for "
+                f"\"{user.username}\" by the retention policy"
+            )
+            if options['apply_retention']:
+                raise CommandError(
+                    f"{message}; raise the user's limit or import without --apply-retention"
+                )
+            self.stderr.write(self.style.WARNING(
+                f"{message}; the older datasets will be removed at the user's next upload"
+            ))
+
+        workers = max(options['workers'], 1)
+        self.verbosity = options['verbosity']
+        self.stdout.write(f"Importing {len(paths)} files with {workers} workers...")
+
+        stats = {'files': 0, 'failed': 0, 'rows': 0, 'bytes': 0, 'new_contents': 0}
+        dataset_ids = []
+        started = time.monotonic()
+
+        # Workers set up Django so they can also load datasets for reports
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=django.setup,
+        )
+        with executor:
+            batch = []
+            batch_rows = 0
+            for path, analysis in self.analyze_all(executor, paths, window=workers * 2):
+                if 'error' in analysis:
+                    stats['failed'] += 1
+                    self.stderr.write(self.style.WARNING(f"Skipped {path}: {analysis['error']}"))
+                    continue
+                batch.append((path, analysis))
+                batch_rows += analysis['rows']
+                if len(batch) >= options['batch_size'] or batch_rows >= MAX_BATCH_ROWS:
+                    self.write_batch(user, batch, stats, dataset_ids, len(paths))
+                    batch = []
+                    batch_rows = 0
+            if batch:
+                self.write_batch(user, batch, stats, dataset_ids, len(paths))
+
+            ingest_seconds = time.monotonic() - started
+            pruned = enforce_retention(user) if options['apply_retention'] else 0
+
+            if options['reports']:
+                report_started = time.monotonic()
+                kept_ids = list(
+                    UploadedDataset.objects.filter(pk__in=dataset_ids).values_list('pk', flat=True)
+                )
+                reports = sum(1 for size in executor.map(pregenerate_report, kept_ids) if size)
+                report_seconds = time.monotonic() - report_started
+
+        megabytes = stats['bytes'] / (1024 * 1024)
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {stats['files']} datasets ({stats['new_contents']} new contents, "
+            f"{stats['files'] - stats['new_contents']} duplicates); {stats['failed']} files failed."
+        ))
+        self.stdout.write(
+            f"Parsed {stats['rows']} rows ({megabytes:.2f} MB) in {ingest_seconds:.2f}s: "
+            f"{stats['rows'] / ingest_seconds:,.0f} rows/s, {megabytes / ingest_seconds:.2f} MB/s."
+        )
+        if pruned:
+            self.stdout.write(f"Retention policy removed {pruned} datasets.")
+        if options['reports']:
+            self.stdout.write(
+                f"Generated {reports} reports in {report_seconds:.2f}s "
+                f"({reports / max(report_seconds, 0.001):.2f} reports/s)."
+            )
+
+    def find_files(self, patterns):
+        """Expand directories and glob patterns into a sorted list of CSV files"""
+        extensions = tuple(supported_extensions())
+        found = set()
+        for pattern in patterns:
+            if os.path.isdir(pattern):
+                for root, _, names in os.walk(pattern):
+                    found.update(os.path.join(root, name) for name in names if name.endswith(extensions))
+            else:
+                found.update(
+                    path for path in glob.glob(pattern, recursive=True)
+                    if os.path.isfile(path) and path.endswith(extensions)
+                )
+        return sorted(found)
+
+    def analyze_all(self, executor, paths, window):
+        """
+        Yield (path, analyze_file() result) in order.
+
+        At most `window` files are parsed or waiting at a time, so memory
+        stays bounded however many files there are.
+        """
+        pending = deque()
+        for path in paths:
+            future = executor.submit(analyze_file, path, extra_columns=settings.EXTRA_NUMERIC_COLUMNS)
+            pending.append((path, future))
+            if len(pending) >= window:
+                path, future = pending.popleft()
+                yield path, future.result()
+        while pending:
+            path, future = pending.popleft()
+            yield path, future.result()
+
+    def write_batch(self, user, batch, stats, dataset_ids, total):
+        datasets, new_contents = ingest_analyzed_files(user, batch)
+        dataset_ids.extend(dataset.pk for dataset in datasets)
+        stats['files'] += len(batch)
+        stats['new_contents'] += new_contents
+        stats['rows'] += sum(analysis['rows'] for _, analysis in batch)
+        stats['bytes'] += sum(analysis['size'] for _, analysis in batch)
+        if self.verbosity >= 1:
+            self.stdout.write(f"  {stats['files'] + stats['failed']}/{total} files processed")
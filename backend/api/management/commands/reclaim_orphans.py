@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from api.reclaimer import reclaim_orphans
+
+
+class Command(BaseCommand):
+    help = "Delete files under MEDIA_ROOT that no dataset references and report the space reclaimed"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.ORPHAN_SWEEP_BATCH_SIZE,
+            help='Files checked per database query'
+        )
+        parser.add_argument(
+            '--grace', type=int, default=settings.ORPHAN_GRACE_PERIOD,
+            help='Skip files modified less than this many seconds ago'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only report what would be deleted'
+        )
+
+    def handle(self, *args, **options):
+        stats = reclaim_orphans(
+            batch_size=options['batch_size'],
+            grace_period=options['grace'],
+            dry_run=options['dry_run'],
+        )
+
+        verb = 'Would remove' if options['dry_run'] else 'Removed'
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {stats['files_checked']} files. "
+            f"{verb} {stats['contents_removed']} unused contents, "
+            f"{stats['sessions_removed']} expired upload sessions and "
+            f"{stats['files_removed']} orphaned files, "
+            f"{stats['bytes_reclaimed'] / (1024 * 1024):.2f} MB "
+            f"({stats['bytes_reclaimed']} bytes) reclaimed."
+        ))
@@ -0,0 +1,47 @@
+# Generated by Django 6.0.1 on 2026-10-19 10:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_file_sizes(apps, schema_editor):
+    """Record the size of files stored before file_size existed"""
+    UploadedDataset = apps.get_model('api', 'UploadedDataset')
+    for dataset in UploadedDataset.objects.only('id', 'file_path').iterator():
+        try:
+            size = dataset.file_path.size
+        except (OSError, ValueError):
+            continue
+        UploadedDataset.objects.filter(pk=dataset.pk).update(file_size=size)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_uploadeddataset_user'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadeddataset',
+            name='file_size',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='RetentionPolicy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('max_count', models.PositiveIntegerField(blank=True, help_text='Number of most recent datasets to keep', null=True)),
+                ('max_age_days', models.PositiveIntegerField(blank=True, help_text='Delete datasets older than this many days', null=True)),
+                ('max_bytes', models.PositiveBigIntegerField(blank=True, help_text='Total size of stored CSV files to keep (bytes)', null=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='retention_policy', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Retention Policy',
+                'verbose_name_plural': 'Retention Policies',
+            },
+        ),
+        migrations.RunPython(fill_file_sizes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0.1 on 2026-10-19 10:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_retention_policy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DatasetContent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('blob', models.FileField(upload_to='content/')),
+                ('size', models.BigIntegerField(default=0)),
+                ('summary_json', models.JSONField(blank=True, default=dict)),
+                ('data_json', models.JSONField(blank=True, default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Dataset Content',
+                'verbose_name_plural': 'Dataset Contents',
+            },
+        ),
+        migrations.AddField(
+            model_name='uploadeddataset',
+            name='content',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='datasets', to='api.datasetcontent'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_dataset_content'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasetcontent',
+            name='anomalies_json',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
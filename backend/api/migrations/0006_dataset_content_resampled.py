@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_dataset_content_anomalies'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasetcontent',
+            name='resampled_json',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
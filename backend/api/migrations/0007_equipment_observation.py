@@ -0,0 +1,40 @@
+# Generated by Django 6.0.1 on 2026-10-19 14:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_dataset_content_resampled'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasetcontent',
+            name='equipment_json',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.CreateModel(
+            name='EquipmentObservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('equipment_name', models.CharField(max_length=255)),
+                ('equipment_type', models.CharField(blank=True, max_length=255)),
+                ('upload_date', models.DateTimeField()),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('parameters', models.JSONField(blank=True, default=dict)),
+                ('dataset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='observations', to='api.uploadeddataset')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='equipment_observations', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Equipment Observation',
+                'verbose_name_plural': 'Equipment Observations',
+                'ordering': ['-upload_date'],
+                'indexes': [models.Index(fields=['user', 'equipment_name', '-upload_date'], name='observation_history_idx')],
+            },
+        ),
+    ]
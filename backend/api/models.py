@@ -2,18 +2,63 @@ from django.db import models
 from django.core.files.storage import FileSystemStorage
 from django.conf import settings
 from django.contrib.auth.models import User
-import os
 import json
+from chemequip_core import (
+    columns_to_records, records_to_columns, columns_to_dataframe, detect_anomalies, resample,
+    calculate_equipment_statistics,
+)
+
+
+class DatasetContent(models.Model):
+    """
+    Parsed content of one distinct CSV file, addressed by its SHA-256.
+    Every upload of the same bytes references the same row, so a repeat
+    upload is neither parsed nor stored again.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    blob = models.FileField(upload_to='content/')
+    size = models.BigIntegerField(default=0)
+    summary_json = models.JSONField(default=dict, blank=True)
+    # Rows as dictionary-encoded columns (see chemequip_core.columnar);
+    # contents stored before that hold a list of row dictionaries
+    data_json = models.JSONField(default=list, blank=True)
+    # Rows outside their type's normal envelope (see chemequip_core.anomalies);
+    # empty until computed for contents stored before anomaly detection
+    anomalies_json = models.JSONField(default=dict, blank=True)
+    # Time buckets of time-stamped data by interval (see
+    # chemequip_core.timeseries), filled as they are first requested
+    resampled_json = models.JSONField(default=dict, blank=True)
+    # Readings of each piece of equipment (see
+    # chemequip_core.analysis.calculate_equipment_statistics); empty until
+    # computed for contents stored before the equipment history
+    equipment_json = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Dataset Content'
+        verbose_name_plural = 'Dataset Contents'
+    
+    def __str__(self):
+        return self.sha256
 
 
 class UploadedDataset(models.Model):
     """
     Model to store uploaded CSV datasets and their analysis summaries.
-    Automatically maintains only the last 5 datasets per user.
+    How many datasets a user keeps is decided by their RetentionPolicy
+    (see api.retention), not by this model.
     """
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='datasets')
+    # Shared parsed content; empty for datasets stored before deduplication,
+    # which keep their own summary_json/data_json
+    content = models.ForeignKey(
+        DatasetContent, on_delete=models.PROTECT, related_name='datasets',
+        null=True, blank=True
+    )
     filename = models.CharField(max_length=255)
     file_path = models.FileField(upload_to='datasets/')
+    # Size of the stored CSV in bytes (used by byte-based retention)
+    file_size = models.BigIntegerField(default=0)
     upload_date = models.DateTimeField(auto_now_add=True)
     summary_json = models.JSONField(default=dict, blank=True)
     
@@ -28,31 +73,128 @@ class UploadedDataset(models.Model):
     def __str__(self):
         return f"{self.filename} - {self.upload_date.strftime('%Y-%m-%d %H:%M')}"
     
-    def save(self, *args, **kwargs):
-        """Override save to maintain only last 5 datasets per user"""
-        super().save(*args, **kwargs)
-        
-        # Get all datasets for this user ordered by upload date (newest first)
-        user_datasets = UploadedDataset.objects.filter(user=self.user)
-        
-        # If more than 5, delete the oldest ones
-        if user_datasets.count() > 5:
-            datasets_to_delete = user_datasets[5:]
-            for dataset in datasets_to_delete:
-                # Delete the file from filesystem
-                if dataset.file_path:
-                    try:
-                        if os.path.isfile(dataset.file_path.path):
-                            os.remove(dataset.file_path.path)
-                    except Exception as e:
-                        print(f"Error deleting file: {e}")
-                # Delete the database record
-                dataset.delete()
-    
     def get_summary(self):
         """Return the summary as a dictionary"""
+        if self.content_id:
+            return self.content.summary_json
         return self.summary_json
     
     def get_data(self):
-        """Return the parsed data as a list"""
-        return self.data_json
+        """Return the parsed data as a list of row dictionaries"""
+        data = self.content.data_json if self.content_id else self.data_json
+        if isinstance(data, dict):
+            return columns_to_records(data)
+        return data
+    
+    def get_columns(self):
+        """Return the parsed data as dictionary-encoded columns"""
+        data = self.content.data_json if self.content_id else self.data_json
+        if isinstance(data, dict):
+            return data
+        return records_to_columns(data)
+    
+    def get_anomalies(self):
+        """
+        Return the anomaly flags of the data.
+        
+        Flags missing for older data are computed now, and saved when the
+        data is shared content.
+        """
+        if self.content_id and self.content.anomalies_json:
+            return self.content.anomalies_json
+        anomalies = detect_anomalies(columns_to_dataframe(self.get_columns()))
+        if self.content_id:
+            self.content.anomalies_json = anomalies
+            self.content.save(update_fields=['anomalies_json'])
+        return anomalies
+    
+    def get_resampled(self, interval):
+        """
+        Return the data aggregated into time buckets of an interval.
+        
+        The result is saved with shared content, so each interval is
+        computed once per distinct file.
+        
+        Raises:
+            ValueError: If the interval is unknown or the data has no
+                timestamp column
+        """
+        if self.content_id and interval in self.content.resampled_json:
+            return self.content.resampled_json[interval]
+        result = resample(columns_to_dataframe(self.get_columns()), interval)
+        if self.content_id:
+            self.content.resampled_json = dict(self.content.resampled_json, **{interval: result})
+            self.content.save(update_fields=['resampled_json'])
+        return result
+    
+    def get_equipment_statistics(self):
+        """
+        Return the readings of each piece of equipment in the data.
+        
+        Statistics missing for older data are computed now, and saved when
+        the data is shared content.
+        """
+        if self.content_id and self.content.equipment_json:
+            return self.content.equipment_json
+        equipment = calculate_equipment_statistics(columns_to_dataframe(self.get_columns()))
+        if self.content_id:
+            self.content.equipment_json = equipment
+            self.content.save(update_fields=['equipment_json'])
+        return equipment
+
+
+class EquipmentObservation(models.Model):
+    """
+    Readings of one piece of equipment in one uploaded dataset.
+    One row per equipment name per upload (aggregated over that upload's
+    rows), so the history of a piece of equipment across all of a user's
+    uploads is a single indexed query. Written by api.ingestion.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='equipment_observations')
+    dataset = models.ForeignKey(UploadedDataset, on_delete=models.CASCADE, related_name='observations')
+    equipment_name = models.CharField(max_length=255)
+    equipment_type = models.CharField(max_length=255, blank=True)
+    # Copied from the dataset so the history is ordered without a join
+    upload_date = models.DateTimeField()
+    row_count = models.PositiveIntegerField(default=0)
+    # {column: {'mean', 'min', 'max'}} for every numeric column
+    parameters = models.JSONField(default=dict, blank=True)
+    
+    class Meta:
+        ordering = ['-upload_date']
+        indexes = [
+            models.Index(fields=['user', 'equipment_name', '-upload_date'], name='observation_history_idx'),
+        ]
+        verbose_name = 'Equipment Observation'
+        verbose_name_plural = 'Equipment Observations'
+    
+    def __str__(self):
+        return f"{self.equipment_name} in {self.dataset_id}"
+
+
+class RetentionPolicy(models.Model):
+    """
+    Per-user limits on kept datasets.
+    A limit left empty falls back to settings.DATASET_RETENTION; a limit
+    of 0 disables that rule for the user.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='retention_policy')
+    max_count = models.PositiveIntegerField(
+        null=True, blank=True,
+        help_text='Number of most recent datasets to keep'
+    )
+    max_age_days = models.PositiveIntegerField(
+        null=True, blank=True,
+        help_text='Delete datasets older than this many days'
+    )
+    max_bytes = models.PositiveBigIntegerField(
+        null=True, blank=True,
+        help_text='Total size of stored CSV files to keep (bytes)'
+    )
+    
+    class Meta:
+        verbose_name = 'Retention Policy'
+        verbose_name_plural = 'Retention Policies'
+    
+    def __str__(self):
+        return f"Retention policy for {self.user.username}"
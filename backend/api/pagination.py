@@ -0,0 +1,22 @@
+from rest_framework.pagination import LimitOffsetPagination
+
+
+class DatasetHistoryPagination(LimitOffsetPagination):
+    """
+    Limit/offset paging for the dataset history.
+    Only applies when the client passes ?limit=, so existing callers
+    keep getting a plain list.
+    """
+    max_limit = 100
+
+
+class AnomalyPagination(LimitOffsetPagination):
+    """Limit/offset paging for the flagged rows of a dataset"""
+    default_limit = 100
+    max_limit = 1000
+
+
+class EquipmentHistoryPagination(LimitOffsetPagination):
+    """Limit/offset paging for the uploads holding one piece of equipment"""
+    default_limit = 20
+    max_limit = 500
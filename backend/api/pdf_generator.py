@@ -1,7 +1,7 @@
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Image
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Image, KeepTogether
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 import io
@@ -9,7 +9,10 @@ from datetime import datetime
 import matplotlib
 matplotlib.use('Agg')  # Use non-interactive backend
 import matplotlib.pyplot as plt
+import matplotlib.dates as mdates
 import numpy as np
+from chemequip_core import columns_to_records
+from chemequip_core.timeseries import choose_interval
 
 
 def generate_pdf_report(dataset):
@@ -57,7 +60,7 @@ def generate_pdf_report(dataset):
         ['Report Generated:', datetime.now().strftime('%Y-%m-%d %H:%M:%S')],
         ['Dataset Filename:', dataset.filename],
         ['Upload Date:', dataset.upload_date.strftime('%Y-%m-%d %H:%M:%S')],
-        ['Total Equipment:', str(dataset.summary_json.get('total_count', 0))],
+        ['Total Equipment:', str(dataset.get_summary().get('total_count', 0))],
     ]
     
     info_table = Table(info_data, colWidths=[2*inch, 4*inch])
@@ -80,30 +83,32 @@ def generate_pdf_report(dataset):
     summary_heading = Paragraph("Summary Statistics", heading_style)
     elements.append(summary_heading)
     
-    summary = dataset.summary_json
-    summary_data = [
-        ['Metric', 'Average', 'Minimum', 'Maximum'],
-        [
-            'Flowrate',
-            f"{summary.get('avg_flowrate', 0):.2f}",
-            f"{summary.get('min_flowrate', 0):.2f}",
-            f"{summary.get('max_flowrate', 0):.2f}"
-        ],
-        [
-            'Pressure',
-            f"{summary.get('avg_pressure', 0):.2f}",
-            f"{summary.get('min_pressure', 0):.2f}",
-            f"{summary.get('max_pressure', 0):.2f}"
-        ],
-        [
-            'Temperature',
-            f"{summary.get('avg_temperature', 0):.2f}",
-            f"{summary.get('min_temperature', 0):.2f}",
-            f"{summary.get('max_temperature', 0):.2f}"
-        ],
-    ]
+    summary = dataset.get_summary()
+    # Summaries stored before percentiles were added show '-' for them
+    percentiles = summary.get('percentiles', {})
+    # Extra numeric columns are listed after the required ones; older
+    # summaries only have the flat avg_/min_/max_ fields of those
+    column_statistics = summary.get('column_statistics') or {
+        metric: {
+            'mean': summary.get(f'avg_{metric.lower()}', 0),
+            'min': summary.get(f'min_{metric.lower()}', 0),
+            'max': summary.get(f'max_{metric.lower()}', 0),
+        }
+        for metric in ['Flowrate', 'Pressure', 'Temperature']
+    }
+    summary_data = [['Metric', 'Average', 'Minimum', 'Median', '95th Pct.', 'Maximum']]
+    for metric, statistics in column_statistics.items():
+        metric_percentiles = percentiles.get(metric, {})
+        summary_data.append([
+            metric,
+            format_statistic(statistics['mean']),
+            format_statistic(statistics['min']),
+            format_statistic(metric_percentiles.get('p50')),
+            format_statistic(metric_percentiles.get('p95')),
+            format_statistic(statistics['max'])
+        ])
     
-    summary_table = Table(summary_data, colWidths=[2*inch, 1.5*inch, 1.5*inch, 1.5*inch])
+    summary_table = Table(summary_data, colWidths=[1.5*inch] + [1*inch] * 5)
     summary_table.setStyle(TableStyle([
         ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1976d2')),
         ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
@@ -161,6 +166,39 @@ def generate_pdf_report(dataset):
     elements.append(dist_table)
     elements.append(Spacer(1, 0.3*inch))
     
+    # Per-type statistics (not in summaries stored before they were added)
+    type_statistics = summary.get('type_statistics')
+    if type_statistics:
+        type_heading = Paragraph("Parameters by Equipment Type (mean ± std, min - max)", styles['Heading3'])
+        type_data = [['Equipment Type', 'Count', 'Flowrate', 'Pressure', 'Temperature']]
+        for equip_type, statistics in sorted(type_statistics.items()):
+            type_data.append(
+                [equip_type, str(statistics['count'])]
+                + [format_type_statistic(statistics[metric]) for metric in ['Flowrate', 'Pressure', 'Temperature']]
+            )
+        
+        type_table = Table(type_data, colWidths=[1.7*inch, 0.8*inch, 1.35*inch, 1.35*inch, 1.35*inch], repeatRows=1)
+        type_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1976d2')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+            ('TOPPADDING', (0, 0), (-1, 0), 8),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 8),
+            ('BOTTOMPADDING', (0, 1), (-1, -1), 5),
+            ('TOPPADDING', (0, 1), (-1, -1), 5),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f5f5f5')]),
+        ]))
+        
+        # Keep the heading and header row with the first rows
+        elements.append(KeepTogether([type_heading, type_table]))
+        elements.append(Spacer(1, 0.3*inch))
+    
     # Page break before charts
     elements.append(PageBreak())
     
@@ -181,12 +219,26 @@ def generate_pdf_report(dataset):
         elements.append(bar_chart_img)
         elements.append(Spacer(1, 0.3*inch))
     
-    # Generate Line Chart - Parameter Trends
-    line_chart_img = generate_parameters_trend_chart(dataset.data_json)
+    # Only the first 20 rows are shown, so only those are decoded
+    first_rows = columns_to_records(dataset.get_columns(), limit=20)
+    
+    # Generate Line Chart - Parameter Trends (over time for time-stamped data)
+    time_range = summary.get('time_range')
+    if time_range and time_range['start']:
+        interval = choose_interval(time_range['start'], time_range['end'])
+        line_chart_img = generate_time_trend_chart(dataset.get_resampled(interval))
+    else:
+        line_chart_img = generate_parameters_trend_chart(first_rows)
     if line_chart_img:
         elements.append(line_chart_img)
         elements.append(Spacer(1, 0.3*inch))
     
+    # Generate Heatmap - Parameter Correlation
+    heatmap_img = generate_correlation_heatmap(summary.get('correlation'))
+    if heatmap_img:
+        elements.append(heatmap_img)
+        elements.append(Spacer(1, 0.3*inch))
+    
     # Page break before equipment data
     elements.append(PageBreak())
     
@@ -194,7 +246,7 @@ def generate_pdf_report(dataset):
     data_heading = Paragraph("Equipment Data (First 20 rows)", heading_style)
     elements.append(data_heading)
     
-    data = dataset.data_json[:20]  # Limit to first 20 rows
+    data = first_rows
     if data:
         equipment_data = [['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temp']]
         
@@ -234,6 +286,20 @@ def generate_pdf_report(dataset):
     return buffer
 
 
+def format_statistic(value):
+    """Format a summary value for a table cell ('-' when it is missing)"""
+    if value is None:
+        return '-'
+    return f"{value:.2f}"
+
+
+def format_type_statistic(statistics):
+    """Format one parameter of one equipment type as 'mean ± std' over 'min - max'"""
+    std = statistics.get('std')
+    spread = f"{statistics['mean']:.2f}" if std is None else f"{statistics['mean']:.2f} ± {std:.2f}"
+    return f"{spread}\n{statistics['min']:.2f} - {statistics['max']:.2f}"
+
+
 def generate_pie_chart_distribution(type_distribution):
     """
     Generate a pie chart for equipment type distribution.
@@ -407,3 +473,118 @@ def generate_parameters_trend_chart(data):
     except Exception as e:
         plt.close('all')
         return None
+
+
+def generate_time_trend_chart(resampled):
+    """
+    Generate a line chart of parameter means over time, with min-max bands.
+    
+    Args:
+        resampled: Time buckets of the dataset (see UploadedDataset.get_resampled)
+        
+    Returns:
+        Image: ReportLab Image object
+    """
+    if not resampled['buckets']:
+        return None
+    
+    try:
+        # Create figure
+        fig, ax = plt.subplots(figsize=(7, 4))
+        
+        # Prepare data (missing values become NaN gaps)
+        times = np.array(resampled['buckets'], dtype='datetime64[ms]')
+        series = [('Flowrate', '#3b82f6'), ('Pressure', '#ef4444'), ('Temperature', '#10b981')]
+        
+        for column, color in series:
+            values = resampled['columns'][column]
+            means, lows, highs = (
+                np.array(values[stat], dtype=np.float64) for stat in ('mean', 'min', 'max')
+            )
+            ax.plot(times, means, linewidth=1.5, label=column, color=color)
+            ax.fill_between(times, lows, highs, color=color, alpha=0.2, linewidth=0)
+        
+        # Customize chart
+        ax.set_xlabel('Time (UTC)', fontsize=11, fontweight='bold')
+        ax.set_ylabel('Value', fontsize=11, fontweight='bold')
+        ax.set_title(f"Parameter Trends ({resampled['interval']} mean, min-max band)",
+                    fontsize=13, fontweight='bold', pad=15)
+        locator = mdates.AutoDateLocator()
+        ax.xaxis.set_major_locator(locator)
+        ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+        ax.legend(loc='best', framealpha=0.9)
+        ax.grid(alpha=0.3, linestyle='--')
+        ax.set_axisbelow(True)
+        
+        plt.tight_layout()
+        
+        # Save to buffer
+        img_buffer = io.BytesIO()
+        plt.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight')
+        img_buffer.seek(0)
+        plt.close(fig)
+        
+        # Create ReportLab Image
+        img = Image(img_buffer, width=6*inch, height=3.5*inch)
+        return img
+        
+    except Exception as e:
+        plt.close('all')
+        return None
+
+
+def generate_correlation_heatmap(correlation):
+    """
+    Generate a heatmap of the Pearson correlation between parameters.
+    
+    Args:
+        correlation: Dictionary with 'columns' and a 'pearson' matrix
+        
+    Returns:
+        Image: ReportLab Image object
+    """
+    if not correlation or not correlation.get('pearson'):
+        return None
+    
+    try:
+        # Create figure
+        fig, ax = plt.subplots(figsize=(5.5, 4.5))
+        
+        # Undefined coefficients (constant columns) are left blank
+        columns = correlation['columns']
+        matrix = [[float('nan') if value is None else value for value in row]
+                  for row in correlation['pearson']]
+        
+        # Diverging colours: blue for negative, red for positive correlation
+        heatmap = ax.imshow(matrix, cmap='RdBu_r', vmin=-1, vmax=1)
+        fig.colorbar(heatmap, ax=ax, fraction=0.046, pad=0.04)
+        
+        # Label every cell with its coefficient
+        for i, row in enumerate(correlation['pearson']):
+            for j, value in enumerate(row):
+                if value is not None:
+                    ax.text(j, i, f'{value:.2f}', ha='center', va='center', fontsize=10,
+                           fontweight='bold', color='white' if abs(value) > 0.6 else 'black')
+        
+        # Customize chart
+        ax.set_xticks(range(len(columns)))
+        ax.set_yticks(range(len(columns)))
+        ax.set_xticklabels(columns, rotation=45, ha='right')
+        ax.set_yticklabels(columns)
+        ax.set_title('Parameter Correlation (Pearson)', fontsize=13, fontweight='bold', pad=15)
+        
+        plt.tight_layout()
+        
+        # Save to buffer
+        img_buffer = io.BytesIO()
+        plt.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight')
+        img_buffer.seek(0)
+        plt.close(fig)
+        
+        # Create ReportLab Image
+        img = Image(img_buffer, width=4.5*inch, height=3.7*inch)
+        return img
+        
+    except Exception as e:
+        plt.close('all')
+        return None
@@ -0,0 +1,290 @@
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def referenced_dataset_files(names):
+    """Return the subset of names still used by an UploadedDataset"""
+    from .models import UploadedDataset
+    return set(
+        UploadedDataset.objects.filter(file_path__in=names)
+        .values_list('file_path', flat=True)
+    )
+
+
+def referenced_content_files(names):
+    """Return the subset of names still used by a DatasetContent or dataset"""
+    from .models import DatasetContent
+    referenced = set(
+        DatasetContent.objects.filter(blob__in=names)
+        .values_list('blob', flat=True)
+    )
+    return referenced | referenced_dataset_files(names)
+
+
+def referenced_report_files(names):
+    """Return the subset of report names whose dataset still exists"""
+    from .models import UploadedDataset
+    from .reports import REPORTS_DIR, report_name
+    ids = {}
+    for name in names:
+        stem = name[len(REPORTS_DIR) + 1:-len('.pdf')]
+        if name == report_name(stem) and stem.isdigit():
+            ids[int(stem)] = name
+    existing = UploadedDataset.objects.filter(pk__in=ids).values_list('pk', flat=True)
+    return {ids[dataset_id] for dataset_id in existing}
+
+
+def referenced_incoming_files(names):
+    """Partial uploads are never referenced; the grace period protects live ones"""
+    return set()
+
+
+# Directories under MEDIA_ROOT swept for orphans, with a function that
+# returns which of a batch of storage names are still referenced
+ARTIFACT_SOURCES = [
+    ('datasets', referenced_dataset_files),
+    ('content', referenced_content_files),
+    ('content/.incoming', referenced_incoming_files),
+    ('reports', referenced_report_files),
+]
+
+
+def is_file_referenced(name):
+    """Check whether any database row still points at a stored file"""
+    return any(name in is_referenced([name]) for _, is_referenced in ARTIFACT_SOURCES)
+
+
+def delete_unreferenced_contents(grace_period, batch_size, dry_run=False):
+    """
+    Delete DatasetContent rows that no dataset uses any more.
+
+    Their blobs become orphans and are removed by the file pass of
+    reclaim_orphans.
+
+    Returns:
+        tuple: (rows deleted, total blob size in bytes)
+    """
+    from .models import DatasetContent
+
+    unreferenced = DatasetContent.objects.filter(
+        datasets__isnull=True,
+        created_at__lt=timezone.now() - timedelta(seconds=grace_period)
+    )
+    if dry_run:
+        sizes = list(unreferenced.values_list('size', flat=True))
+        return len(sizes), sum(sizes)
+
+    deleted = 0
+    deleted_bytes = 0
+    while True:
+        batch = list(unreferenced.values_list('id', 'size')[:batch_size])
+        if not batch:
+            return deleted, deleted_bytes
+        # Re-check the reference inside the delete in case of a new upload
+        count, _ = DatasetContent.objects.filter(
+            pk__in=[content_id for content_id, _ in batch],
+            datasets__isnull=True
+        ).delete()
+        deleted += count
+        deleted_bytes += sum(size for _, size in batch)
+
+
+def iter_stored_files(directory):
+    """Yield (storage name, size, mtime) for files in a MEDIA_ROOT subdirectory"""
+    root = os.path.join(settings.MEDIA_ROOT, directory)
+    try:
+        entries = os.scandir(root)
+    except FileNotFoundError:
+        return
+    with entries:
+        for entry in entries:
+            if entry.is_file(follow_symlinks=False):
+                stat = entry.stat(follow_symlinks=False)
+                yield f"{directory}/{entry.name}", stat.st_size, stat.st_mtime
+
+
+def reclaim_orphans(batch_size=None, grace_period=None, dry_run=False):
+    """
+    Delete stored files that no database row references any more.
+
+    Files are checked against the database batch_size at a time, so
+    memory and query size stay bounded however many files there are.
+    Files younger than grace_period seconds are skipped: their upload may
+    not have been committed yet. Content rows no dataset uses are deleted
+    first, so their blobs are collected in the same run, and resumable
+    upload sessions idle for RESUMABLE_UPLOAD_EXPIRY are dropped.
+
+    Args:
+        batch_size: Files checked per database query
+        grace_period: Minimum file age in seconds
+        dry_run: Only count what would be removed
+
+    Returns:
+        dict: contents_removed, sessions_removed, files_checked,
+        files_removed and bytes_reclaimed
+    """
+    from .resumable import remove_expired_sessions
+
+    if batch_size is None:
+        batch_size = settings.ORPHAN_SWEEP_BATCH_SIZE
+    if grace_period is None:
+        grace_period = settings.ORPHAN_GRACE_PERIOD
+
+    stats = {
+        'contents_removed': 0, 'sessions_removed': 0,
+        'files_checked': 0, 'files_removed': 0, 'bytes_reclaimed': 0,
+    }
+    cutoff = time.time() - grace_period
+
+    sessions_removed, session_bytes = remove_expired_sessions(dry_run=dry_run)
+    stats['sessions_removed'] = sessions_removed
+    stats['bytes_reclaimed'] += session_bytes
+
+    contents_removed, content_bytes = delete_unreferenced_contents(grace_period, batch_size, dry_run)
+    stats['contents_removed'] = contents_removed
+    if dry_run:
+        # Their blobs are still referenced now, so the file pass cannot see them
+        stats['files_removed'] += contents_removed
+        stats['bytes_reclaimed'] += content_bytes
+
+    def reclaim_batch(batch, is_referenced):
+        referenced = is_referenced([name for name, _ in batch])
+        for name, size in batch:
+            if name in referenced:
+                continue
+            if dry_run:
+                removed = size
+            else:
+                removed = reclaimer.remove(name)
+                if removed is None:
+                    continue
+            stats['files_removed'] += 1
+            stats['bytes_reclaimed'] += removed
+
+    for directory, is_referenced in ARTIFACT_SOURCES:
+        batch = []
+        for name, size, mtime in iter_stored_files(directory):
+            stats['files_checked'] += 1
+            if mtime > cutoff:
+                continue
+            batch.append((name, size))
+            if len(batch) >= batch_size:
+                reclaim_batch(batch, is_referenced)
+                batch = []
+        if batch:
+            reclaim_batch(batch, is_referenced)
+
+    return stats
+
+
+class FileReclaimer:
+    """
+    Removes stored files on a background thread.
+
+    Deleting dataset rows is cheap; removing their files is not, so
+    callers hand the storage names over here (usually from
+    transaction.on_commit) and return without waiting for the disk.
+    Every ORPHAN_SWEEP_INTERVAL seconds the thread also runs
+    reclaim_orphans() to catch files nothing scheduled.
+    """
+
+    # Delay before the first sweep after the thread starts (seconds)
+    FIRST_SWEEP_DELAY = 60
+
+    def __init__(self):
+        self.pending = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+        self.next_sweep = None
+
+    def schedule(self, names):
+        """
+        Queue files for removal.
+
+        Args:
+            names: Storage names (FileField.name) of files no longer referenced
+        """
+        names = [name for name in names if name]
+        if not names:
+            return
+        self.ensure_started()
+        for name in names:
+            self.pending.put(name)
+
+    def ensure_started(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, name='file-reclaimer', daemon=True)
+                self.thread.start()
+
+    def run(self):
+        interval = settings.ORPHAN_SWEEP_INTERVAL
+        if interval:
+            self.next_sweep = time.monotonic() + min(interval, self.FIRST_SWEEP_DELAY)
+
+        while True:
+            timeout = None
+            if interval:
+                timeout = max(self.next_sweep - time.monotonic(), 0)
+            try:
+                name = self.pending.get(timeout=timeout)
+            except queue.Empty:
+                self.sweep()
+                self.next_sweep = time.monotonic() + interval
+                continue
+            try:
+                # Content blobs are shared; only remove what nothing uses
+                if not is_file_referenced(name):
+                    self.remove(name)
+            except Exception:
+                logger.exception("Could not reclaim %s", name)
+            finally:
+                self.pending.task_done()
+
+    def sweep(self):
+        """Run one orphan sweep, logging what it reclaimed"""
+        try:
+            stats = reclaim_orphans()
+            if stats['files_removed']:
+                logger.info(
+                    "Reclaimed %d orphaned files (%d bytes)",
+                    stats['files_removed'], stats['bytes_reclaimed']
+                )
+        except Exception:
+            logger.exception("Orphan sweep failed")
+        finally:
+            # This thread is not a request, so nothing else closes its connection
+            connection.close()
+
+    def remove(self, name):
+        """
+        Delete one stored file.
+
+        Returns:
+            int: Bytes reclaimed (0 if the file was already gone), or
+            None if the file could not be removed
+        """
+        try:
+            size = default_storage.size(name) if default_storage.exists(name) else 0
+            default_storage.delete(name)
+            return size
+        except OSError as e:
+            logger.warning("Could not remove %s: %s", name, e)
+            return None
+
+    def wait(self):
+        """Block until every scheduled file has been processed"""
+        self.pending.join()
+
+
+reclaimer = FileReclaimer()
@@ -0,0 +1,56 @@
+import os
+import uuid
+from django.core.files.storage import default_storage
+from .models import UploadedDataset
+from .pdf_generator import generate_pdf_report
+
+
+# Pre-generated PDF reports (see the ingest_csv command), one per dataset
+REPORTS_DIR = 'reports'
+
+
+def report_name(dataset_id):
+    """Storage name of a dataset's pre-generated report"""
+    return f"{REPORTS_DIR}/{dataset_id}.pdf"
+
+
+def load_report(dataset):
+    """
+    Get the PDF report of a dataset.
+
+    Args:
+        dataset: UploadedDataset model instance
+
+    Returns:
+        bytes: The pre-generated report if there is one, otherwise a
+        freshly generated report
+    """
+    try:
+        with default_storage.open(report_name(dataset.pk), 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return generate_pdf_report(dataset).getvalue()
+
+
+def pregenerate_report(dataset_id):
+    """
+    Generate a dataset's PDF report and store it for load_report.
+
+    Only takes the dataset id, so it can run in a worker process.
+
+    Returns:
+        int: Size of the report in bytes, or 0 if the dataset is gone
+    """
+    dataset = UploadedDataset.objects.select_related('content').filter(pk=dataset_id).first()
+    if dataset is None:
+        return 0
+    pdf = generate_pdf_report(dataset).getvalue()
+
+    path = default_storage.path(report_name(dataset_id))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write next to the final name first, so readers never see a partial report
+    temp_path = f"{path}.{uuid.uuid4().hex}.part"
+    with open(temp_path, 'wb') as f:
+        f.write(pdf)
+    os.replace(temp_path, path)
+    return len(pdf)
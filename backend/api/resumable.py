@@ -0,0 +1,312 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+from datetime import datetime, timezone
+from django.conf import settings
+from django.core.files.storage import default_storage
+from .ingestion import StreamingIngest, store_ingest
+
+
+# Upload sessions live in MEDIA_ROOT/uploads/<upload id>/: session.json
+# plus one file per received chunk
+SESSIONS_DIR = 'uploads'
+
+# Smallest chunk size a client may choose (the last chunk may be shorter)
+MIN_CHUNK_SIZE = 64 * 1024
+
+# Bytes copied at a time between requests, chunk files and the ingest
+COPY_SIZE = 64 * 1024
+
+SHA256_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+
+def sessions_root():
+    return default_storage.path(SESSIONS_DIR)
+
+
+class UploadSession:
+    """
+    One resumable upload, kept on local disk.
+
+    The client declares the file size when the session is created and then
+    sends the file as numbered chunks of chunk_size bytes (only the last
+    one may be shorter), in any order and as often as needed. Every chunk
+    is checked against its SHA-256 and written to its own file, so a
+    retried or concurrent PUT never corrupts another chunk, and what was
+    received survives a dropped connection or a server restart. Once all
+    chunks are in, complete() feeds them in order through the normal
+    ingestion path.
+    """
+
+    def __init__(self, upload_id, path, info):
+        self.upload_id = upload_id
+        self.path = path
+        self.info = info
+
+    @classmethod
+    def create(cls, user, filename, size, chunk_size=None, sha256=None):
+        """
+        Start a new upload session.
+
+        Args:
+            user: Owner of the upload
+            filename: Name of the file being uploaded
+            size: Total file size in bytes
+            chunk_size: Bytes per chunk (defaults to RESUMABLE_UPLOAD_CHUNK_SIZE)
+            sha256: Optional checksum of the whole file, checked on completion
+
+        Returns:
+            UploadSession: The new session
+        """
+        upload_id = str(uuid.uuid4())
+        path = os.path.join(sessions_root(), upload_id)
+        os.makedirs(path)
+
+        session = cls(upload_id, path, {
+            'user_id': user.pk,
+            'filename': filename,
+            'size': size,
+            'chunk_size': chunk_size or settings.RESUMABLE_UPLOAD_CHUNK_SIZE,
+            'sha256': sha256,
+            'created': time.time(),
+        })
+        with open(os.path.join(path, 'session.json'), 'w') as f:
+            json.dump(session.info, f)
+        return session
+
+    @classmethod
+    def load(cls, upload_id, user):
+        """
+        Find a user's upload session.
+
+        Returns:
+            UploadSession, or None if there is no such session for the user
+        """
+        upload_id = str(upload_id)
+        path = os.path.join(sessions_root(), upload_id)
+        try:
+            with open(os.path.join(path, 'session.json')) as f:
+                info = json.load(f)
+        except (FileNotFoundError, NotADirectoryError, ValueError):
+            return None
+        if info.get('user_id') != user.pk:
+            return None
+        return cls(upload_id, path, info)
+
+    @property
+    def size(self):
+        return self.info['size']
+
+    @property
+    def chunk_size(self):
+        return self.info['chunk_size']
+
+    @property
+    def chunk_count(self):
+        return -(-self.size // self.chunk_size)
+
+    def chunk_path(self, index):
+        return os.path.join(self.path, f"{index}.chunk")
+
+    def chunk_length(self, index):
+        """Expected length in bytes of a chunk"""
+        return min(self.chunk_size, self.size - index * self.chunk_size)
+
+    def received_chunks(self):
+        """Sorted indexes of the chunks received so far"""
+        indexes = []
+        for name in os.listdir(self.path):
+            stem, extension = os.path.splitext(name)
+            if extension == '.chunk' and stem.isdigit():
+                indexes.append(int(stem))
+        return sorted(indexes)
+
+    def write_chunk(self, index, stream, checksum):
+        """
+        Store one chunk read from a request body.
+
+        The chunk is written to a temporary file and only renamed into
+        place once its length and checksum are verified, so a broken
+        connection never leaves a partial chunk behind.
+
+        Args:
+            index: Chunk number, starting at 0
+            stream: File-like request body
+            checksum: Hex SHA-256 of the chunk as sent by the client
+
+        Raises:
+            ValueError: If the index, length or checksum is wrong
+        """
+        if not 0 <= index < self.chunk_count:
+            raise ValueError(f"Chunk index must be between 0 and {self.chunk_count - 1}")
+        if not checksum or not SHA256_PATTERN.match(checksum.lower()):
+            raise ValueError("X-Chunk-SHA256 header with the chunk's SHA-256 is required")
+
+        expected = self.chunk_length(index)
+        digest = hashlib.sha256()
+        received = 0
+        temp_path = os.path.join(self.path, f"{index}.{uuid.uuid4().hex}.tmp")
+        try:
+            with open(temp_path, 'wb') as f:
+                while stream is not None and received <= expected:
+                    data = stream.read(min(COPY_SIZE, expected + 1 - received))
+                    if not data:
+                        break
+                    received += len(data)
+                    digest.update(data)
+                    f.write(data)
+
+            if received != expected:
+                raise ValueError(f"Chunk {index} must be {expected} bytes")
+            if digest.hexdigest() != checksum.lower():
+                raise ValueError(f"Chunk {index} checksum mismatch")
+            os.replace(temp_path, self.chunk_path(index))
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def complete(self, user):
+        """
+        Ingest the assembled file as a new dataset and end the session.
+
+        The chunks are read once, in order, into a StreamingIngest, which
+        hashes, parses and stores them exactly like a direct upload.
+
+        Returns:
+            tuple: (UploadedDataset, True if the content was already
+            stored), or None if the session was completed concurrently
+
+        Raises:
+            ValueError: If chunks are missing, the file checksum does not
+                match or the CSV is invalid
+        """
+        try:
+            missing = self.missing_chunks()
+        except FileNotFoundError:
+            # Claimed or cancelled by another request since it was loaded
+            return None
+        if missing:
+            raise ValueError(f"{len(missing)} chunks have not been received")
+
+        # Claim the session so a second complete request or a late chunk
+        # cannot touch it while it is being ingested
+        claimed_path = f"{self.path}.complete"
+        try:
+            os.rename(self.path, claimed_path)
+        except FileNotFoundError:
+            return None
+        claimed = UploadSession(self.upload_id, claimed_path, self.info)
+
+        try:
+            ingest = StreamingIngest(self.info['filename'], max_size=settings.MAX_UPLOAD_SIZE)
+            for index in range(self.chunk_count):
+                with open(claimed.chunk_path(index), 'rb') as f:
+                    while True:
+                        data = f.read(COPY_SIZE)
+                        if not data:
+                            break
+                        ingest.write(data)
+            ingest.close()
+
+            expected_sha256 = self.info.get('sha256')
+            if expected_sha256 and ingest.sha256 != expected_sha256:
+                ingest.discard()
+                raise ValueError("File checksum does not match the uploaded chunks")
+
+            result = store_ingest(user, self.info['filename'], ingest)
+        except ValueError:
+            # The file itself is wrong; sending it again will not help
+            claimed.delete()
+            raise
+        except Exception:
+            # Keep the chunks so the client can retry completing
+            os.rename(claimed_path, self.path)
+            raise
+
+        claimed.delete()
+        return result
+
+    def missing_chunks(self):
+        received = set(self.received_chunks())
+        return [index for index in range(self.chunk_count) if index not in received]
+
+    def received_ranges(self):
+        """Received bytes as a list of [start, end) byte ranges"""
+        ranges = []
+        for index in self.received_chunks():
+            start = index * self.chunk_size
+            end = start + self.chunk_length(index)
+            if ranges and ranges[-1][1] == start:
+                ranges[-1][1] = end
+            else:
+                ranges.append([start, end])
+        return ranges
+
+    def expires_at(self):
+        """When the session is removed if no further chunk arrives"""
+        last_activity = os.stat(self.path).st_mtime
+        return datetime.fromtimestamp(
+            last_activity + settings.RESUMABLE_UPLOAD_EXPIRY, tz=timezone.utc
+        )
+
+    def describe(self):
+        """State of the session as returned to the client"""
+        ranges = self.received_ranges()
+        return {
+            'upload_id': self.upload_id,
+            'filename': self.info['filename'],
+            'size': self.size,
+            'chunk_size': self.chunk_size,
+            'chunk_count': self.chunk_count,
+            'received_bytes': sum(end - start for start, end in ranges),
+            'received_ranges': ranges,
+            'missing_chunks': self.missing_chunks(),
+            'expires_at': self.expires_at().isoformat(),
+        }
+
+    def delete(self):
+        """Drop the session and every chunk received for it"""
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def remove_expired_sessions(max_age=None, dry_run=False):
+    """
+    Delete upload sessions nobody has sent a chunk to for max_age seconds.
+
+    Args:
+        max_age: Seconds of inactivity (defaults to RESUMABLE_UPLOAD_EXPIRY)
+        dry_run: Only count what would be removed
+
+    Returns:
+        tuple: (sessions removed, bytes reclaimed)
+    """
+    if max_age is None:
+        max_age = settings.RESUMABLE_UPLOAD_EXPIRY
+    cutoff = time.time() - max_age
+
+    removed = 0
+    removed_bytes = 0
+    try:
+        entries = list(os.scandir(sessions_root()))
+    except FileNotFoundError:
+        return removed, removed_bytes
+
+    for entry in entries:
+        if not entry.is_dir(follow_symlinks=False):
+            continue
+        if entry.stat(follow_symlinks=False).st_mtime > cutoff:
+            continue
+        size = sum(
+            chunk.stat(follow_symlinks=False).st_size
+            for chunk in os.scandir(entry.path)
+            if chunk.is_file(follow_symlinks=False)
+        )
+        if not dry_run:
+            shutil.rmtree(entry.path, ignore_errors=True)
+        removed += 1
+        removed_bytes += size
+    return removed, removed_bytes
@@ -0,0 +1,112 @@
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+from .models import UploadedDataset, RetentionPolicy
+from .reclaimer import reclaimer
+from .reports import report_name
+
+
+def get_retention_limits(user):
+    """
+    Resolve the effective retention limits for a user.
+
+    Args:
+        user: User whose datasets are pruned
+
+    Returns:
+        dict: max_count, max_age_days and max_bytes; None means no limit
+    """
+    defaults = settings.DATASET_RETENTION
+    limits = {
+        'max_count': defaults.get('MAX_COUNT'),
+        'max_age_days': defaults.get('MAX_AGE_DAYS'),
+        'max_bytes': defaults.get('MAX_BYTES'),
+    }
+
+    policy = RetentionPolicy.objects.filter(user=user).first()
+    if policy is not None:
+        for field in limits:
+            value = getattr(policy, field)
+            if value is not None:
+                # 0 switches the rule off for this user
+                limits[field] = value or None
+
+    return limits
+
+
+def select_expired(rows, limits, now):
+    """
+    Pick the datasets that fall outside the limits.
+
+    Args:
+        rows: (id, upload_date, file_size) tuples, newest first
+        limits: Result of get_retention_limits
+        now: Current time
+
+    Returns:
+        list: IDs to delete. The newest dataset is never selected, so an
+        upload is not removed by the request that created it.
+    """
+    max_count = limits['max_count']
+    max_bytes = limits['max_bytes']
+    cutoff = None
+    if limits['max_age_days'] is not None:
+        cutoff = now - timedelta(days=limits['max_age_days'])
+
+    expired = []
+    kept_bytes = 0
+    for index, (dataset_id, upload_date, file_size) in enumerate(rows):
+        kept_bytes += file_size
+        if index == 0:
+            continue
+        if ((max_count is not None and index >= max_count)
+                or (cutoff is not None and upload_date < cutoff)
+                or (max_bytes is not None and kept_bytes > max_bytes)):
+            expired.append(dataset_id)
+            kept_bytes -= file_size
+
+    return expired
+
+
+def enforce_retention(user):
+    """
+    Delete the user's datasets that exceed their retention policy.
+
+    Runs in one transaction: the user row is locked so concurrent uploads
+    by the same user prune one after the other, and the overflow is
+    removed with a single bulk delete. The CSV files are handed to the
+    background reclaimer once the transaction commits.
+
+    Args:
+        user: User whose datasets are pruned
+
+    Returns:
+        int: Number of datasets deleted
+    """
+    limits = get_retention_limits(user)
+    if all(value is None for value in limits.values()):
+        return 0
+
+    with transaction.atomic():
+        # No-op on SQLite, which serialises writers on its own
+        User.objects.select_for_update().get(pk=user.pk)
+
+        rows = list(
+            UploadedDataset.objects.filter(user=user)
+            .order_by('-upload_date', '-id')
+            .values_list('id', 'upload_date', 'file_size')
+        )
+        expired = select_expired(rows, limits, timezone.now())
+        if not expired:
+            return 0
+
+        expired_datasets = UploadedDataset.objects.filter(pk__in=expired)
+        file_names = list(expired_datasets.values_list('file_path', flat=True))
+        file_names += [report_name(dataset_id) for dataset_id in expired]
+        expired_datasets.delete()
+
+        transaction.on_commit(lambda: reclaimer.schedule(file_names))
+
+    return len(expired)
@@ -1,11 +1,23 @@
 from rest_framework import serializers
+from django.conf import settings
 from .models import UploadedDataset
+from .resumable import MIN_CHUNK_SIZE
+from chemequip_core import supported_extensions
+
+
+def validate_csv_filename(name):
+    """Accept plain CSV and the supported compressed CSV formats"""
+    extensions = supported_extensions()
+    if not name.endswith(tuple(extensions)):
+        raise serializers.ValidationError(
+            f"Only CSV files are allowed ({', '.join(extensions)})"
+        )
 
 
 class UploadedDatasetSerializer(serializers.ModelSerializer):
     """Serializer for UploadedDataset model"""
-    summary = serializers.JSONField(source='summary_json', read_only=True)
-    data = serializers.JSONField(source='data_json', read_only=True)
+    summary = serializers.JSONField(source='get_summary', read_only=True)
+    data = serializers.JSONField(source='get_data', read_only=True)
     entry_count = serializers.SerializerMethodField()
     
     class Meta:
@@ -14,15 +26,21 @@ class UploadedDatasetSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'upload_date', 'summary', 'data']
     
     def get_entry_count(self, obj):
-        """Calculate the number of entries in the dataset"""
-        if obj.data_json and isinstance(obj.data_json, list):
-            return len(obj.data_json)
-        return 0
+        """Read the entry count from the summary rather than counting rows"""
+        return obj.get_summary().get('total_count', 0)
+
+
+class ColumnarDatasetSerializer(UploadedDatasetSerializer):
+    """
+    Dataset detail with the data as dictionary-encoded columns
+    ({'length', 'columns'}, see chemequip_core.columnar) instead of rows
+    """
+    data = serializers.JSONField(source='get_columns', read_only=True)
 
 
 class DatasetListSerializer(serializers.ModelSerializer):
     """Lightweight serializer for listing datasets (without full data)"""
-    summary = serializers.JSONField(source='summary_json', read_only=True)
+    summary = serializers.JSONField(source='get_summary', read_only=True)
     entry_count = serializers.SerializerMethodField()
     
     class Meta:
@@ -31,10 +49,8 @@ class DatasetListSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'filename', 'upload_date', 'summary']
     
     def get_entry_count(self, obj):
-        """Calculate the number of entries in the dataset"""
-        if obj.data_json and isinstance(obj.data_json, list):
-            return len(obj.data_json)
-        return 0
+        """Read the entry count from the summary so data_json is never loaded"""
+        return obj.get_summary().get('total_count', 0)
 
 
 class CSVUploadSerializer(serializers.Serializer):
@@ -42,12 +58,46 @@ class CSVUploadSerializer(serializers.Serializer):
     file = serializers.FileField(required=True)
     
     def validate_file(self, value):
-        """Validate that the uploaded file is a CSV"""
-        if not value.name.endswith('.csv'):
-            raise serializers.ValidationError("Only CSV files are allowed")
+        """Validate that the uploaded file is a (possibly compressed) CSV"""
+        validate_csv_filename(value.name)
         
-        # Check file size (max 10MB)
-        if value.size > 10 * 1024 * 1024:
-            raise serializers.ValidationError("File size cannot exceed 10MB")
+        # Check file size (max 10MB by default); the decompressed size is
+        # checked while the file is ingested
+        if value.size > settings.MAX_UPLOAD_SIZE:
+            raise serializers.ValidationError(
+                f"File size cannot exceed {settings.MAX_UPLOAD_SIZE // (1024 * 1024)}MB"
+            )
         
         return value
+
+
+class UploadSessionSerializer(serializers.Serializer):
+    """Serializer for starting a resumable upload session"""
+    filename = serializers.CharField(max_length=255)
+    size = serializers.IntegerField(min_value=1)
+    chunk_size = serializers.IntegerField(required=False, min_value=MIN_CHUNK_SIZE)
+    sha256 = serializers.RegexField(r'^[0-9a-fA-F]{64}$', required=False)
+    
+    def validate_filename(self, value):
+        """Validate that the file to be uploaded is a (possibly compressed) CSV"""
+        validate_csv_filename(value)
+        return value
+    
+    def validate_size(self, value):
+        """Reject files over the upload limit before any chunk is sent"""
+        if value > settings.MAX_UPLOAD_SIZE:
+            raise serializers.ValidationError(
+                f"File size cannot exceed {settings.MAX_UPLOAD_SIZE // (1024 * 1024)}MB"
+            )
+        return value
+    
+    def validate_chunk_size(self, value):
+        """Keep chunks small enough to be received in one request"""
+        if value > settings.RESUMABLE_UPLOAD_MAX_CHUNK_SIZE:
+            raise serializers.ValidationError(
+                f"Chunk size cannot exceed {settings.RESUMABLE_UPLOAD_MAX_CHUNK_SIZE} bytes"
+            )
+        return value
+    
+    def validate_sha256(self, value):
+        return value.lower()
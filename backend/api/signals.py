@@ -0,0 +1,32 @@
+from django.contrib.auth.models import User
+from django.core.signals import request_started
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from .authentication import token_cache
+from .reclaimer import reclaimer
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    """Stop accepting a token as soon as it is deleted"""
+    token_cache.invalidate(instance.key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_changed_user(sender, instance, **kwargs):
+    """
+    Drop cached tokens of a saved or deleted user, so deactivation
+    (is_active=False) takes effect on the next request.
+    """
+    token_cache.invalidate_user(instance.pk)
+
+
+@receiver(request_started)
+def start_reclaimer(sender, **kwargs):
+    """
+    Start the background file reclaimer (and its periodic orphan sweep)
+    in processes that serve requests, but not in management commands.
+    """
+    reclaimer.ensure_started()
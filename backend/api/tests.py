@@ -1,3 +1,1628 @@
-from django.test import TestCase
+import gzip
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import time
+import unittest
+import urllib.parse
+from unittest import mock
+import zipfile
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+import chemequip_core.analysis
+from chemequip_core import (
+    REQUIRED_COLUMNS, CSVBlockParser, KLLSketch, analyze_file, calculate_summary, columns_to_dataframe,
+    columns_to_records, dataframe_to_columns, detect_anomalies, detect_extra_columns, parse_csv_file,
+    read_csv_typed, rows_at, unpack_bitmask,
+)
+from chemequip_core.anomalies import pack_bitmask
+from chemequip_core.decompression import GzipDecoder, OUTPUT_PIECE_SIZE, ZipDecoder, ZstdDecoder, zstandard
+from chemequip_core.sketches import CoMoments
+from chemequip_core.timeseries import choose_interval, resample
+from .authentication import CachedTokenAuthentication, TokenUserCache, token_cache
+from .ingestion import (
+    DECOMPRESSION_ALLOWANCE, INCOMING_DIR, StreamingIngest, ingest_analyzed_files, store_ingest,
+)
+from .models import DatasetContent, EquipmentObservation, RetentionPolicy, UploadedDataset
+from .reclaimer import FileReclaimer, reclaim_orphans, reclaimer
+from .reports import report_name
+from .resumable import MIN_CHUNK_SIZE, UploadSession, remove_expired_sessions, sessions_root
+from .retention import enforce_retention, get_retention_limits, select_expired
 
-# Create your tests here.
+
+SAMPLE_CSV = (
+    b"Equipment Name,Type,Flowrate,Pressure,Temperature\n"
+    b"Pump-1,Pump,120.5,5.2,110.0\n"
+    b"Valve-1,Valve,60.0,4.1,95.5\n"
+    b"Reactor-1,Reactor,150.0,7.5,180.2\n"
+)
+
+
+def time_ago(**kwargs):
+    return timezone.now() - timedelta(**kwargs)
+
+
+def sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def chunks_of(data, chunk_size):
+    return [data[start:start + chunk_size] for start in range(0, len(data), chunk_size)]
+
+
+def decode_all(decoder, data, chunk_size=7):
+    """Decode data fed in small chunks, as a slow upload would arrive"""
+    pieces = []
+    for chunk in chunks_of(data, chunk_size):
+        pieces.extend(decoder.decode(chunk))
+    pieces.extend(decoder.finish())
+    return b''.join(pieces)
+
+
+def zip_of(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+class TemporaryMediaMixin:
+    """Points MEDIA_ROOT at a fresh temporary directory for each test"""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp(prefix='chemequip_test_')
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def incoming_files(self):
+        """Temporary files left in the content store's incoming directory"""
+        incoming_dir = os.path.join(self.media_root, INCOMING_DIR)
+        return os.listdir(incoming_dir) if os.path.isdir(incoming_dir) else []
+
+
+class ContentStoreTests(TemporaryMediaMixin, TestCase):
+    """Deduplicated uploads through the content-addressed store"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('alice', password='secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, name, data):
+        return self.client.post(
+            '/api/upload/', {'file': SimpleUploadedFile(name, data)}, format='multipart'
+        )
+
+    def test_same_bytes_reuse_content(self):
+        first = self.upload('first.csv', SAMPLE_CSV)
+        second = self.upload('second.csv', SAMPLE_CSV)
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertFalse(first.json()['duplicate'])
+        self.assertTrue(second.json()['duplicate'])
+        self.assertEqual(DatasetContent.objects.count(), 1)
+        content = DatasetContent.objects.get()
+        self.assertEqual(content.datasets.count(), 2)
+        self.assertEqual(second.json()['dataset']['summary'], first.json()['dataset']['summary'])
+        self.assertEqual(self.incoming_files(), [])
+
+    def test_different_bytes_store_new_content(self):
+        self.upload('first.csv', SAMPLE_CSV)
+        response = self.upload('second.csv', SAMPLE_CSV + b"Pump-2,Pump,99.0,5.0,100.0\n")
+
+        self.assertFalse(response.json()['duplicate'])
+        self.assertEqual(DatasetContent.objects.count(), 2)
+
+    def test_invalid_csv_is_rejected_and_temp_file_removed(self):
+        ingest = StreamingIngest('broken.csv')
+        ingest.write(b"Name,Kind\nPump-1,Pump\n")
+        ingest.close()
+        temp_path = ingest.temp_path
+        self.assertTrue(os.path.exists(temp_path))
+
+        with self.assertRaises(ValueError):
+            store_ingest(self.user, 'broken.csv', ingest)
+
+        self.assertFalse(os.path.exists(temp_path))
+        self.assertEqual(self.incoming_files(), [])
+        self.assertFalse(UploadedDataset.objects.exists())
+        self.assertFalse(DatasetContent.objects.exists())
+
+    def test_invalid_upload_returns_400(self):
+        response = self.upload('broken.csv', b"Name,Kind\nPump-1,Pump\n")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.json())
+        self.assertEqual(self.incoming_files(), [])
+
+
+class SharedContentDeletionTests(TemporaryMediaMixin, TransactionTestCase):
+    """
+    Deleting datasets that share content. A TransactionTestCase, since the
+    background reclaimer checks references on its own connection.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('bob', password='secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_deleting_one_of_two_datasets_keeps_shared_blob(self):
+        for name in ('first.csv', 'second.csv'):
+            response = self.client.post(
+                '/api/upload/', {'file': SimpleUploadedFile(name, SAMPLE_CSV)}, format='multipart'
+            )
+            self.assertEqual(response.status_code, 201)
+        first, second = UploadedDataset.objects.order_by('id')
+        blob = first.content.blob.name
+        self.assertEqual(second.content_id, first.content_id)
+
+        response = self.client.delete(f'/api/datasets/{first.pk}/delete/')
+        self.assertEqual(response.status_code, 200)
+        reclaimer.wait()
+
+        self.assertTrue(default_storage.exists(blob))
+        self.assertTrue(DatasetContent.objects.filter(pk=second.content_id).exists())
+        response = self.client.get(f'/api/datasets/{second.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['data']), 3)
+
+
+class UploadSessionTests(TemporaryMediaMixin, TestCase):
+    """Resumable uploads kept on disk between requests"""
+
+    CHUNK_SIZE = 40
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('carol', password='secret')
+        self.chunks = chunks_of(SAMPLE_CSV, self.CHUNK_SIZE)
+        self.session = UploadSession.create(
+            self.user, 'sample.csv', len(SAMPLE_CSV),
+            chunk_size=self.CHUNK_SIZE, sha256=sha256(SAMPLE_CSV)
+        )
+
+    def send(self, session, index, data=None, checksum=None):
+        data = self.chunks[index] if data is None else data
+        session.write_chunk(index, io.BytesIO(data), checksum or sha256(data))
+
+    def session_files(self, session):
+        return sorted(os.listdir(session.path))
+
+    def test_chunk_with_wrong_length_is_rejected(self):
+        short = self.chunks[0][:-1]
+        with self.assertRaisesRegex(ValueError, 'must be 40 bytes'):
+            self.send(self.session, 0, short)
+        with self.assertRaisesRegex(ValueError, 'must be 40 bytes'):
+            self.send(self.session, 0, self.chunks[0] + b'x')
+        # Neither the chunk nor its temporary file is left behind
+        self.assertEqual(self.session_files(self.session), ['session.json'])
+
+    def test_last_chunk_may_be_shorter(self):
+        last = len(self.chunks) - 1
+        self.assertLess(len(self.chunks[last]), self.CHUNK_SIZE)
+        self.send(self.session, last)
+        self.assertEqual(self.session.received_chunks(), [last])
+
+    def test_chunk_with_wrong_checksum_is_rejected(self):
+        with self.assertRaisesRegex(ValueError, 'checksum mismatch'):
+            self.send(self.session, 0, checksum=sha256(b'something else'))
+        with self.assertRaisesRegex(ValueError, 'X-Chunk-SHA256'):
+            self.session.write_chunk(0, io.BytesIO(self.chunks[0]), None)
+        self.assertEqual(self.session_files(self.session), ['session.json'])
+
+    def test_chunk_index_out_of_range_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.send(self.session, len(self.chunks), b'x' * self.CHUNK_SIZE)
+        with self.assertRaises(ValueError):
+            self.send(self.session, -1, self.chunks[0])
+
+    def test_resume_after_missing_chunks(self):
+        for index in range(0, len(self.chunks), 2):
+            self.send(self.session, index)
+
+        # A new request sees what the previous ones stored
+        session = UploadSession.load(self.session.upload_id, self.user)
+        missing = list(range(1, len(self.chunks), 2))
+        self.assertEqual(session.missing_chunks(), missing)
+        self.assertEqual(session.describe()['received_ranges'][0], [0, self.CHUNK_SIZE])
+        with self.assertRaisesRegex(ValueError, f'{len(missing)} chunks have not been received'):
+            session.complete(self.user)
+        self.assertTrue(os.path.isdir(session.path))
+
+        for index in missing:
+            self.send(session, index)
+        self.assertEqual(session.describe()['received_bytes'], len(SAMPLE_CSV))
+        dataset, duplicate = session.complete(self.user)
+
+        self.assertFalse(duplicate)
+        self.assertEqual(dataset.get_summary()['total_count'], 3)
+        with default_storage.open(dataset.content.blob.name) as f:
+            self.assertEqual(f.read(), SAMPLE_CSV)
+        self.assertFalse(os.path.exists(session.path))
+
+    def test_resent_chunk_replaces_the_first_copy(self):
+        for index in range(len(self.chunks)):
+            self.send(self.session, index)
+        self.send(self.session, 0)
+        self.assertEqual(self.session.received_chunks(), list(range(len(self.chunks))))
+        self.assertIsNotNone(self.session.complete(self.user))
+
+    def test_double_complete_ingests_once(self):
+        for index in range(len(self.chunks)):
+            self.send(self.session, index)
+        # Two requests that loaded the session before either completed it
+        first = UploadSession.load(self.session.upload_id, self.user)
+        second = UploadSession.load(self.session.upload_id, self.user)
+
+        self.assertIsNotNone(first.complete(self.user))
+        self.assertIsNone(second.complete(self.user))
+        self.assertEqual(UploadedDataset.objects.count(), 1)
+        self.assertIsNone(UploadSession.load(self.session.upload_id, self.user))
+        self.assertEqual(os.listdir(sessions_root()), [])
+
+    def test_file_checksum_mismatch_drops_session(self):
+        session = UploadSession.create(
+            self.user, 'sample.csv', len(SAMPLE_CSV),
+            chunk_size=self.CHUNK_SIZE, sha256=sha256(b'another file')
+        )
+        for index in range(len(self.chunks)):
+            self.send(session, index)
+
+        with self.assertRaisesRegex(ValueError, 'File checksum does not match'):
+            session.complete(self.user)
+        self.assertFalse(UploadedDataset.objects.exists())
+        self.assertIsNone(UploadSession.load(session.upload_id, self.user))
+        self.assertEqual(self.incoming_files(), [])
+
+    def test_session_belongs_to_its_user(self):
+        other = User.objects.create_user('mallory', password='secret')
+        self.assertIsNone(UploadSession.load(self.session.upload_id, other))
+
+    def test_remove_expired_sessions(self):
+        self.send(self.session, 0)
+        fresh = UploadSession.create(self.user, 'fresh.csv', len(SAMPLE_CSV), chunk_size=self.CHUNK_SIZE)
+        stale = time.time() - 2 * 60 * 60
+        os.utime(self.session.path, (stale, stale))
+        session_bytes = sum(os.path.getsize(os.path.join(self.session.path, name))
+                            for name in os.listdir(self.session.path))
+
+        self.assertEqual(remove_expired_sessions(max_age=60 * 60, dry_run=True), (1, session_bytes))
+        self.assertTrue(os.path.isdir(self.session.path))
+
+        self.assertEqual(remove_expired_sessions(max_age=60 * 60), (1, session_bytes))
+        self.assertFalse(os.path.exists(self.session.path))
+        self.assertTrue(os.path.isdir(fresh.path))
+        self.assertEqual(remove_expired_sessions(max_age=60 * 60), (0, 0))
+
+
+class UploadSessionAPITests(TemporaryMediaMixin, TestCase):
+    """The resumable upload endpoints end to end"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('dave', password='secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        rows = b"".join(f"Pump-{i},Pump,{100 + i % 50}.5,5.2,110.0\n".encode() for i in range(4000))
+        self.data = SAMPLE_CSV + rows
+        self.chunks = chunks_of(self.data, MIN_CHUNK_SIZE)
+
+    def put_chunk(self, upload_id, index, data):
+        return self.client.put(
+            f'/api/uploads/{upload_id}/chunks/{index}/', data=data,
+            content_type='application/octet-stream', HTTP_X_CHUNK_SHA256=sha256(data)
+        )
+
+    def test_chunked_upload(self):
+        response = self.client.post('/api/uploads/', {
+            'filename': 'large.csv', 'size': len(self.data),
+            'chunk_size': MIN_CHUNK_SIZE, 'sha256': sha256(self.data),
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        upload_id = response.json()['upload_id']
+        self.assertGreater(response.json()['chunk_count'], 1)
+
+        for index in reversed(range(len(self.chunks))):
+            self.assertEqual(self.put_chunk(upload_id, index, self.chunks[index]).status_code, 200)
+        response = self.put_chunk(upload_id, 0, self.chunks[0][:-1])
+        self.assertEqual(response.status_code, 400)
+
+        status = self.client.get(f'/api/uploads/{upload_id}/').json()
+        self.assertEqual(status['missing_chunks'], [])
+        self.assertEqual(status['received_ranges'], [[0, len(self.data)]])
+
+        response = self.client.post(f'/api/uploads/{upload_id}/complete/')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['dataset']['summary']['total_count'], 4003)
+        response = self.client.post(f'/api/uploads/{upload_id}/complete/')
+        self.assertEqual(response.status_code, 404)
+
+
+class DecoderTests(SimpleTestCase):
+    """Streaming decoders of compressed uploads"""
+
+    def test_gzip_with_several_members(self):
+        data = gzip.compress(SAMPLE_CSV[:60]) + gzip.compress(SAMPLE_CSV[60:])
+
+        self.assertEqual(decode_all(GzipDecoder(), data), SAMPLE_CSV)
+
+    @unittest.skipIf(zstandard is None, "zstandard is not installed")
+    def test_zstd_with_concatenated_frames(self):
+        compressor = zstandard.ZstdCompressor(write_checksum=True)
+        # Skippable frame: magic, length, payload
+        skippable = (0x184D2A50).to_bytes(4, 'little') + (3).to_bytes(4, 'little') + b'abc'
+        data = compressor.compress(SAMPLE_CSV[:60]) + skippable + compressor.compress(SAMPLE_CSV[60:])
+
+        self.assertEqual(decode_all(ZstdDecoder(), data), SAMPLE_CSV)
+        self.assertEqual(decode_all(ZstdDecoder(), data, chunk_size=1), SAMPLE_CSV)
+
+    def test_zip_with_single_csv(self):
+        data = zip_of({'__MACOSX/._data.csv': b'x', 'data.csv': SAMPLE_CSV})
+
+        self.assertEqual(decode_all(ZipDecoder(), data), SAMPLE_CSV)
+
+    def test_zip_with_two_members_is_rejected(self):
+        data = zip_of({'first.csv': SAMPLE_CSV, 'second.csv': SAMPLE_CSV})
+
+        with self.assertRaisesMessage(ValueError, "single CSV file"):
+            decode_all(ZipDecoder(), data)
+
+    def test_zip_with_bad_crc_is_rejected(self):
+        data = bytearray(zip_of({'data.csv': SAMPLE_CSV}))
+        # CRC-32 of the local file header
+        data[14] ^= 0xFF
+
+        with self.assertRaisesMessage(ValueError, "checksum mismatch"):
+            decode_all(ZipDecoder(), bytes(data))
+
+    def test_truncated_streams_are_incomplete(self):
+        encoded = {
+            GzipDecoder: gzip.compress(SAMPLE_CSV),
+            # The central directory is not needed, so cut before it
+            ZipDecoder: zip_of({'data.csv': SAMPLE_CSV}).split(b'PK\x01\x02')[0],
+        }
+        if zstandard is not None:
+            encoded[ZstdDecoder] = zstandard.ZstdCompressor().compress(SAMPLE_CSV)
+
+        for decoder_class, data in encoded.items():
+            for cut in (len(data) // 2, len(data) - 1):
+                with self.subTest(decoder=decoder_class.__name__, cut=cut):
+                    with self.assertRaisesMessage(ValueError, "incomplete"):
+                        decode_all(decoder_class(), data[:cut])
+
+    @unittest.skipIf(zstandard is None, "zstandard is not installed")
+    def test_zstd_output_is_bounded_per_call(self):
+        bomb = zstandard.ZstdCompressor().compress(bytes(20 * 1024 * 1024))
+        decoder = ZstdDecoder()
+
+        pieces = [len(piece) for piece in decoder.decode(bomb)]
+
+        self.assertEqual(sum(pieces), 20 * 1024 * 1024)
+        self.assertLessEqual(max(pieces), OUTPUT_PIECE_SIZE)
+
+
+class DecompressionLimitTests(TemporaryMediaMixin, TestCase):
+    """Size and ratio limits applied to the decompressed data"""
+
+    def assertStopsEarly(self, ingest, limit):
+        # Decoding stops within one output piece of the limit
+        self.assertTrue(ingest.rejected)
+        self.assertLessEqual(ingest.decoded_size, limit + OUTPUT_PIECE_SIZE)
+
+    def test_bomb_is_rejected_by_ratio(self):
+        bombs = {'bomb.csv.gz': gzip.compress(bytes(50 * 1024 * 1024))}
+        if zstandard is not None:
+            bombs['bomb.csv.zst'] = zstandard.ZstdCompressor().compress(bytes(50 * 1024 * 1024))
+
+        for filename, data in bombs.items():
+            with self.subTest(filename=filename):
+                ingest = StreamingIngest(filename)
+                for chunk in chunks_of(data, 64 * 1024):
+                    ingest.write(chunk)
+                ingest.close()
+
+                self.assertEqual(ingest.error, "File expands too much when decompressed")
+                self.assertStopsEarly(
+                    ingest, DECOMPRESSION_ALLOWANCE + ingest.size * settings.MAX_DECOMPRESSION_RATIO
+                )
+                with self.assertRaisesMessage(ValueError, "expands too much"):
+                    ingest.store()
+                self.assertEqual(self.incoming_files(), [])
+
+    @override_settings(MAX_UPLOAD_SIZE=1024 * 1024, MAX_DECOMPRESSION_RATIO=10000)
+    def test_decompressed_size_over_max_upload_size_is_rejected(self):
+        rows = b"".join(
+            b"Pump-%d,Pump,120.5,5.2,110.0\n" % index for index in range(60000)
+        )
+        data = gzip.compress(SAMPLE_CSV + rows)
+        self.assertLess(len(data), settings.MAX_UPLOAD_SIZE)
+
+        user = User.objects.create_user('alice', password='secret')
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.post(
+            '/api/upload/', {'file': SimpleUploadedFile('large.csv.gz', data)}, format='multipart'
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], "Decompressed file size cannot exceed 1MB")
+        self.assertFalse(UploadedDataset.objects.exists())
+        self.assertEqual(self.incoming_files(), [])
+
+    @override_settings(MAX_UPLOAD_SIZE=1024 * 1024, MAX_DECOMPRESSION_RATIO=10000)
+    def test_streaming_ingest_stops_at_max_size(self):
+        ingest = StreamingIngest('large.csv.gz', max_size=settings.MAX_UPLOAD_SIZE)
+        ingest.write(gzip.compress(bytes(20 * 1024 * 1024)))
+        ingest.close()
+
+        self.assertEqual(ingest.error, "Decompressed file size cannot exceed 1MB")
+        self.assertStopsEarly(ingest, settings.MAX_UPLOAD_SIZE)
+        ingest.discard()
+
+
+@override_settings(DATASET_RETENTION={'MAX_COUNT': 5, 'MAX_AGE_DAYS': None, 'MAX_BYTES': None})
+class IngestCSVCommandTests(TemporaryMediaMixin, TestCase):
+    """Bulk import with the ingest_csv management command"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('alice', password='secret')
+        self.csv_dir = tempfile.mkdtemp(prefix='chemequip_csv_')
+        self.addCleanup(shutil.rmtree, self.csv_dir, ignore_errors=True)
+        for index in range(7):
+            with open(os.path.join(self.csv_dir, f'plant-{index}.csv'), 'wb') as f:
+                f.write(SAMPLE_CSV + b"Pump-%d,Pump,100.0,5.0,100.0\n" % index)
+
+    def ingest(self, *args):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command(
+            'ingest_csv', self.csv_dir, '--user', 'alice', '--workers', '1', *args,
+            stdout=stdout, stderr=stderr
+        )
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_import_keeps_every_dataset_by_default(self):
+        stdout, stderr = self.ingest()
+
+        self.assertEqual(UploadedDataset.objects.filter(user=self.user).count(), 7)
+        self.assertIn("limit of 5 datasets", stderr)
+        self.assertNotIn("Retention policy removed", stdout)
+
+    def test_apply_retention_over_the_limit_aborts_before_importing(self):
+        with self.assertRaisesMessage(CommandError, "limit of 5 datasets"):
+            self.ingest('--apply-retention')
+
+        self.assertFalse(UploadedDataset.objects.exists())
+
+
+# Rank error stated for KLLSketch with the default k
+KLL_RANK_ERROR = 0.005
+
+
+def sensor_csv(rows, seed=0):
+    """CSV with an extra column, quoted names and a few unusable values"""
+    rng = np.random.default_rng(seed)
+    types = [b'Pump', b'Valve', b'Reactor', b'Compressor']
+    lines = [b"Equipment Name,Type,Flowrate,Pressure,Temperature,Vibration"]
+    for index in range(rows):
+        flowrate = b'n/a' if index % 97 == 0 else b'%.3f' % rng.normal(120, 30)
+        vibration = b'' if index % 50 == 0 else b'%.3f' % rng.normal(2, 0.5)
+        lines.append(b'"Unit %d, line ""A""",%s,%s,%.3f,%.3f,%s' % (
+            index, types[index % 4], flowrate, rng.normal(5, 1), rng.normal(150, 20), vibration
+        ))
+    return b"\n".join(lines) + b"\n"
+
+
+class SketchTests(SimpleTestCase):
+    """Streaming sketches against exact numpy/pandas results"""
+
+    FRACTIONS = [0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99]
+
+    def assertWithinRankError(self, values, estimates):
+        for fraction, estimate in zip(self.FRACTIONS, estimates):
+            low = np.percentile(values, 100 * max(fraction - KLL_RANK_ERROR, 0))
+            high = np.percentile(values, 100 * min(fraction + KLL_RANK_ERROR, 1))
+            self.assertTrue(low <= estimate <= high, f"p{fraction * 100:g}: {estimate} not in [{low}, {high}]")
+
+    def test_kll_quantiles_within_rank_error(self):
+        values = np.random.default_rng(1).lognormal(0, 1, 200000)
+        sketch = KLLSketch()
+        for block in chunks_of(values, 7777):
+            sketch.update(block)
+
+        self.assertEqual(sketch.count, len(values))
+        self.assertWithinRankError(values, sketch.quantiles(self.FRACTIONS))
+
+    def test_merged_kll_quantiles_within_rank_error(self):
+        values = np.random.default_rng(2).normal(100, 15, 200000)
+        sketches = [KLLSketch(seed=seed) for seed in range(4)]
+        for sketch, part in zip(sketches, np.array_split(values, 4)):
+            sketch.update(part)
+        for sketch in sketches[1:]:
+            sketches[0].merge(sketch)
+
+        self.assertEqual(sketches[0].count, len(values))
+        self.assertWithinRankError(values, sketches[0].quantiles(self.FRACTIONS))
+
+    def test_small_kll_is_exact(self):
+        values = np.arange(100, dtype=np.float64)
+        sketch = KLLSketch()
+        sketch.update(values)
+
+        self.assertEqual(sketch.quantiles([0, 0.5, 1]), [0.0, 49.0, 99.0])
+
+    def test_merged_comoments_match_pandas(self):
+        rng = np.random.default_rng(3)
+        base = rng.normal(0, 1, 50000)
+        values = np.column_stack([
+            1e6 + base, 5 * base + rng.normal(0, 1, 50000), rng.uniform(-3, 3, 50000)
+        ])
+        df = pd.DataFrame(values)
+
+        moments = CoMoments(3)
+        for block in (values[:1], values[1:777], values[777:30000], values[30000:]):
+            moments.merge(CoMoments.from_values(block))
+
+        self.assertEqual(moments.count, len(df))
+        np.testing.assert_allclose(moments.mean, df.mean().to_numpy(), rtol=1e-12)
+        np.testing.assert_allclose(np.diag(moments.covariance()), df.var().to_numpy(), rtol=1e-9)
+        np.testing.assert_allclose(moments.covariance(), df.cov().to_numpy(), rtol=1e-9, atol=1e-9)
+        np.testing.assert_allclose(moments.correlation(), df.corr().to_numpy(), rtol=1e-9, atol=1e-9)
+
+
+class CSVBlockParserTests(SimpleTestCase):
+    """Parsing in small blocks gives the same data and summary as one pass"""
+
+    def test_small_blocks_match_parse_csv_file(self):
+        data = sensor_csv(3000)
+        parser = CSVBlockParser(block_size=2048)
+        for chunk in chunks_of(data, 97):
+            parser.feed(chunk)
+        df = parser.finish()
+        expected_df = parse_csv_file(io.BytesIO(data))
+
+        pd.testing.assert_frame_equal(df, expected_df)
+        summary = calculate_summary(df, parser.accumulator)
+        expected = calculate_summary(expected_df)
+        # The sketches compact differently when fed block by block, so
+        # percentiles agree to within the rank error only
+        percentiles = summary.pop('percentiles')
+        expected.pop('percentiles')
+        self.assertEqual(summary, expected)
+        self.assertEqual(summary['total_count'], len(expected_df))
+        for col, estimates in percentiles.items():
+            values = expected_df[col].dropna().to_numpy()
+            for name, estimate in estimates.items():
+                fraction = int(name[1:]) / 100
+                low = np.percentile(values, 100 * (fraction - KLL_RANK_ERROR))
+                high = np.percentile(values, 100 * min(fraction + KLL_RANK_ERROR, 1))
+                # Estimates are rounded to 2 decimals
+                self.assertTrue(low - 0.005 <= estimate <= high + 0.005, f"{col} {name}: {estimate}")
+
+
+TIMESTAMPED_CSV = (
+    b"Timestamp,Equipment Name,Type,Flowrate,Pressure,Temperature,Vibration\n"
+    b"2024-01-01T00:00:00Z,Pump-1,Pump,120.5,5.2,110.0,0.4\n"
+    b"2024-01-01T00:30:00Z,Valve-1,Valve,60.0,4.1,95.5,0.6\n"
+)
+
+
+SENSOR_CSV = (
+    b"Equipment Name,Type,Flowrate,Pressure,Temperature,Vibration,Notes,Running,Level,Spare\n"
+    b"Pump-1,Pump,120.5,5.2,110.0,0.4,ok,true,10,\n"
+    b"Valve-1,Valve,60.0,4.1,95.5,,check seal,false,20,\n"
+    b"Pump-2,Pump,150.0,7.5,180.2,0.6,ok,true,30,\n"
+)
+
+
+class ColumnDetectionTests(SimpleTestCase):
+    """Extra numeric and timestamp columns of a CSV"""
+
+    def test_configured_columns_keep_timestamp(self):
+        detected = detect_extra_columns(io.BytesIO(TIMESTAMPED_CSV))
+        configured = detect_extra_columns(io.BytesIO(TIMESTAMPED_CSV), configured=['Vibration'])
+
+        self.assertEqual(detected, ['Timestamp', 'Vibration'])
+        self.assertEqual(configured, ['Timestamp', 'Vibration'])
+        df = parse_csv_file(io.BytesIO(TIMESTAMPED_CSV), extra_columns=['Vibration'])
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(df['Timestamp']))
+        self.assertEqual(calculate_summary(df)['time_range']['end'], '2024-01-01T00:30:00')
+
+    def test_numeric_columns_are_detected(self):
+        detected = detect_extra_columns(io.BytesIO(SENSOR_CSV))
+
+        # Text, true/false and empty columns are not numeric readings
+        self.assertEqual(detected, ['Vibration', 'Level'])
+
+    def test_configured_columns_missing_from_file_are_ignored(self):
+        self.assertEqual(
+            detect_extra_columns(io.BytesIO(SENSOR_CSV), configured=['Level', 'Power']), ['Level']
+        )
+        df = parse_csv_file(io.BytesIO(SENSOR_CSV), extra_columns=['Level', 'Power'])
+        self.assertEqual(list(df.columns), REQUIRED_COLUMNS + ['Level'])
+
+    def test_configured_text_column_is_dropped(self):
+        df = parse_csv_file(io.BytesIO(SENSOR_CSV), extra_columns=['Notes', 'Vibration'])
+
+        self.assertEqual(list(df.columns), REQUIRED_COLUMNS + ['Vibration'])
+        self.assertEqual(len(df), 3)
+
+    def test_extra_columns_in_summary(self):
+        df = parse_csv_file(io.BytesIO(SENSOR_CSV))
+        summary = calculate_summary(df)
+
+        self.assertEqual(summary['numeric_columns'], ['Flowrate', 'Pressure', 'Temperature', 'Vibration', 'Level'])
+        # A gap in an extra column does not drop the row
+        self.assertEqual(summary['total_count'], 3)
+        self.assertEqual(summary['column_statistics']['Vibration'],
+                         {'count': 2, 'mean': 0.5, 'min': 0.4, 'max': 0.6, 'std': 0.14})
+        self.assertEqual(summary['column_statistics']['Level']['mean'], 20.0)
+        self.assertEqual(summary['correlation']['columns'], summary['numeric_columns'])
+        self.assertEqual(summary['percentiles']['Level']['p50'], 20.0)
+        self.assertEqual(set(summary['histograms']), set(summary['numeric_columns']))
+        self.assertEqual(summary['type_statistics']['Pump']['Level']['max'], 30.0)
+
+
+@override_settings(EXTRA_NUMERIC_COLUMNS=['Vibration'])
+class ConfiguredColumnsUploadTests(TemporaryMediaMixin, TestCase):
+    """Uploads with EXTRA_NUMERIC_COLUMNS set"""
+
+    def test_configured_columns_and_timestamp(self):
+        user = User.objects.create_user('alice', password='secret')
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.post(
+            '/api/upload/', {'file': SimpleUploadedFile('timed.csv', TIMESTAMPED_CSV)}, format='multipart'
+        )
+
+        self.assertEqual(response.status_code, 201)
+        summary = response.json()['dataset']['summary']
+        self.assertEqual(summary['numeric_columns'], ['Flowrate', 'Pressure', 'Temperature', 'Vibration'])
+        self.assertEqual(summary['time_range']['start'], '2024-01-01T00:00:00')
+
+
+def readings(times, flowrates, vibrations):
+    """Cleaned-style DataFrame of timed readings (None is a missing time)"""
+    return pd.DataFrame({
+        'Timestamp': pd.to_datetime(times).astype('datetime64[ms]'),
+        'Equipment Name': [f'Pump-{index}' for index in range(len(times))],
+        'Type': 'Pump',
+        'Flowrate': flowrates,
+        'Pressure': 5.0,
+        'Temperature': 100.0,
+        'Vibration': vibrations,
+    })
+
+
+class ResampleTests(SimpleTestCase):
+    """Time buckets of time-stamped data"""
+
+    def setUp(self):
+        self.df = readings(
+            ['2024-01-01T00:00:10', '2024-01-01T00:00:50', '2024-01-01T00:01:05', None,
+             '2024-01-01T00:03:00'],
+            [1.0, 3.0, 5.0, 9.0, 7.0],
+            [1.0, np.nan, np.nan, 5.0, 4.0],
+        )
+
+    def test_rows_are_grouped_into_buckets(self):
+        result = resample(self.df, '1min')
+
+        self.assertEqual(result['column'], 'Timestamp')
+        # The row without a time is left out; the empty minute is skipped
+        self.assertEqual(
+            result['buckets'], ['2024-01-01T00:00:00', '2024-01-01T00:01:00', '2024-01-01T00:03:00']
+        )
+        self.assertEqual(result['counts'], [2, 1, 1])
+        self.assertEqual(
+            result['columns']['Flowrate'],
+            {'mean': [2.0, 5.0, 7.0], 'min': [1.0, 5.0, 7.0], 'max': [3.0, 5.0, 7.0]}
+        )
+
+    def test_gaps_are_left_out(self):
+        vibration = resample(self.df, '1min')['columns']['Vibration']
+
+        self.assertEqual(vibration, {'mean': [1.0, None, 4.0], 'min': [1.0, None, 4.0], 'max': [1.0, None, 4.0]})
+
+    def test_wider_interval(self):
+        result = resample(self.df, '1h', columns=['Flowrate'])
+
+        self.assertEqual(result['buckets'], ['2024-01-01T00:00:00'])
+        self.assertEqual(result['counts'], [4])
+        self.assertEqual(result['columns'], {'Flowrate': {'mean': [4.0], 'min': [1.0], 'max': [7.0]}})
+
+    def test_rows_out_of_time_order_are_sorted(self):
+        shuffled = self.df.iloc[[4, 2, 0, 3, 1]].reset_index(drop=True)
+
+        self.assertEqual(resample(shuffled, '1min'), resample(self.df, '1min'))
+
+    def test_invalid_input(self):
+        with self.assertRaisesMessage(ValueError, "interval must be one of"):
+            resample(self.df, '5min')
+        with self.assertRaisesMessage(ValueError, "no timestamp column"):
+            resample(self.df.drop(columns='Timestamp'), '1h')
+
+    def test_choose_interval(self):
+        self.assertEqual(choose_interval('2024-01-01T00:00:00', '2024-01-01T02:00:00'), '1min')
+        self.assertEqual(choose_interval('2024-01-01T00:00:00', '2024-01-03T00:00:00'), '1h')
+        self.assertEqual(choose_interval('2024-01-01T00:00:00', '2024-03-01T00:00:00'), '1d')
+        # Longer than max_buckets days: still the widest interval
+        self.assertEqual(choose_interval('2020-01-01T00:00:00', '2024-01-01T00:00:00'), '1d')
+
+
+class ResampleAPITests(TemporaryMediaMixin, TestCase):
+    """The dataset resample endpoint"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('alice', password='secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, name, data):
+        response = self.client.post(
+            '/api/upload/', {'file': SimpleUploadedFile(name, data)}, format='multipart'
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.json()['dataset']['id']
+
+    def test_resample_is_cached_per_interval(self):
+        dataset_id = self.upload('timed.csv', TIMESTAMPED_CSV)
+
+        response = self.client.get(f'/api/datasets/{dataset_id}/resample/?interval=1h')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['buckets'], ['2024-01-01T00:00:00'])
+        self.assertEqual(response.json()['counts'], [2])
+        self.assertEqual(response.json()['columns']['Flowrate']['mean'], [90.25])
+        content = DatasetContent.objects.get()
+        self.assertEqual(list(content.resampled_json), ['1h'])
+
+        # A later request is answered from the cache
+        cached = dict(content.resampled_json['1h'], counts=[99])
+        content.resampled_json = {'1h': cached}
+        content.save(update_fields=['resampled_json'])
+        response = self.client.get(f'/api/datasets/{dataset_id}/resample/?interval=1h&columns=Flowrate&stats=max')
+        self.assertEqual(response.json()['counts'], [99])
+        self.assertEqual(response.json()['columns'], {'Flowrate': {'max': [120.5]}})
+
+    def test_bad_interval_is_rejected(self):
+        dataset_id = self.upload('timed.csv', TIMESTAMPED_CSV)
+
+        response = self.client.get(f'/api/datasets/{dataset_id}/resample/?interval=5min')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('interval must be one of', response.json()['error'])
+
+    def test_data_without_timestamps_is_rejected(self):
+        dataset_id = self.upload('plain.csv', SAMPLE_CSV)
+
+        response = self.client.get(f'/api/datasets/{dataset_id}/resample/')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], "Dataset has no timestamp column")
+        self.assertEqual(DatasetContent.objects.get().resampled_json, {})
+
+
+def anomaly_csv():
+    """
+    Rows of three groups with one planted outlier per column:
+    untyped rows 0-4, pumps 5-14 (Flowrate outlier at 9) and valves 15-24
+    (Temperature outlier at 20, Pressure outlier at 22).
+    """
+    lines = [b"Equipment Name,Type,Flowrate,Pressure,Temperature"]
+    for index in range(5):
+        lines.append(b"Unknown-%d,,%d,5,5" % (index, index + 1))
+    for index in range(10):
+        flowrate = 500 if index == 4 else 100 + index
+        lines.append(b"Pump-%d,Pump,%d,5,80" % (index, flowrate))
+    for index in range(10):
+        temperature = -300 if index == 5 else 60 + index
+        pressure = 40 if index == 7 else 2 + (index % 3) / 10
+        lines.append(b"Valve-%d,Valve,50,%.1f,%d" % (index, pressure, temperature))
+    return b"\n".join(lines) + b"\n"
+
+
+class AnomalyTests(SimpleTestCase):
+    """Robust per-type outlier flags"""
+
+    def setUp(self):
+        self.df = parse_csv_file(io.BytesIO(anomaly_csv()))
+        self.anomalies = detect_anomalies(self.df)
+
+    def flagged(self, bitmask):
+        return unpack_bitmask(bitmask, len(self.df)).nonzero()[0].tolist()
+
+    def test_planted_outliers_are_flagged(self):
+        self.assertEqual(self.anomalies['count'], 3)
+        self.assertEqual(self.flagged(self.anomalies['bitmask']), [9, 20, 22])
+        self.assertEqual(
+            {col: self.flagged(flags['bitmask']) for col, flags in self.anomalies['columns'].items()},
+            {'Flowrate': [9], 'Pressure': [22], 'Temperature': [20]}
+        )
+        self.assertEqual(
+            {col: flags['count'] for col, flags in self.anomalies['columns'].items()},
+            {'Flowrate': 1, 'Pressure': 1, 'Temperature': 1}
+        )
+
+    def test_untyped_rows_have_fences_of_their_own(self):
+        # Flowrate 1..5: median 3, MAD 1, quartiles 2 and 4; the modified
+        # z-score fences 3 -/+ 3.5 / 0.6745 (5.189) are wider than Tukey's -1..7
+        self.assertEqual(self.anomalies['fences'][''], {
+            'Flowrate': [-2.189, 8.189], 'Pressure': [5.0, 5.0], 'Temperature': [5.0, 5.0],
+        })
+        self.assertEqual(sorted(self.anomalies['fences']), ['', 'Pump', 'Valve'])
+
+    def test_bitmask_round_trip(self):
+        rng = np.random.default_rng(4)
+        for length in (1, 7, 8, 9, 13, 100):
+            with self.subTest(length=length):
+                flags = rng.random(length) < 0.3
+                np.testing.assert_array_equal(unpack_bitmask(pack_bitmask(flags), length), flags)
+
+
+class AnomalyAPITests(TemporaryMediaMixin, TestCase):
+    """The dataset anomalies endpoint"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('alice', password='secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_flagged_rows_are_listed(self):
+        response = self.client.post(
+            '/api/upload/', {'file': SimpleUploadedFile('plant.csv', anomaly_csv())}, format='multipart'
+        )
+        dataset_id = response.json()['dataset']['id']
+
+        response = self.client.get(f'/api/datasets/{dataset_id}/anomalies/?limit=2')
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body['count'], 3)
+        self.assertEqual(body['total_rows'], 25)
+        self.assertEqual(body['flagged_by_parameter'], {'Flowrate': 1, 'Pressure': 1, 'Temperature': 1})
+        self.assertEqual([row['index'] for row in body['results']], [9, 20])
+        self.assertEqual(body['results'][0]['Equipment Name'], 'Pump-4')
+        self.assertEqual(body['results'][0]['flagged'], ['Flowrate'])
+        self.assertEqual(body['results'][1]['flagged'], ['Temperature'])
+        self.assertIsNotNone(body['next'])
+
+    def test_unknown_dataset(self):
+        response = self.client.get('/api/datasets/999/anomalies/')
+
+        self.assertEqual(response.status_code, 404)
+
+
+def plant_csv(*rows):
+    """CSV of (name, type, flowrate) rows with fixed pressure and temperature"""
+    lines = [b"Equipment Name,Type,Flowrate,Pressure,Temperature"]
+    lines += [b'"%s",%s,%s,5.0,100.0' % (name.encode(), kind.encode(), str(flowrate).encode())
+              for name, kind, flowrate in rows]
+    return b"\n".join(lines) + b"\n"
+
+
+class EquipmentHistoryTests(TemporaryMediaMixin, TestCase):
+    """Equipment observations and the equipment history endpoint"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('alice', password='secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, name, data, user=None, days_ago=0):
+        client = self.client
+        if user is not None:
+            client = APIClient()
+            client.force_authenticate(user)
+        response = client.post('/api/upload/', {'file': SimpleUploadedFile(name, data)}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        dataset_id = response.json()['dataset']['id']
+        # Spread the uploads out in time
+        upload_date = time_ago(days=days_ago)
+        UploadedDataset.objects.filter(pk=dataset_id).update(upload_date=upload_date)
+        EquipmentObservation.objects.filter(dataset_id=dataset_id).update(upload_date=upload_date)
+        return dataset_id
+
+    def history(self, name):
+        return self.client.get(f"/api/equipment/{urllib.parse.quote(name, safe='')}/history/")
+
+    def test_upload_records_one_observation_per_equipment(self):
+        dataset_id = self.upload('plant.csv', plant_csv(
+            ('Pump-1', 'Pump', 100), ('Pump-1', 'Pump', 120), ('Valve-1', 'Valve', 60)
+        ))
+
+        observations = EquipmentObservation.objects.filter(dataset_id=dataset_id).order_by('equipment_name')
+        self.assertEqual([(o.equipment_name, o.equipment_type, o.row_count) for o in observations],
+                         [('Pump-1', 'Pump', 2), ('Valve-1', 'Valve', 1)])
+        self.assertEqual(observations[0].parameters['Flowrate'], {'mean': 110.0, 'min': 100.0, 'max': 120.0})
+        self.assertEqual(observations[0].user, self.user)
+
+    def test_history_is_newest_first(self):
+        older = self.upload('older.csv', plant_csv(('Pump-1', 'Pump', 100)), days_ago=2)
+        newer = self.upload('newer.csv', plant_csv(('Pump-1', 'Pump', 130)), days_ago=1)
+        self.upload('other.csv', plant_csv(('Valve-1', 'Valve', 60)))
+
+        response = self.history('Pump-1')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 2)
+        results = response.json()['results']
+        self.assertEqual([result['dataset'] for result in results], [newer, older])
+        self.assertEqual(results[0]['filename'], 'newer.csv')
+        self.assertEqual(results[0]['parameters']['Flowrate']['mean'], 130.0)
+
+    def test_history_is_per_user(self):
+        bob = User.objects.create_user('bob', password='secret')
+        self.upload('bob.csv', plant_csv(('Pump-1', 'Pump', 100), ('Pump-9', 'Pump', 90)), user=bob)
+        self.upload('alice.csv', plant_csv(('Pump-1', 'Pump', 120)))
+
+        response = self.history('Pump-1')
+        self.assertEqual(response.json()['count'], 1)
+        self.assertEqual(response.json()['results'][0]['filename'], 'alice.csv')
+        self.assertEqual(self.history('Pump-9').status_code, 404)
+
+    def test_unknown_equipment(self):
+        response = self.history('Nothing-1')
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()['error'], 'Equipment not found')
+
+    def test_name_with_slash(self):
+        self.upload('plant.csv', plant_csv(('Line 1/Pump A', 'Pump', 100)))
+
+        response = self.history('Line 1/Pump A')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['equipment_name'], 'Line 1/Pump A')
+        self.assertEqual(response.json()['count'], 1)
+
+    def test_backfill_observations(self):
+        first = self.upload('first.csv', plant_csv(('Pump-1', 'Pump', 100)))
+        self.upload('second.csv', plant_csv(('Pump-1', 'Pump', 110), ('Valve-1', 'Valve', 60)))
+        # As if uploaded before the equipment history existed
+        EquipmentObservation.objects.all().delete()
+        DatasetContent.objects.update(equipment_json=[])
+
+        stdout = io.StringIO()
+        call_command('backfill_observations', '--batch-size', '1', stdout=stdout)
+
+        self.assertIn("observations of 2 datasets", stdout.getvalue())
+        self.assertEqual(EquipmentObservation.objects.count(), 3)
+        self.assertEqual(EquipmentObservation.objects.get(dataset_id=first).row_count, 1)
+        self.assertTrue(all(content.equipment_json for content in DatasetContent.objects.all()))
+
+        # Datasets with observations are left alone
+        stdout = io.StringIO()
+        call_command('backfill_observations', stdout=stdout)
+        self.assertIn("observations of 0 datasets", stdout.getvalue())
+        self.assertEqual(EquipmentObservation.objects.count(), 3)
+
+
+class BatchUploadTests(TemporaryMediaMixin, TestCase):
+    """Several files in one request"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('alice', password='secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload_batch(self, files):
+        return self.client.post(
+            '/api/upload/batch/',
+            {'files': [SimpleUploadedFile(name, data) for name, data in files]},
+            format='multipart'
+        )
+
+    def test_all_files_uploaded(self):
+        response = self.upload_batch([
+            ('first.csv', SAMPLE_CSV),
+            ('second.csv', plant_csv(('Pump-1', 'Pump', 100))),
+            ('copy.csv', SAMPLE_CSV),
+        ])
+
+        self.assertEqual(response.status_code, 201)
+        results = response.json()['results']
+        self.assertEqual([result['filename'] for result in results], ['first.csv', 'second.csv', 'copy.csv'])
+        self.assertTrue(all(result['success'] for result in results))
+        self.assertEqual(UploadedDataset.objects.filter(user=self.user).count(), 3)
+        # The copy in the same batch shares the content of the first file
+        self.assertEqual(DatasetContent.objects.count(), 2)
+        self.assertEqual(results[0]['dataset']['summary']['total_count'], 3)
+        self.assertEqual(self.incoming_files(), [])
+
+    def test_partial_failure(self):
+        response = self.upload_batch([
+            ('good.csv', SAMPLE_CSV),
+            ('broken.csv', b"Name,Kind\nPump-1,Pump\n"),
+            ('notes.txt', b"not a csv"),
+        ])
+
+        self.assertEqual(response.status_code, 207)
+        results = response.json()['results']
+        self.assertEqual([result['success'] for result in results], [True, False, False])
+        self.assertIn('Missing required columns', results[1]['error'])
+        self.assertTrue(results[2]['error'])
+        self.assertEqual(list(UploadedDataset.objects.values_list('filename', flat=True)), ['good.csv'])
+        self.assertEqual(self.incoming_files(), [])
+
+    def test_all_files_failing(self):
+        response = self.upload_batch([('broken.csv', b"Name,Kind\nPump-1,Pump\n")])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(UploadedDataset.objects.exists())
+
+    @override_settings(BATCH_UPLOAD_MAX_FILES=2)
+    def test_too_many_files_are_rejected(self):
+        response = self.upload_batch([(f'plant-{index}.csv', SAMPLE_CSV) for index in range(3)])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('At most 2 files', response.json()['error'])
+        self.assertFalse(UploadedDataset.objects.exists())
+
+    def test_ingest_analyzed_files_deduplicates_within_batch(self):
+        csv_dir = tempfile.mkdtemp(prefix='chemequip_csv_')
+        self.addCleanup(shutil.rmtree, csv_dir, ignore_errors=True)
+        analyzed = []
+        for name in ('a.csv', 'b.csv'):
+            path = os.path.join(csv_dir, name)
+            with open(path, 'wb') as f:
+                f.write(SAMPLE_CSV)
+            analyzed.append((path, analyze_file(path)))
+
+        datasets, new_contents = ingest_analyzed_files(self.user, analyzed)
+
+        self.assertEqual(new_contents, 1)
+        self.assertEqual([dataset.filename for dataset in datasets], ['a.csv', 'b.csv'])
+        content = DatasetContent.objects.get()
+        self.assertEqual({dataset.content_id for dataset in datasets}, {content.pk})
+        self.assertTrue(default_storage.exists(content.blob.name))
+        self.assertEqual(EquipmentObservation.objects.count(), 6)
+
+
+NO_RETENTION = {'MAX_COUNT': None, 'MAX_AGE_DAYS': None, 'MAX_BYTES': None}
+
+
+def make_dataset(user, days_ago=0, size=100, name=None):
+    """Dataset row uploaded some days ago (without stored content)"""
+    dataset = UploadedDataset.objects.create(
+        user=user, filename=name or 'plant.csv', file_path=f'datasets/{name or "plant.csv"}', file_size=size
+    )
+    UploadedDataset.objects.filter(pk=dataset.pk).update(upload_date=time_ago(days=days_ago))
+    return dataset
+
+
+class RetentionSelectionTests(SimpleTestCase):
+    """Which datasets select_expired picks"""
+
+    def setUp(self):
+        self.now = timezone.now()
+        # (id, upload date, size), newest first
+        self.rows = [(5, self.now, 100), (4, time_ago(days=2), 100), (3, time_ago(days=10), 100),
+                     (2, time_ago(days=20), 100), (1, time_ago(days=40), 100)]
+
+    def limits(self, max_count=None, max_age_days=None, max_bytes=None):
+        return {'max_count': max_count, 'max_age_days': max_age_days, 'max_bytes': max_bytes}
+
+    def test_max_count(self):
+        self.assertEqual(select_expired(self.rows, self.limits(max_count=2), self.now), [3, 2, 1])
+
+    def test_max_age(self):
+        self.assertEqual(select_expired(self.rows, self.limits(max_age_days=15), self.now), [2, 1])
+
+    def test_max_bytes(self):
+        self.assertEqual(select_expired(self.rows, self.limits(max_bytes=250), self.now), [3, 2, 1])
+
+    def test_no_limits(self):
+        self.assertEqual(select_expired(self.rows, self.limits(), self.now), [])
+
+    def test_newest_dataset_is_never_selected(self):
+        rows = [(2, time_ago(days=30), 5000), (1, time_ago(days=40), 100)]
+        limits = self.limits(max_count=1, max_age_days=1, max_bytes=10)
+
+        self.assertEqual(select_expired(rows, limits, self.now), [1])
+        self.assertEqual(select_expired(rows[:1], limits, self.now), [])
+
+
+@override_settings(DATASET_RETENTION={'MAX_COUNT': 3, 'MAX_AGE_DAYS': None, 'MAX_BYTES': None})
+class RetentionTests(TestCase):
+    """Pruning a user's datasets with enforce_retention"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='secret')
+        self.datasets = [make_dataset(self.user, days_ago=days) for days in (40, 20, 10, 2, 0)]
+
+    def kept(self):
+        return sorted(UploadedDataset.objects.filter(user=self.user).values_list('pk', flat=True))
+
+    def test_max_count(self):
+        self.assertEqual(enforce_retention(self.user), 2)
+        self.assertEqual(self.kept(), [dataset.pk for dataset in self.datasets[2:]])
+
+    @override_settings(DATASET_RETENTION={'MAX_COUNT': None, 'MAX_AGE_DAYS': 15, 'MAX_BYTES': None})
+    def test_max_age(self):
+        self.assertEqual(enforce_retention(self.user), 2)
+        self.assertEqual(self.kept(), [dataset.pk for dataset in self.datasets[2:]])
+
+    @override_settings(DATASET_RETENTION={'MAX_COUNT': None, 'MAX_AGE_DAYS': 1, 'MAX_BYTES': None})
+    def test_newest_dataset_is_kept(self):
+        # Every dataset is past the age limit, the newest one too
+        UploadedDataset.objects.filter(pk=self.datasets[-1].pk).update(upload_date=time_ago(hours=30))
+
+        self.assertEqual(enforce_retention(self.user), 4)
+        self.assertEqual(self.kept(), [self.datasets[-1].pk])
+
+    def test_user_policy_overrides_defaults(self):
+        RetentionPolicy.objects.create(user=self.user, max_count=4, max_age_days=30)
+
+        self.assertEqual(get_retention_limits(self.user), {'max_count': 4, 'max_age_days': 30, 'max_bytes': None})
+        self.assertEqual(enforce_retention(self.user), 1)
+        self.assertEqual(self.kept(), [dataset.pk for dataset in self.datasets[1:]])
+
+    def test_zero_disables_a_rule(self):
+        RetentionPolicy.objects.create(user=self.user, max_count=0)
+
+        self.assertEqual(get_retention_limits(self.user)['max_count'], None)
+        self.assertEqual(enforce_retention(self.user), 0)
+        self.assertEqual(len(self.kept()), 5)
+
+    def test_other_users_are_untouched(self):
+        bob = User.objects.create_user('bob', password='secret')
+        bobs = [make_dataset(bob, days_ago=days) for days in (50, 30)]
+
+        enforce_retention(self.user)
+
+        self.assertEqual(UploadedDataset.objects.filter(user=bob).count(), len(bobs))
+
+
+@override_settings(DATASET_RETENTION={'MAX_COUNT': 1, 'MAX_AGE_DAYS': None, 'MAX_BYTES': None})
+class RetentionFileRemovalTests(TemporaryMediaMixin, TransactionTestCase):
+    """
+    Files of pruned datasets. A TransactionTestCase, since the files are
+    handed to the reclaimer once the deletion commits.
+    """
+
+    def test_files_of_pruned_datasets_are_removed(self):
+        user = User.objects.create_user('alice', password='secret')
+        older = make_dataset(user, days_ago=3, name='older.csv')
+        newer = make_dataset(user, days_ago=1, name='newer.csv')
+        for dataset in (older, newer):
+            default_storage.save(dataset.file_path.name, ContentFile(SAMPLE_CSV))
+            default_storage.save(report_name(dataset.pk), ContentFile(b'%PDF-1.4'))
+
+        self.assertEqual(enforce_retention(user), 1)
+        reclaimer.wait()
+
+        self.assertFalse(default_storage.exists('datasets/older.csv'))
+        self.assertFalse(default_storage.exists(report_name(older.pk)))
+        self.assertTrue(default_storage.exists('datasets/newer.csv'))
+        self.assertTrue(default_storage.exists(report_name(newer.pk)))
+
+
+class TokenCacheTests(SimpleTestCase):
+    """Expiry and size bound of the token cache"""
+
+    def test_entries_expire_after_ttl(self):
+        cache = TokenUserCache(max_size=10, ttl=300)
+        with mock.patch('api.authentication.time.monotonic', return_value=1000.0) as monotonic:
+            cache.set('key', ('user', 'token'))
+            monotonic.return_value = 1299.0
+            self.assertEqual(cache.get('key'), ('user', 'token'))
+            monotonic.return_value = 1300.0
+            self.assertIsNone(cache.get('key'))
+        self.assertEqual(len(cache.entries), 0)
+
+    def test_least_recently_used_entry_is_dropped(self):
+        cache = TokenUserCache(max_size=2, ttl=300)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(list(cache.entries), ['a', 'c'])
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Token authentication through the in-process cache"""
+
+    def setUp(self):
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+        self.user = User.objects.create_user('alice', password='secret')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+
+    def get(self, key):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {key}')
+        return self.client.get('/api/datasets/')
+
+    def test_cached_token_skips_the_database(self):
+        authentication = CachedTokenAuthentication()
+        authentication.authenticate_credentials(self.token.key)
+
+        with self.assertNumQueries(0):
+            user, token = authentication.authenticate_credentials(self.token.key)
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(token.key, self.token.key)
+
+    def test_each_request_gets_its_own_user(self):
+        authentication = CachedTokenAuthentication()
+        first_user, first_token = authentication.authenticate_credentials(self.token.key)
+        first_user.first_name = 'changed'
+        second_user, second_token = authentication.authenticate_credentials(self.token.key)
+
+        self.assertIsNot(first_user, second_user)
+        self.assertIsNot(first_token, second_token)
+        self.assertIs(second_token.user, second_user)
+        self.assertEqual(second_user.first_name, '')
+        cached_user, _ = token_cache.get(self.token.key)
+        self.assertIsNot(cached_user, first_user)
+        self.assertIsNot(cached_user, second_user)
+
+    def test_deleted_token_is_rejected(self):
+        # delete() clears the primary key, which is the token key
+        key = self.token.key
+        self.assertEqual(self.get(key).status_code, 200)
+
+        self.token.delete()
+
+        self.assertEqual(self.get(key).status_code, 401)
+
+    def test_rotated_token(self):
+        key = self.token.key
+        self.assertEqual(self.get(key).status_code, 200)
+
+        self.token.delete()
+        new_token = Token.objects.create(user=self.user)
+
+        self.assertEqual(self.get(key).status_code, 401)
+        self.assertEqual(self.get(new_token.key).status_code, 200)
+
+    def test_deactivated_user_is_rejected(self):
+        self.assertEqual(self.get(self.token.key).status_code, 200)
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.get(self.token.key).status_code, 401)
+        with self.assertRaises(AuthenticationFailed):
+            CachedTokenAuthentication().authenticate_credentials(self.token.key)
+
+
+class OrphanSweepTests(TemporaryMediaMixin, TestCase):
+    """Files and contents reclaim_orphans removes or keeps"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('alice', password='secret')
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post('/api/upload/', {'file': SimpleUploadedFile('plant.csv', SAMPLE_CSV)},
+                               format='multipart')
+        self.dataset = UploadedDataset.objects.get(pk=response.json()['dataset']['id'])
+        self.blob = self.dataset.content.blob.name
+
+    def store(self, name, data=b'x' * 10, age=3600):
+        """Save a file last modified `age` seconds ago"""
+        default_storage.save(name, ContentFile(data))
+        mtime = time.time() - age
+        os.utime(default_storage.path(name), (mtime, mtime))
+        return name
+
+    def test_unreferenced_files_are_removed(self):
+        os.utime(default_storage.path(self.blob), (time.time() - 3600,) * 2)
+        kept_report = self.store(report_name(self.dataset.pk))
+        orphans = [
+            self.store('content/' + 'f' * 64 + '.csv'),
+            self.store(report_name(self.dataset.pk + 100)),
+            self.store('datasets/old.csv'),
+        ]
+
+        stats = reclaim_orphans(grace_period=60)
+
+        self.assertEqual(stats['files_removed'], 3)
+        self.assertEqual(stats['bytes_reclaimed'], 30)
+        self.assertEqual(stats['contents_removed'], 0)
+        self.assertTrue(default_storage.exists(self.blob))
+        self.assertTrue(default_storage.exists(kept_report))
+        for name in orphans:
+            self.assertFalse(default_storage.exists(name), name)
+
+    def test_files_in_grace_period_are_skipped(self):
+        young = self.store('datasets/new.csv', age=10)
+        old = self.store('datasets/old.csv')
+
+        stats = reclaim_orphans(grace_period=60)
+
+        self.assertEqual(stats['files_removed'], 1)
+        self.assertTrue(default_storage.exists(young))
+        self.assertFalse(default_storage.exists(old))
+
+    def test_unused_content_and_its_blob_are_removed(self):
+        self.dataset.delete()
+        DatasetContent.objects.update(created_at=time_ago(hours=1))
+        os.utime(default_storage.path(self.blob), (time.time() - 3600,) * 2)
+
+        stats = reclaim_orphans(grace_period=60)
+
+        self.assertEqual(stats['contents_removed'], 1)
+        self.assertFalse(DatasetContent.objects.exists())
+        self.assertFalse(default_storage.exists(self.blob))
+
+    def test_dry_run_only_counts(self):
+        self.dataset.delete()
+        DatasetContent.objects.update(created_at=time_ago(hours=1))
+        orphan = self.store('datasets/old.csv')
+
+        stats = reclaim_orphans(grace_period=60, dry_run=True)
+
+        # The unused content's blob counts as one of the files
+        self.assertEqual(stats['contents_removed'], 1)
+        self.assertEqual(stats['files_removed'], 2)
+        self.assertEqual(stats['bytes_reclaimed'], 10 + len(SAMPLE_CSV))
+        self.assertTrue(DatasetContent.objects.exists())
+        self.assertTrue(default_storage.exists(self.blob))
+        self.assertTrue(default_storage.exists(orphan))
+
+    def test_command_reports_what_it_removed(self):
+        self.store('datasets/old.csv')
+        stdout = io.StringIO()
+
+        call_command('reclaim_orphans', '--grace', '60', '--dry-run', stdout=stdout)
+
+        self.assertIn("Would remove 0 unused contents", stdout.getvalue())
+        self.assertIn("1 orphaned files", stdout.getvalue())
+        self.assertTrue(default_storage.exists('datasets/old.csv'))
+
+
+class FileReclaimerTests(TemporaryMediaMixin, TransactionTestCase):
+    """
+    Background removal of scheduled files. A TransactionTestCase, since
+    the reclaimer checks references on its own connection.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('alice', password='secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_delete_dataset_schedules_its_files(self):
+        dataset = make_dataset(self.user, name='legacy.csv')
+        default_storage.save(dataset.file_path.name, ContentFile(SAMPLE_CSV))
+        default_storage.save(report_name(dataset.pk), ContentFile(b'%PDF-1.4'))
+
+        response = self.client.delete(f'/api/datasets/{dataset.pk}/delete/')
+        self.assertEqual(response.status_code, 200)
+        reclaimer.wait()
+
+        self.assertFalse(default_storage.exists('datasets/legacy.csv'))
+        self.assertFalse(default_storage.exists(report_name(dataset.pk)))
+
+    def test_referenced_files_are_kept(self):
+        dataset = make_dataset(self.user, name='kept.csv')
+        default_storage.save(dataset.file_path.name, ContentFile(SAMPLE_CSV))
+        default_storage.save(report_name(dataset.pk), ContentFile(b'%PDF-1.4'))
+
+        reclaimer.schedule([dataset.file_path.name, report_name(dataset.pk)])
+        reclaimer.wait()
+
+        self.assertTrue(default_storage.exists('datasets/kept.csv'))
+        self.assertTrue(default_storage.exists(report_name(dataset.pk)))
+
+    def test_remove_returns_bytes_reclaimed(self):
+        default_storage.save('datasets/gone.csv', ContentFile(SAMPLE_CSV))
+        file_reclaimer = FileReclaimer()
+
+        self.assertEqual(file_reclaimer.remove('datasets/gone.csv'), len(SAMPLE_CSV))
+        self.assertEqual(file_reclaimer.remove('datasets/gone.csv'), 0)
+
+
+class ColumnarTests(SimpleTestCase):
+    """Dictionary-encoded columnar form of the data"""
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'Timestamp': pd.to_datetime(
+                ['2024-01-01T00:00:00', None, '2024-01-01T00:01:00.500'], format='ISO8601'
+            ).astype('datetime64[ms]'),
+            'Equipment Name': pd.Categorical(['Pump-1', 'Pump-2', 'Valve-1']),
+            'Type': pd.Categorical(['Pump', None, 'Valve']),
+            'Flowrate': [120.5, np.nan, 60.0],
+        })
+
+    def test_encoding(self):
+        data = dataframe_to_columns(self.df)
+
+        self.assertEqual(data['length'], 3)
+        self.assertEqual(data['columns']['Timestamp'], {'timestamps': [1704067200000, None, 1704067260500]})
+        self.assertEqual(data['columns']['Type'], {'dictionary': ['Pump', 'Valve'], 'codes': [0, -1, 1]})
+        self.assertEqual(data['columns']['Flowrate'], [120.5, None, 60.0])
+
+    def test_round_trip(self):
+        data = dataframe_to_columns(self.df)
+
+        pd.testing.assert_frame_equal(columns_to_dataframe(data), self.df)
+        # And through JSON, as stored
+        self.assertEqual(dataframe_to_columns(columns_to_dataframe(data)), data)
+
+    def test_rows_at(self):
+        data = dataframe_to_columns(self.df)
+
+        self.assertEqual(rows_at(data, [2, 1]), [
+            {'Timestamp': '2024-01-01T00:01:00.500', 'Equipment Name': 'Valve-1', 'Type': 'Valve',
+             'Flowrate': 60.0},
+            {'Timestamp': None, 'Equipment Name': 'Pump-2', 'Type': None, 'Flowrate': None},
+        ])
+        # Whole seconds are written without milliseconds
+        self.assertEqual(rows_at(data, [0])[0]['Timestamp'], '2024-01-01T00:00:00')
+        self.assertEqual(columns_to_records(data)[1:], rows_at(data, [1, 2]))
+        self.assertEqual(columns_to_records(data, limit=1), rows_at(data, [0]))
+
+
+class DatasetDetailLayoutTests(TemporaryMediaMixin, TestCase):
+    """Row and columnar layouts of the dataset detail endpoint"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('alice', password='secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            '/api/upload/', {'file': SimpleUploadedFile('timed.csv', TIMESTAMPED_CSV)}, format='multipart'
+        )
+        self.dataset_id = response.json()['dataset']['id']
+
+    def test_columnar_layout(self):
+        response = self.client.get(f'/api/datasets/{self.dataset_id}/?layout=columnar')
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['data']
+        self.assertEqual(data['length'], 2)
+        self.assertEqual(data['columns']['Timestamp'], {'timestamps': [1704067200000, 1704069000000]})
+        self.assertEqual(data['columns']['Type'], {'dictionary': ['Pump', 'Valve'], 'codes': [0, 1]})
+        self.assertEqual(data['columns']['Flowrate'], [120.5, 60.0])
+
+        rows = self.client.get(f'/api/datasets/{self.dataset_id}/').json()['data']
+        self.assertEqual(rows, columns_to_records(data))
+        self.assertEqual(rows[1]['Timestamp'], '2024-01-01T00:30:00')
+
+    def test_unknown_layout(self):
+        response = self.client.get(f'/api/datasets/{self.dataset_id}/?layout=arrow')
+
+        self.assertEqual(response.status_code, 400)
+
+
+SUMMARY_CSV = (
+    b"Equipment Name,Type,Flowrate,Pressure,Temperature,Level\n"
+    b"Pump-1,Pump,120.5,5.2,110.0,3\n"
+    b"Valve-1,Valve,60.0,4.1,95.5,3\n"
+    b"Pump-2,Pump,130.0,5.9,118.4,3\n"
+    b"Reactor-1,Reactor,150.0,7.5,180.2,3\n"
+    b"Pump-3,Pump,101.2,4.7,104.9,3\n"
+    b"Valve-2,Valve,72.5,3.6,99.1,3\n"
+)
+
+
+def rounded(value, digits):
+    """Round like the summary does: NaN becomes None"""
+    return None if pd.isna(value) else round(float(value), digits)
+
+
+class SummaryTests(SimpleTestCase):
+    """Summary statistics against pandas on a small fixture"""
+
+    COLUMNS = ['Flowrate', 'Pressure', 'Temperature', 'Level']
+
+    def setUp(self):
+        self.summary = calculate_summary(parse_csv_file(io.BytesIO(SUMMARY_CSV)))
+        self.df = pd.read_csv(io.BytesIO(SUMMARY_CSV))
+
+    def test_type_statistics_match_pandas(self):
+        expected = self.df.groupby('Type')[self.COLUMNS].agg(['count', 'mean', 'min', 'max', 'std'])
+
+        statistics = self.summary['type_statistics']
+        self.assertEqual(sorted(statistics), ['Pump', 'Reactor', 'Valve'])
+        for type_name, row in expected.iterrows():
+            self.assertEqual(statistics[type_name]['count'], row[('Flowrate', 'count')])
+            for col in self.COLUMNS:
+                self.assertEqual(
+                    statistics[type_name][col],
+                    {stat: rounded(row[(col, stat)], 2) for stat in ('mean', 'min', 'max', 'std')},
+                    f"{type_name} {col}"
+                )
+        # A single row has no standard deviation
+        self.assertIsNone(statistics['Reactor']['Flowrate']['std'])
+
+    def test_correlation_and_covariance_match_pandas(self):
+        correlation = self.summary['correlation']
+        self.assertEqual(correlation['columns'], self.COLUMNS)
+        values = self.df[self.COLUMNS]
+        # Level is constant: no correlation, zero covariance
+        for key, expected in (
+            ('pearson', values.corr()),
+            ('spearman', values.corr(method='spearman')),
+            ('covariance', values.cov()),
+        ):
+            with self.subTest(matrix=key):
+                self.assertEqual(
+                    correlation[key], [[rounded(value, 4) for value in row] for row in expected.to_numpy()]
+                )
+        self.assertIsNone(correlation['pearson'][3][3])
+
+
+class TypedReadFallbackTests(TestCase):
+    """Files the typed fast path cannot read are read again permissively"""
+
+    BAD_VALUE_CSV = (
+        b"Equipment Name,Type,Flowrate,Pressure,Temperature\n"
+        b"Pump-1,Pump,broken,5.2,110.0\n"
+        b"Valve-1,Valve,60.0,4.1,95.5\n"
+    )
+
+    def read(self, data, fast_engine=True):
+        """read_csv_typed, returning the data and the engine of each read attempt"""
+        pyarrow = chemequip_core.analysis.pyarrow if fast_engine else None
+        with mock.patch.object(chemequip_core.analysis, 'pyarrow', pyarrow), \
+                mock.patch.object(pd, 'read_csv', wraps=pd.read_csv) as read_csv:
+            engine = chemequip_core.analysis.csv_engine()
+            df = read_csv_typed(io.BytesIO(data), extra_columns=[])
+        return df, engine, [call.kwargs.get('engine') for call in read_csv.call_args_list]
+
+    def test_non_numeric_value_falls_back(self):
+        # With pyarrow when installed, and with the C engine as without it
+        for fast_engine in (True, False):
+            with self.subTest(fast_engine=fast_engine):
+                df, engine, engines = self.read(self.BAD_VALUE_CSV, fast_engine)
+
+                installed = fast_engine and chemequip_core.analysis.pyarrow is not None
+                self.assertEqual(engine, 'pyarrow' if installed else 'c')
+                self.assertEqual(engines, [engine, None])
+                self.assertEqual(df['Flowrate'].tolist(), ['broken', '60.0'])
+
+    def test_well_formed_file_is_read_once(self):
+        df, engine, engines = self.read(SAMPLE_CSV, fast_engine=False)
+
+        self.assertEqual(engines, ['c'])
+        self.assertEqual(df['Flowrate'].dtype, np.float64)
+
+    def test_missing_column_is_reported_after_fallback(self):
+        with self.assertRaisesMessage(ValueError, "Missing required columns: Temperature"):
+            parse_csv_file(io.BytesIO(b"Equipment Name,Type,Flowrate,Pressure\nPump-1,Pump,1,2\n"))
+
+    def test_upload_with_bad_value_drops_the_row(self):
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            user = User.objects.create_user('alice', password='secret')
+            client = APIClient()
+            client.force_authenticate(user)
+            response = client.post(
+                '/api/upload/', {'file': SimpleUploadedFile('plant.csv', self.BAD_VALUE_CSV)}, format='multipart'
+            )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['dataset']['summary']['total_count'], 1)
@@ -0,0 +1,91 @@
+from functools import wraps
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from .ingestion import StreamingIngest
+
+
+class IngestedUploadFile(UploadedFile):
+    """
+    Uploaded file that was hashed and parsed while it was received.
+    The parse result travels along in `ingest`; see ingest_upload.
+    """
+
+    def __init__(self, ingest, name, content_type, size, charset, content_type_extra=None):
+        super().__init__(ingest.file, name, content_type, size, charset, content_type_extra)
+        self.ingest = ingest
+
+    def close(self):
+        # Request cleanup: drop the temporary file unless it was stored
+        self.ingest.discard()
+
+
+class IngestUploadHandler(FileUploadHandler):
+    """
+    Upload handler that feeds every incoming chunk straight into a
+    StreamingIngest: one write to the content store, then (after
+    decompression, for compressed uploads) one hash update and one
+    incremental parse per chunk. Django's default handlers would
+    spool the file first, after which it would be read again to parse
+    and once more to store it.
+    """
+
+    # Parse while receiving; batch uploads only hash and parse later in
+    # worker processes
+    parse = True
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.ingest = StreamingIngest(
+            self.file_name, max_size=settings.MAX_UPLOAD_SIZE, parse=self.parse
+        )
+
+    def receive_data_chunk(self, raw_data, start):
+        self.ingest.write(raw_data)
+        # Nothing left for other handlers
+        return None
+
+    def file_complete(self, file_size):
+        self.ingest.close()
+        return IngestedUploadFile(
+            self.ingest,
+            name=self.file_name,
+            content_type=self.content_type,
+            size=file_size,
+            charset=self.charset,
+            content_type_extra=self.content_type_extra,
+        )
+
+    def upload_interrupted(self):
+        if hasattr(self, 'ingest'):
+            self.ingest.discard()
+
+
+class HashUploadHandler(IngestUploadHandler):
+    """
+    Like IngestUploadHandler, but only stores, decompresses and hashes
+    while receiving. Used by batch uploads, which parse the new files in
+    parallel once the whole request is in.
+    """
+
+    parse = False
+
+
+def use_upload_handler(handler_class):
+    """
+    Decorator factory installing an upload handler for a view.
+
+    The decorator goes above @api_view: upload handlers must be set on
+    the Django request before anything reads the request body.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            request.upload_handlers = [handler_class(request)]
+            return view(request, *args, **kwargs)
+        return wrapped
+    return decorator
+
+
+ingest_upload_handler = use_upload_handler(IngestUploadHandler)
+hash_upload_handler = use_upload_handler(HashUploadHandler)
@@ -5,14 +5,24 @@ urlpatterns = [
     # Authentication
     path('login/', views.login_view, name='login'),
     path('signup/', views.signup_view, name='signup'),
+    path('auth/verify/', views.verify_token, name='verify-token'),
     
     # Dataset operations
     path('upload/', views.upload_csv, name='upload-csv'),
+    path('upload/batch/', views.upload_batch, name='upload-batch'),
+    path('upload/options/', views.upload_options, name='upload-options'),
+    path('uploads/', views.create_upload_session, name='create-upload-session'),
+    path('uploads/<uuid:upload_id>/', views.upload_session_detail, name='upload-session-detail'),
+    path('uploads/<uuid:upload_id>/chunks/<int:index>/', views.upload_chunk, name='upload-chunk'),
+    path('uploads/<uuid:upload_id>/complete/', views.complete_upload_session, name='complete-upload-session'),
     path('datasets/', views.list_datasets, name='list-datasets'),
     path('datasets/<int:pk>/', views.get_dataset_detail, name='dataset-detail'),
+    path('datasets/<int:pk>/anomalies/', views.dataset_anomalies, name='dataset-anomalies'),
+    path('datasets/<int:pk>/resample/', views.dataset_resample, name='dataset-resample'),
     path('datasets/<int:pk>/report/', views.generate_report, name='generate-report'),
     path('datasets/<int:pk>/preview/', views.preview_report, name='preview-report'),
     path('datasets/<int:pk>/delete/', views.delete_dataset, name='delete-dataset'),
+    path('equipment/<path:name>/history/', views.equipment_history, name='equipment-history'),
     
     # Desktop app download
     path('download/desktop-app/', views.download_desktop_app, name='download-desktop-app'),
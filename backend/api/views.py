@@ -6,14 +6,23 @@ from rest_framework.authtoken.models import Token
 from django.contrib.auth import authenticate
 from django.http import FileResponse, HttpResponse
 from django.views.decorators.csrf import csrf_exempt
-from .models import UploadedDataset
+from .models import UploadedDataset, EquipmentObservation
 from .serializers import (
     UploadedDatasetSerializer,
+    ColumnarDatasetSerializer,
     DatasetListSerializer,
-    CSVUploadSerializer
+    CSVUploadSerializer,
+    UploadSessionSerializer
 )
-from .utils import parse_csv_file, calculate_summary, dataframe_to_json
-from .pdf_generator import generate_pdf_report
+from .pagination import DatasetHistoryPagination, AnomalyPagination, EquipmentHistoryPagination
+from .ingestion import ingest_upload, ingest_batch
+from .upload_handlers import ingest_upload_handler, hash_upload_handler
+from .resumable import UploadSession
+from .reclaimer import reclaimer
+from .reports import load_report, report_name
+from chemequip_core import supported_extensions, supported_encodings, rows_at, unpack_bitmask
+from chemequip_core.anomalies import ROBUST_Z_THRESHOLD, IQR_FACTOR
+from chemequip_core.timeseries import RESAMPLE_INTERVALS, RESAMPLE_STATISTICS
 import io
 
 
@@ -107,12 +116,29 @@ def signup_view(request):
         )
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def verify_token(request):
+    """
+    Check that the request's token is still valid.
+    Lets clients reuse a stored token instead of logging in again,
+    which skips the deliberately slow password hash check.
+    """
+    return Response({
+        'user_id': request.user.id,
+        'username': request.user.username
+    })
+
+
+@ingest_upload_handler
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def upload_csv(request):
     """
     Upload and process CSV file.
     Returns parsed data and summary statistics.
+    The file is hashed, parsed and stored while the request body is
+    received (see IngestUploadHandler).
     """
     serializer = CSVUploadSerializer(data=request.data)
     
@@ -122,29 +148,223 @@ def upload_csv(request):
     file = serializer.validated_data['file']
     
     try:
-        # Parse CSV file
-        df = parse_csv_file(file)
-        
-        # Calculate summary statistics
-        summary = calculate_summary(df)
+        # Hash, then parse and store only content not seen before
+        dataset, duplicate = ingest_upload(request.user, file)
         
-        # Convert DataFrame to JSON
-        data_json = dataframe_to_json(df)
+        # Serialize and return
+        response_serializer = UploadedDatasetSerializer(dataset)
         
-        # Save to database with user association
-        dataset = UploadedDataset.objects.create(
-            user=request.user,
-            filename=file.name,
-            file_path=file,
-            summary_json=summary,
-            data_json=data_json
+        return Response({
+            'message': 'File uploaded and processed successfully',
+            'duplicate': duplicate,
+            'dataset': response_serializer.data
+        }, status=status.HTTP_201_CREATED)
+    
+    except ValueError as e:
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    except Exception as e:
+        return Response(
+            {'error': f'An error occurred: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@hash_upload_handler
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def upload_batch(request):
+    """
+    Upload several CSV files (field "files") in one request.
+    New files are parsed in parallel worker processes and all datasets
+    are saved in one transaction. Returns a result per file; an invalid
+    file does not stop the others.
+    """
+    from django.conf import settings
+    
+    files = request.FILES.getlist('files')
+    if not files:
+        return Response(
+            {'error': 'No files were submitted'},
+            status=status.HTTP_400_BAD_REQUEST
         )
+    if len(files) > settings.BATCH_UPLOAD_MAX_FILES:
+        return Response(
+            {'error': f'At most {settings.BATCH_UPLOAD_MAX_FILES} files can be uploaded at once'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    # Name and size checks per file, as for a single upload
+    valid_files = []
+    rejected = {}
+    for file in files:
+        serializer = CSVUploadSerializer(data={'file': file})
+        if serializer.is_valid():
+            valid_files.append(file)
+        else:
+            rejected[file] = ' '.join(serializer.errors['file'])
+    
+    try:
+        ingested = iter(ingest_batch(request.user, valid_files))
+    except Exception as e:
+        return Response(
+            {'error': f'An error occurred: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    
+    results = []
+    for file in files:
+        if file in rejected:
+            results.append({'filename': file.name, 'success': False, 'error': rejected[file]})
+            continue
+        result = next(ingested)
+        if 'error' in result:
+            results.append({'filename': file.name, 'success': False, 'error': result['error']})
+        else:
+            results.append({
+                'filename': file.name,
+                'success': True,
+                'duplicate': result['duplicate'],
+                'dataset': DatasetListSerializer(result['dataset']).data,
+            })
+    
+    uploaded = sum(1 for result in results if result['success'])
+    if uploaded == len(results):
+        response_status = status.HTTP_201_CREATED
+    elif uploaded:
+        response_status = status.HTTP_207_MULTI_STATUS
+    else:
+        response_status = status.HTTP_400_BAD_REQUEST
+    
+    return Response({
+        'message': f'{uploaded} of {len(results)} files uploaded and processed successfully',
+        'results': results
+    }, status=response_status)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def upload_options(request):
+    """
+    Describe what the upload endpoint accepts.
+    Clients use content_encodings to decide whether to compress before sending.
+    max_file_size applies to the decompressed CSV.
+    """
+    from django.conf import settings
+    
+    return Response({
+        'max_file_size': settings.MAX_UPLOAD_SIZE,
+        'max_decompression_ratio': settings.MAX_DECOMPRESSION_RATIO,
+        'accepted_extensions': supported_extensions(),
+        'content_encodings': supported_encodings(),
+        'resumable': {
+            'chunk_size': settings.RESUMABLE_UPLOAD_CHUNK_SIZE,
+            'max_chunk_size': settings.RESUMABLE_UPLOAD_MAX_CHUNK_SIZE,
+        },
+    })
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def create_upload_session(request):
+    """
+    Start a resumable upload.
+    The client then PUTs the file in numbered chunks (see upload_chunk)
+    and finishes with complete_upload_session.
+    """
+    serializer = UploadSessionSerializer(data=request.data)
+    
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    session = UploadSession.create(request.user, **serializer.validated_data)
+    return Response(session.describe(), status=status.HTTP_201_CREATED)
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def upload_session_detail(request, upload_id):
+    """
+    GET: Report which byte ranges and chunks of an upload were received.
+    DELETE: Cancel the upload and drop its chunks.
+    """
+    session = UploadSession.load(upload_id, request.user)
+    if session is None:
+        return Response(
+            {'error': 'Upload session not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    if request.method == 'DELETE':
+        session.delete()
+        return Response({'message': 'Upload cancelled'})
+    
+    return Response(session.describe())
+
+
+@api_view(['PUT'])
+@permission_classes([IsAuthenticated])
+def upload_chunk(request, upload_id, index):
+    """
+    Store one chunk of a resumable upload.
+    The body is the raw chunk and X-Chunk-SHA256 its hex SHA-256.
+    Sending a chunk again replaces it.
+    """
+    session = UploadSession.load(upload_id, request.user)
+    if session is None:
+        return Response(
+            {'error': 'Upload session not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    try:
+        session.write_chunk(index, request.stream, request.headers.get('X-Chunk-SHA256'))
+    except ValueError as e:
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    except FileNotFoundError:
+        # Completed or cancelled while the chunk was arriving
+        return Response(
+            {'error': 'Upload session not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    return Response(session.describe())
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def complete_upload_session(request, upload_id):
+    """
+    Finish a resumable upload once every chunk was received.
+    The file goes through the same ingestion as upload_csv and the
+    response has the same shape.
+    """
+    session = UploadSession.load(upload_id, request.user)
+    if session is None:
+        return Response(
+            {'error': 'Upload session not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    try:
+        result = session.complete(request.user)
+        if result is None:
+            return Response(
+                {'error': 'Upload session not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        dataset, duplicate = result
         
-        # Serialize and return
         response_serializer = UploadedDatasetSerializer(dataset)
         
         return Response({
             'message': 'File uploaded and processed successfully',
+            'duplicate': duplicate,
             'dataset': response_serializer.data
         }, status=status.HTTP_201_CREATED)
     
@@ -166,9 +386,27 @@ def list_datasets(request):
     """
     List all uploaded datasets for the current user (last 5).
     Returns lightweight data without full dataset content.
+    
+    Pass ?limit=N&offset=M to page through the history instead; the
+    response is then {count, next, previous, results}.
     """
-    datasets = UploadedDataset.objects.filter(user=request.user).order_by('-upload_date')[:5]
-    serializer = DatasetListSerializer(datasets, many=True)
+    datasets = (
+        UploadedDataset.objects.filter(user=request.user)
+        .select_related('content')
+        .defer(
+            'data_json', 'content__data_json', 'content__anomalies_json',
+            'content__resampled_json', 'content__equipment_json'
+        )
+        .order_by('-upload_date', '-id')
+    )
+    
+    paginator = DatasetHistoryPagination()
+    page = paginator.paginate_queryset(datasets, request)
+    if page is not None:
+        serializer = DatasetListSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+    
+    serializer = DatasetListSerializer(datasets[:5], many=True)
     
     return Response(serializer.data)
 
@@ -179,10 +417,23 @@ def get_dataset_detail(request, pk):
     """
     Get detailed information about a specific dataset.
     Includes full data and summary. Only returns user's own datasets.
+    
+    Pass ?layout=columnar to get the data as dictionary-encoded columns
+    instead of one object per row.
     """
+    layout = request.query_params.get('layout', 'rows')
+    if layout not in ('rows', 'columnar'):
+        return Response(
+            {'error': 'layout must be "rows" or "columnar"'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
     try:
-        dataset = UploadedDataset.objects.get(pk=pk, user=request.user)
-        serializer = UploadedDatasetSerializer(dataset)
+        dataset = UploadedDataset.objects.select_related('content').get(pk=pk, user=request.user)
+        if layout == 'columnar':
+            serializer = ColumnarDatasetSerializer(dataset)
+        else:
+            serializer = UploadedDatasetSerializer(dataset)
         
         return Response(serializer.data)
     
@@ -193,6 +444,159 @@ def get_dataset_detail(request, pk):
         )
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def dataset_anomalies(request, pk):
+    """
+    List the rows of a dataset that lie outside their type's normal envelope.
+    
+    Rows are paged with ?limit= (default 100) and ?offset=; each has its
+    row index and the parameters that were flagged. 'bitmask' flags all
+    rows at once (row i is bit i % 8 of byte i // 8 of the base64-decoded
+    value) and 'fences' holds each type's [low, high] range per parameter.
+    """
+    try:
+        dataset = UploadedDataset.objects.select_related('content').get(pk=pk, user=request.user)
+    except UploadedDataset.DoesNotExist:
+        return Response(
+            {'error': 'Dataset not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    anomalies = dataset.get_anomalies()
+    columns = dataset.get_columns()
+    length = columns['length']
+    column_flags = {
+        column: unpack_bitmask(flags['bitmask'], length)
+        for column, flags in anomalies['columns'].items()
+    }
+    flagged = unpack_bitmask(anomalies['bitmask'], length).nonzero()[0]
+    
+    paginator = AnomalyPagination()
+    indexes = [int(index) for index in paginator.paginate_queryset(flagged, request)]
+    rows = rows_at(columns, indexes)
+    for index, row in zip(indexes, rows):
+        row['index'] = index
+        row['flagged'] = [column for column, flags in column_flags.items() if flags[index]]
+    
+    return Response({
+        'count': paginator.count,
+        'next': paginator.get_next_link(),
+        'previous': paginator.get_previous_link(),
+        'total_rows': length,
+        'thresholds': {'robust_z': ROBUST_Z_THRESHOLD, 'iqr_factor': IQR_FACTOR},
+        'flagged_by_parameter': {column: flags['count'] for column, flags in anomalies['columns'].items()},
+        'fences': anomalies['fences'],
+        'bitmask': anomalies['bitmask'],
+        'results': rows,
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def dataset_resample(request, pk):
+    """
+    Aggregate a time-stamped dataset into time buckets.
+    
+    ?interval= is 1min, 1h or 1d (default 1h). Each bucket has the mean,
+    min and max of every numeric parameter; ?columns= and ?stats= (comma
+    separated) limit the response to some of them. Only buckets holding
+    rows are listed. Results are cached per dataset content and interval.
+    """
+    interval = request.query_params.get('interval', '1h')
+    if interval not in RESAMPLE_INTERVALS:
+        return Response(
+            {'error': f"interval must be one of: {', '.join(RESAMPLE_INTERVALS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    stats = request.query_params.get('stats')
+    stats = stats.split(',') if stats else RESAMPLE_STATISTICS
+    if any(stat not in RESAMPLE_STATISTICS for stat in stats):
+        return Response(
+            {'error': f"stats must be among: {', '.join(RESAMPLE_STATISTICS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        # The rows are only loaded if this interval is not cached yet
+        dataset = (
+            UploadedDataset.objects.select_related('content')
+            .defer('data_json', 'content__data_json', 'content__anomalies_json', 'content__equipment_json')
+            .get(pk=pk, user=request.user)
+        )
+    except UploadedDataset.DoesNotExist:
+        return Response(
+            {'error': 'Dataset not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    try:
+        resampled = dataset.get_resampled(interval)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    columns = request.query_params.get('columns')
+    columns = columns.split(',') if columns else list(resampled['columns'])
+    unknown = [column for column in columns if column not in resampled['columns']]
+    if unknown:
+        return Response(
+            {'error': f"Unknown columns: {', '.join(unknown)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    return Response(dict(resampled, columns={
+        column: {stat: resampled['columns'][column][stat] for stat in stats}
+        for column in columns
+    }))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def equipment_history(request, name):
+    """
+    Readings of one piece of equipment across all of the user's uploads.
+    
+    Each result is one upload holding the equipment, newest first, with
+    its row count and the mean, min and max of every numeric parameter
+    in that upload. Paged with ?limit= (default 20) and ?offset=; the
+    page is read from the equipment observation index in one query.
+    """
+    observations = (
+        EquipmentObservation.objects.filter(user=request.user, equipment_name=name)
+        .order_by('-upload_date')
+        .values(
+            'dataset_id', 'dataset__filename', 'upload_date',
+            'equipment_type', 'row_count', 'parameters'
+        )
+    )
+    
+    paginator = EquipmentHistoryPagination()
+    page = paginator.paginate_queryset(observations, request)
+    if not paginator.count:
+        return Response(
+            {'error': 'Equipment not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    return Response({
+        'equipment_name': name,
+        'count': paginator.count,
+        'next': paginator.get_next_link(),
+        'previous': paginator.get_previous_link(),
+        'results': [
+            {
+                'dataset': observation['dataset_id'],
+                'filename': observation['dataset__filename'],
+                'upload_date': observation['upload_date'],
+                'type': observation['equipment_type'],
+                'row_count': observation['row_count'],
+                'parameters': observation['parameters'],
+            }
+            for observation in page
+        ],
+    })
+
+
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
 def generate_report(request, pk):
@@ -201,13 +605,13 @@ def generate_report(request, pk):
     Returns PDF file for download. Only generates reports for user's own datasets.
     """
     try:
-        dataset = UploadedDataset.objects.get(pk=pk, user=request.user)
+        dataset = UploadedDataset.objects.select_related('content').get(pk=pk, user=request.user)
         
-        # Generate PDF
-        pdf_buffer = generate_pdf_report(dataset)
+        # Pre-generated report, or generate it now
+        pdf = load_report(dataset)
         
         # Create response with PDF
-        response = HttpResponse(pdf_buffer.getvalue(), content_type='application/pdf')
+        response = HttpResponse(pdf, content_type='application/pdf')
         response['Content-Disposition'] = f'attachment; filename="{dataset.filename}_report.pdf"'
         
         return response
@@ -232,13 +636,13 @@ def preview_report(request, pk):
     Returns PDF file for inline display. Only previews user's own datasets.
     """
     try:
-        dataset = UploadedDataset.objects.get(pk=pk, user=request.user)
+        dataset = UploadedDataset.objects.select_related('content').get(pk=pk, user=request.user)
         
-        # Generate PDF
-        pdf_buffer = generate_pdf_report(dataset)
+        # Pre-generated report, or generate it now
+        pdf = load_report(dataset)
         
         # Create response with PDF for inline viewing
-        response = HttpResponse(pdf_buffer.getvalue(), content_type='application/pdf')
+        response = HttpResponse(pdf, content_type='application/pdf')
         response['Content-Disposition'] = f'inline; filename="{dataset.filename}_report.pdf"'
         
         return response
@@ -264,8 +668,12 @@ def delete_dataset(request, pk):
     try:
         dataset = UploadedDataset.objects.get(pk=pk, user=request.user)
         filename = dataset.filename
+        file_name = dataset.file_path.name
         dataset.delete()
         
+        # Remove the stored CSV and any pre-generated report in the background
+        reclaimer.schedule([file_name, report_name(pk)])
+        
         return Response({
             'message': f'Dataset "{filename}" deleted successfully'
         })
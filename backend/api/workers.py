@@ -0,0 +1,63 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from django.conf import settings
+from chemequip_core import analyze_file
+
+
+class AnalysisPool:
+    """
+    Process pool that parses and summarises CSV files in parallel.
+
+    pandas holds the GIL for most of the parsing, so threads would not
+    help; worker processes do. The pool is created on first use and
+    shared by every request of this server process, which bounds the
+    number of parsing processes to ANALYSIS_WORKERS however many batch
+    uploads run at once. Workers are spawned rather than forked, since the
+    server process may be running other threads.
+    """
+
+    def __init__(self):
+        self.executor = None
+        self.lock = threading.Lock()
+
+    def get_executor(self):
+        with self.lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(
+                    max_workers=settings.ANALYSIS_WORKERS,
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+            return self.executor
+
+    def analyze(self, paths):
+        """
+        Analyse files in parallel.
+
+        Args:
+            paths: List of (path, filename) pairs; filename decides the
+                compression format
+
+        Returns:
+            list: analyze_file() results, in the order of paths
+        """
+        if not paths:
+            return []
+        executor = self.get_executor()
+        try:
+            futures = [
+                executor.submit(analyze_file, path, filename, settings.EXTRA_NUMERIC_COLUMNS)
+                for path, filename in paths
+            ]
+            return [future.result() for future in futures]
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory); start a fresh pool next time
+            with self.lock:
+                if self.executor is executor:
+                    self.executor = None
+            executor.shutdown(wait=False)
+            raise
+
+
+analysis_pool = AnalysisPool()
@@ -12,10 +12,17 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 
 from pathlib import Path
 import os
+import sys
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# The repository root holds the chemequip_core package shared with the
+# desktop app
+REPO_ROOT = BASE_DIR.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/6.0/howto/deployment/checklist/
@@ -130,6 +137,49 @@ MEDIA_ROOT = BASE_DIR / 'media'
 # Ensure media directory exists
 os.makedirs(MEDIA_ROOT, exist_ok=True)
 
+# Largest CSV accepted by the upload endpoint (bytes). For compressed
+# uploads (.csv.gz, .csv.zst, .zip) this is the decompressed size.
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+
+# Compressed uploads may not expand more than this many times (checked
+# while decompressing, to stop decompression bombs early)
+MAX_DECOMPRESSION_RATIO = 100
+
+# Numeric columns kept besides Flowrate, Pressure and Temperature (e.g.
+# ['Level', 'Vibration', 'Power']). None detects them from the first rows
+# of each file: every column holding only numbers is kept
+EXTRA_NUMERIC_COLUMNS = None
+
+# Batch uploads (api.views.upload_batch): files accepted per request, and
+# worker processes parsing new files (one pool shared by all requests)
+BATCH_UPLOAD_MAX_FILES = 50
+ANALYSIS_WORKERS = min(4, os.cpu_count() or 1)
+
+# Resumable uploads (api.resumable). Sessions and their chunks are kept
+# under MEDIA_ROOT/uploads until completed, cancelled or expired.
+RESUMABLE_UPLOAD_CHUNK_SIZE = 1024 * 1024  # default bytes per chunk
+RESUMABLE_UPLOAD_MAX_CHUNK_SIZE = 8 * 1024 * 1024  # largest chunk a client may choose
+RESUMABLE_UPLOAD_EXPIRY = 24 * 60 * 60  # seconds without a chunk before a session is dropped
+
+# Default per-user dataset retention (api.retention). Users with a
+# RetentionPolicy row can override each limit; None means no limit.
+DATASET_RETENTION = {
+    'MAX_COUNT': 5,
+    'MAX_AGE_DAYS': None,
+    'MAX_BYTES': None,
+}
+
+# Orphaned file collection (api.reclaimer). Files under MEDIA_ROOT that no
+# database row references are removed by a periodic in-process sweep and
+# by the reclaim_orphans management command.
+ORPHAN_SWEEP_INTERVAL = 6 * 60 * 60  # seconds between sweeps; None disables
+ORPHAN_GRACE_PERIOD = 60 * 60  # skip files younger than this (seconds)
+ORPHAN_SWEEP_BATCH_SIZE = 500  # files checked per database query
+
+# In-process cache of authenticated tokens (see api.authentication)
+TOKEN_AUTH_CACHE_TTL = 300  # seconds
+TOKEN_AUTH_CACHE_SIZE = 1024  # tokens
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/6.0/ref/settings/#default-auto-field
 
@@ -138,7 +188,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
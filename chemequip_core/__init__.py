@@ -0,0 +1,64 @@
+"""
+ChemEquip core - CSV parsing and summary statistics shared by the Django
+backend and the desktop application
+"""
+
+from .analysis import (
+    REQUIRED_COLUMNS,
+    NUMERIC_COLUMNS,
+    CATEGORICAL_COLUMNS,
+    clean_dataframe,
+    detect_extra_columns,
+    read_csv_typed,
+    parse_csv_file,
+    numeric_columns,
+    timestamp_column,
+    calculate_summary,
+    calculate_equipment_statistics,
+    dataframe_to_json,
+)
+from .columnar import (
+    dataframe_to_columns,
+    records_to_columns,
+    columns_to_dataframe,
+    columns_to_records,
+    rows_at,
+)
+from .anomalies import detect_anomalies, unpack_bitmask
+from .timeseries import RESAMPLE_INTERVALS, resample
+from .sketches import KLLSketch, StreamingHistogram, SummaryAccumulator
+from .streaming import CSVBlockParser
+from .decompression import decoder_for, supported_extensions, supported_encodings
+from .workers import analyze_file
+
+__all__ = [
+    'REQUIRED_COLUMNS',
+    'NUMERIC_COLUMNS',
+    'CATEGORICAL_COLUMNS',
+    'clean_dataframe',
+    'detect_extra_columns',
+    'read_csv_typed',
+    'parse_csv_file',
+    'numeric_columns',
+    'timestamp_column',
+    'calculate_summary',
+    'calculate_equipment_statistics',
+    'dataframe_to_json',
+    'dataframe_to_columns',
+    'records_to_columns',
+    'columns_to_dataframe',
+    'columns_to_records',
+    'rows_at',
+    'detect_anomalies',
+    'unpack_bitmask',
+    'RESAMPLE_INTERVALS',
+    'resample',
+    'KLLSketch',
+    'StreamingHistogram',
+    'SummaryAccumulator',
+    'CSVBlockParser',
+    'decoder_for',
+    'supported_extensions',
+    'supported_encodings',
+    'analyze_file',
+]
@@ -0,0 +1,492 @@
+"""
+CSV parsing and summary statistics for equipment datasets
+"""
+
+import warnings
+import pandas as pd
+import numpy as np
+from .sketches import SummaryAccumulator
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+# Columns every equipment CSV must provide
+REQUIRED_COLUMNS = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
+
+# Columns converted to numbers; rows where any of them is missing are dropped
+NUMERIC_COLUMNS = ['Flowrate', 'Pressure', 'Temperature']
+
+# Names of a column holding the time of each reading. The first of these
+# in a file whose values mostly parse as dates is kept as its timestamp
+# column; the rows are then stored in time order
+TIMESTAMP_COLUMNS = ['Timestamp', 'Datetime', 'Date', 'Time']
+
+# Rows read to detect extra numeric (sensor) columns beyond the required
+# ones; a column is numeric when every value in these rows is a number.
+# Extra columns may have gaps: their missing values do not drop the row
+DETECT_ROWS = 1000
+
+# String columns held as pandas categoricals (integer codes plus the
+# distinct values), and dictionary encoded when stored
+CATEGORICAL_COLUMNS = ['Equipment Name', 'Type']
+
+# Types declared to the CSV reader so it does not have to infer them
+COLUMN_DTYPES = {
+    **{col: 'category' for col in CATEGORICAL_COLUMNS},
+    **{col: 'float64' for col in NUMERIC_COLUMNS},
+}
+
+
+def csv_engine():
+    """Fastest pandas CSV engine available: pyarrow if installed, else C"""
+    return 'pyarrow' if pyarrow is not None else 'c'
+
+
+def parse_timestamps(values):
+    """
+    Parse date/time values in one vectorised pass.
+
+    ISO 8601 text (with or without an offset) takes pandas' fast path;
+    other formats are inferred from the first value.
+
+    Args:
+        values: pandas.Series of strings or datetimes
+
+    Returns:
+        pandas.Series: datetime64[ms] in UTC without a time zone (values
+        with an offset are converted, values without one taken as UTC);
+        NaT where a value is not a date
+    """
+    parsed = pd.to_datetime(values, errors='coerce', utc=True, format='ISO8601')
+    if parsed.count() * 2 < values.count():
+        with warnings.catch_warnings():
+            # Formats pandas cannot infer fall back to per-value parsing
+            warnings.simplefilter('ignore', UserWarning)
+            parsed = pd.to_datetime(values, errors='coerce', utc=True)
+    return parsed.dt.tz_localize(None).astype('datetime64[ms]')
+
+
+def timestamp_column(df):
+    """Name of the timestamp column of a cleaned DataFrame, or None"""
+    for col in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            return col
+    return None
+
+
+def detect_extra_columns(source, configured=None):
+    """
+    Find the numeric and timestamp columns of a CSV beyond the required ones.
+
+    The first DETECT_ROWS rows are read with inferred types; file-like
+    sources are rewound afterwards. Sources that cannot be rewound get no
+    extra columns (or all the configured ones).
+
+    Args:
+        source: Open file, path or file-like object
+        configured: Extra numeric columns set by configuration; only the
+            ones the file has are returned, without checking their values.
+            The timestamp column is detected either way
+
+    Returns:
+        list: Names of the extra columns; a timestamp column comes first
+    """
+    is_file = hasattr(source, 'read')
+    if is_file and not (hasattr(source, 'seek') and hasattr(source, 'tell')):
+        return list(configured or [])
+    start = source.tell() if is_file else None
+    try:
+        sample = pd.read_csv(source, nrows=DETECT_ROWS)
+    except (ValueError, pd.errors.EmptyDataError):
+        # Reading the whole file reports the problem
+        return []
+    finally:
+        if is_file:
+            source.seek(start)
+
+    timestamps = []
+    for col in TIMESTAMP_COLUMNS:
+        if col in sample.columns and not pd.api.types.is_numeric_dtype(sample[col]):
+            # A few bad values become missing times rather than rule it out
+            if parse_timestamps(sample[col]).count() >= 0.9 * sample[col].count() > 0:
+                timestamps = [col]
+                break
+    if configured is not None:
+        return timestamps + [
+            col for col in configured
+            if col in sample.columns and col not in REQUIRED_COLUMNS and col not in TIMESTAMP_COLUMNS
+        ]
+    return timestamps + [
+        col for col in sample.columns
+        if col not in REQUIRED_COLUMNS and col not in TIMESTAMP_COLUMNS
+        and pd.api.types.is_numeric_dtype(sample[col])
+        and not pd.api.types.is_bool_dtype(sample[col])
+        and sample[col].notna().any()
+    ]
+
+
+def read_csv_typed(source, float_dtype='float64', extra_columns=None):
+    """
+    Read the required and extra numeric columns of a CSV with declared dtypes.
+
+    Only those columns are read, numeric columns are parsed straight to
+    floats and string columns to categories, using the fastest engine
+    available. Files this cannot read (a non-numeric value in a numeric
+    column, missing columns, ...) are read again the way pandas infers
+    them, so clean_dataframe() can coerce the values or report the
+    problem.
+
+    Args:
+        source: Open file, path or file-like object
+        float_dtype: 'float64', or 'float32' to halve the memory used by
+            the numeric columns
+        extra_columns: Numeric columns to read besides the required ones
+            (the file may lack some); detected with detect_extra_columns()
+            when None
+
+    Returns:
+        pandas.DataFrame: Data as read, before cleaning
+    """
+    if extra_columns is None:
+        extra_columns = detect_extra_columns(source)
+    columns = REQUIRED_COLUMNS + [col for col in extra_columns if col not in REQUIRED_COLUMNS]
+    # Timestamps are left to the reader (pyarrow parses ISO 8601 natively)
+    dtypes = dict(COLUMN_DTYPES, **{
+        col: float_dtype for col in columns
+        if col not in CATEGORICAL_COLUMNS and col not in TIMESTAMP_COLUMNS
+    })
+    start = source.tell() if hasattr(source, 'seek') else None
+    try:
+        return pd.read_csv(source, engine=csv_engine(), usecols=columns, dtype=dtypes)
+    except (ValueError, KeyError):
+        # pyarrow reports missing columns as KeyError
+        if start is not None:
+            source.seek(start)
+    return pd.read_csv(source, usecols=lambda col: col in columns)
+
+
+def clean_dataframe(df):
+    """
+    Validate and clean freshly read CSV data.
+    
+    Columns besides the required ones are kept as extra numeric columns:
+    their values are converted to numbers, missing or non-numeric values
+    become NaN, and a column with no numbers at all is dropped. A column
+    named in TIMESTAMP_COLUMNS is parsed as dates instead, and the rows
+    are sorted by it (rows without a time last).
+    
+    Args:
+        df: pandas.DataFrame as read from the CSV
+        
+    Returns:
+        pandas.DataFrame: Rows with valid numeric values
+        
+    Raises:
+        ValueError: If required columns are missing or no valid rows remain
+    """
+    # Check if all required columns exist
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing_columns:
+        raise ValueError(f"Missing required columns: {', '.join(missing_columns)}")
+    
+    extra_columns = [col for col in df.columns if col not in REQUIRED_COLUMNS]
+    timestamps = [col for col in extra_columns if col in TIMESTAMP_COLUMNS][:1]
+    extra_columns = timestamps + [col for col in extra_columns if col not in TIMESTAMP_COLUMNS]
+    df = df[REQUIRED_COLUMNS + extra_columns]
+    
+    # Validate numeric columns (already numeric when read with declared dtypes)
+    converted = {
+        col: pd.to_numeric(df[col], errors='coerce')
+        for col in NUMERIC_COLUMNS + extra_columns[len(timestamps):]
+        if not pd.api.types.is_numeric_dtype(df[col])
+    }
+    for col in timestamps:
+        converted[col] = parse_timestamps(df[col])
+    for col in CATEGORICAL_COLUMNS:
+        if not isinstance(df[col].dtype, pd.CategoricalDtype):
+            converted[col] = df[col].astype('category')
+    if converted:
+        df = df.assign(**converted)
+    empty_columns = [col for col in extra_columns if not df[col].notna().any()]
+    if empty_columns:
+        df = df.drop(columns=empty_columns)
+    
+    # Drop rows with any NaN values in numeric columns
+    df = df.dropna(subset=NUMERIC_COLUMNS)
+    
+    if len(df) == 0:
+        raise ValueError("No valid data rows found after cleaning")
+    
+    # Values whose rows were all dropped do not count
+    df = df.assign(**{col: df[col].cat.remove_unused_categories() for col in CATEGORICAL_COLUMNS})
+    
+    # Store readings in time order (most exports already are)
+    for col in timestamps:
+        if col in df.columns and not df[col].is_monotonic_increasing:
+            df = df.sort_values(col, kind='stable', na_position='last', ignore_index=True)
+    return df
+
+
+def parse_csv_file(file, float_dtype='float64', extra_columns=None):
+    """
+    Parse a CSV file and return DataFrame.
+    
+    Args:
+        file: Uploaded file object, open file or path
+        float_dtype: dtype of the numeric columns ('float64' or 'float32')
+        extra_columns: Numeric columns to keep besides the required ones
+            (detected from the first rows when None)
+        
+    Returns:
+        pandas.DataFrame: Parsed data
+        
+    Raises:
+        ValueError: If CSV is invalid or missing required columns
+    """
+    try:
+        # Read CSV file, with the extra columns it actually has
+        df = read_csv_typed(file, float_dtype, detect_extra_columns(file, extra_columns))
+        return clean_dataframe(df)
+    
+    except pd.errors.EmptyDataError:
+        raise ValueError("CSV file is empty")
+    except pd.errors.ParserError:
+        raise ValueError("Invalid CSV format")
+    except Exception as e:
+        raise ValueError(f"Error parsing CSV: {str(e)}")
+
+
+def numeric_columns(df):
+    """Required and extra numeric columns of a cleaned DataFrame, in order"""
+    return [
+        col for col in df.columns
+        if col not in CATEGORICAL_COLUMNS and pd.api.types.is_numeric_dtype(df[col])
+    ]
+
+
+# Statistics computed for every numeric column of a dataset
+COLUMN_STATISTICS = ['count', 'mean', 'min', 'max', 'std']
+
+
+def calculate_column_statistics(df, columns):
+    """
+    Calculate statistics of all numeric columns at once.
+    
+    The columns are stacked into one 2-D array and each statistic is a
+    single NumPy reduction over its rows, so the cost grows with the size
+    of the data rather than with the number of columns. Missing values
+    (gaps in extra columns) are ignored.
+    
+    Args:
+        df: pandas.DataFrame with equipment data
+        columns: Numeric columns of df
+        
+    Returns:
+        dict: {column: {'count', 'mean', 'min', 'max', 'std'}}; values are
+            None when undefined (std of a single value)
+    """
+    # One row per column, so every reduction runs over contiguous memory
+    values = np.vstack([df[col].to_numpy(dtype=np.float64) for col in columns])
+    counts = values.shape[1] - np.isnan(values).sum(axis=1)
+    # Without gaps the plain reductions avoid NaN-aware copies
+    gaps = counts.min() < values.shape[1]
+    with warnings.catch_warnings():
+        # std of a single value is NaN, reported as None
+        warnings.simplefilter('ignore', RuntimeWarning)
+        results = {
+            'mean': (np.nanmean if gaps else np.mean)(values, axis=1),
+            'min': (np.nanmin if gaps else np.min)(values, axis=1),
+            'max': (np.nanmax if gaps else np.max)(values, axis=1),
+            'std': (np.nanstd if gaps else np.std)(values, axis=1, ddof=1),
+        }
+    
+    statistics = {}
+    for index, col in enumerate(columns):
+        statistics[col] = {'count': int(counts[index])}
+        for stat, result in results.items():
+            value = float(result[index])
+            statistics[col][stat] = value if np.isfinite(value) else None
+    
+    return statistics
+
+
+def calculate_summary(df, accumulator=None):
+    """
+    Calculate summary statistics from DataFrame.
+    
+    Args:
+        df: pandas.DataFrame with equipment data
+        accumulator: SummaryAccumulator that already saw the rows of df
+            while they were parsed (built from df when not given)
+        
+    Returns:
+        dict: Summary statistics including:
+            - total_count: Total number of equipment
+            - avg_flowrate: Average flowrate
+            - avg_pressure: Average pressure
+            - avg_temperature: Average temperature
+            - equipment_type_distribution: Count of each equipment type
+            - min/max values for numeric fields
+            - numeric_columns: required and extra numeric columns
+            - column_statistics: count and mean/min/max/std of each
+              numeric column
+            - time_range: timestamp column and its first and last time
+              (ISO 8601, UTC), for data with a timestamp column
+            - type_statistics: count and mean/min/max/std of each numeric
+              field for each equipment type
+            - percentiles: p5/p25/p50/p75/p95/p99 of each numeric field
+            - histograms: bin edges and counts of each numeric field
+            - correlation: Pearson and Spearman correlation and covariance
+              matrices of the numeric fields
+    """
+    columns = numeric_columns(df)
+    statistics = calculate_column_statistics(df, columns)
+    
+    summary = {
+        'total_equipment': int(len(df)),
+        'total_types': int(df['Type'].nunique()),
+        'total_count': int(len(df)),
+    }
+    # Flat fields of the required columns (avg_flowrate, min_flowrate, ...)
+    for col in NUMERIC_COLUMNS:
+        for prefix, stat in (('avg', 'mean'), ('min', 'min'), ('max', 'max')):
+            summary[f'{prefix}_{col.lower()}'] = round(statistics[col][stat], 2)
+    summary['equipment_type_distribution'] = {str(k): int(v) for k, v in df['Type'].value_counts().to_dict().items()}
+    summary['type_distribution'] = summary['equipment_type_distribution']  # Alias for frontend
+    
+    summary['numeric_columns'] = columns
+    summary['column_statistics'] = {
+        col: {stat: value if stat == 'count' or value is None else round(value, 2) for stat, value in entry.items()}
+        for col, entry in statistics.items()
+    }
+    summary['type_statistics'] = calculate_type_statistics(df, columns)
+    
+    time_column = timestamp_column(df)
+    if time_column is not None:
+        start, end = df[time_column].min(), df[time_column].max()
+        summary['time_range'] = {
+            'column': time_column,
+            'start': None if pd.isna(start) else start.isoformat(),
+            'end': None if pd.isna(end) else end.isoformat(),
+        }
+    
+    # Percentiles and histograms come from streaming sketches rather than
+    # sorting each column
+    if accumulator is None or accumulator.columns != columns:
+        accumulator = SummaryAccumulator(columns, required=NUMERIC_COLUMNS)
+        accumulator.update(df)
+    summary.update(accumulator.result())
+    
+    return summary
+
+
+# Statistics computed for every numeric column within each equipment type
+TYPE_STATISTICS = ['mean', 'min', 'max', 'std']
+
+
+def calculate_type_statistics(df, columns=NUMERIC_COLUMNS):
+    """
+    Calculate per-type statistics in a single groupby pass.
+    
+    Type is categorical, so the rows are grouped on its integer codes.
+    
+    Args:
+        df: pandas.DataFrame with equipment data
+        columns: Numeric columns to describe
+        
+    Returns:
+        dict: {type: {'count': int, column: {'mean', 'min', 'max', 'std'}}};
+            std is None for a type with a single row
+    """
+    grouped = df.groupby('Type', observed=True, sort=True)[columns].agg(['count'] + TYPE_STATISTICS)
+    
+    statistics = {}
+    for type_name, row in zip(grouped.index, grouped.to_numpy(dtype=np.float64)):
+        values = dict(zip(grouped.columns, row))
+        entry = {'count': int(values[(columns[0], 'count')])}
+        for col in columns:
+            entry[col] = {
+                stat: None if np.isnan(values[(col, stat)]) else round(float(values[(col, stat)]), 2)
+                for stat in TYPE_STATISTICS
+            }
+        statistics[str(type_name)] = entry
+    
+    return statistics
+
+
+# Statistics kept for every numeric column of each piece of equipment
+EQUIPMENT_STATISTICS = ['mean', 'min', 'max']
+
+
+def calculate_equipment_statistics(df, columns=None):
+    """
+    Calculate the readings of each piece of equipment in a single groupby pass.
+    
+    Equipment Name is categorical, so the rows are grouped on its integer
+    codes; rows without a name are left out.
+    
+    Args:
+        df: pandas.DataFrame with equipment data
+        columns: Numeric columns to describe (all of them by default)
+        
+    Returns:
+        list: One dict per equipment name, in name order: 'name', 'type'
+            (first one given), 'count' (rows) and 'parameters'
+            ({column: {'mean', 'min', 'max'}}; None where the column has
+            no values)
+    """
+    if columns is None:
+        columns = numeric_columns(df)
+    grouped = df.groupby('Equipment Name', observed=True, sort=True)
+    values = grouped[columns].agg(EQUIPMENT_STATISTICS)
+    counts = grouped.size()
+    types = grouped['Type'].first()
+    
+    # Rounded in one pass; object dtype so gaps (NaN) can become None
+    table = np.round(values.to_numpy(dtype=np.float64), 4).astype(object)
+    table[pd.isna(table)] = None
+    keys = [(col, stat) for col, stat in values.columns]
+    
+    statistics = []
+    for name, row, count, type_name in zip(values.index, table.tolist(), counts.tolist(), types.tolist()):
+        row = dict(zip(keys, row))
+        statistics.append({
+            'name': str(name),
+            'type': None if pd.isna(type_name) else str(type_name),
+            'count': count,
+            'parameters': {
+                col: {stat: row[(col, stat)] for stat in EQUIPMENT_STATISTICS}
+                for col in columns
+            },
+        })
+    
+    return statistics
+
+
+def dataframe_to_json(df):
+    """
+    Convert DataFrame to JSON-serializable list of dictionaries.
+    
+    Args:
+        df: pandas.DataFrame
+        
+    Returns:
+        list: List of dictionaries representing each row
+    """
+    # Convert DataFrame to records and ensure all numpy types are converted to Python types
+    records = df.to_dict(orient='records')
+    
+    # Convert numpy types to Python native types
+    for record in records:
+        for key, value in record.items():
+            if isinstance(value, (np.integer, np.int64)):
+                record[key] = int(value)
+            elif isinstance(value, (np.floating, np.float64)):
+                record[key] = float(value)
+            elif pd.isna(value):
+                record[key] = None
+    
+    return records
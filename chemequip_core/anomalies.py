@@ -0,0 +1,102 @@
+"""
+Flagging of readings outside the normal envelope of their equipment type
+"""
+
+import base64
+import numpy as np
+from .analysis import NUMERIC_COLUMNS
+
+
+# Modified z-score (Iglewicz and Hoaglin) beyond which a value is unusual
+ROBUST_Z_THRESHOLD = 3.5
+
+# Tukey fences: this many interquartile ranges outside the quartiles
+IQR_FACTOR = 1.5
+
+# Rows of a type used to estimate its fences; types with more rows are
+# sampled evenly, which keeps the estimate well within the noise of the data
+FENCE_SAMPLE_SIZE = 50000
+
+# Scales the median absolute deviation to a standard deviation for
+# normally distributed data
+MAD_SCALE = 0.6745
+
+
+def pack_bitmask(flags):
+    """Pack a boolean array into base64 text; row i is bit i % 8 of byte i // 8"""
+    return base64.b64encode(np.packbits(flags, bitorder='little').tobytes()).decode('ascii')
+
+
+def unpack_bitmask(bitmask, length):
+    """Unpack base64 text from pack_bitmask() into a boolean array of `length` rows"""
+    packed = np.frombuffer(base64.b64decode(bitmask), dtype=np.uint8)
+    return np.unpackbits(packed, count=length, bitorder='little').astype(bool)
+
+
+def detect_anomalies(df, columns=NUMERIC_COLUMNS):
+    """
+    Flag values outside the normal envelope of their equipment type.
+
+    For each type and column the envelope is the wider of two robust
+    fences: median ± ROBUST_Z_THRESHOLD scaled MADs (the modified
+    z-score) and the Tukey fences Q1 - IQR_FACTOR * IQR, Q3 + IQR_FACTOR
+    * IQR. A value is flagged only when both tests reject it. The
+    quantiles are found per type with NumPy partitioning (on at most
+    FENCE_SAMPLE_SIZE rows), and every value is then tested against the
+    fences of its type with vectorised comparisons.
+
+    Args:
+        df: Cleaned pandas.DataFrame (Type categorical, no missing numbers)
+        columns: Numeric columns to test
+
+    Returns:
+        dict: 'count' (flagged rows), 'bitmask' (flagged rows, see
+        pack_bitmask), 'columns' ({column: {'count', 'bitmask'}}) and
+        'fences' ({type: {column: [low, high]}}; rows without a type are
+        listed under '')
+    """
+    codes = df['Type'].cat.codes.to_numpy()
+    names = [str(name) for name in df['Type'].cat.categories] + ['']
+    # Rows without a type form a group of their own after the named ones
+    groups = np.where(codes < 0, len(names) - 1, codes)
+    # One row per column, so each column of a group is contiguous
+    values = np.vstack([df[col].to_numpy(dtype=np.float64) for col in columns])
+
+    # Rows of each group next to each other, in one stable integer sort
+    order = np.argsort(groups, kind='stable')
+    bounds = np.searchsorted(groups[order], np.arange(len(names) + 1))
+
+    low = np.full((len(columns), len(names)), -np.inf)
+    high = np.full((len(columns), len(names)), np.inf)
+    fences = {}
+    for group, name in enumerate(names):
+        members = order[bounds[group]:bounds[group + 1]]
+        if not len(members):
+            continue
+        # Large groups: the fences are estimated from an evenly spaced sample
+        step = -(-len(members) // FENCE_SAMPLE_SIZE)
+        sample = values[:, members[::step]]
+        q1, median, q3 = np.quantile(sample, [0.25, 0.5, 0.75], axis=1)
+        mad = np.median(np.abs(sample - median[:, None]), axis=1)
+        iqr = q3 - q1
+        z_range = ROBUST_Z_THRESHOLD * mad / MAD_SCALE
+        low[:, group] = np.minimum(median - z_range, q1 - IQR_FACTOR * iqr)
+        high[:, group] = np.maximum(median + z_range, q3 + IQR_FACTOR * iqr)
+        fences[name] = {
+            col: [round(float(low[i, group]), 4), round(float(high[i, group]), 4)]
+            for i, col in enumerate(columns)
+        }
+
+    flags = np.empty(values.shape, dtype=bool)
+    for i in range(len(columns)):
+        flags[i] = (values[i] < low[i][groups]) | (values[i] > high[i][groups])
+    flagged = flags.any(axis=0)
+    return {
+        'count': int(flagged.sum()),
+        'bitmask': pack_bitmask(flagged),
+        'columns': {
+            col: {'count': int(flags[i].sum()), 'bitmask': pack_bitmask(flags[i])}
+            for i, col in enumerate(columns)
+        },
+        'fences': fences,
+    }
@@ -0,0 +1,107 @@
+"""
+CSV parsing benchmark
+Compares inferred-type parsing with the declared-dtype path on a generated file
+
+Run from the repository root:
+    python -m chemequip_core.bench_parsing --rows 1000000
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from .analysis import COLUMN_DTYPES, NUMERIC_COLUMNS, REQUIRED_COLUMNS, clean_dataframe, pyarrow, read_csv_typed
+
+
+TYPES = ['Pump', 'Compressor', 'Valve', 'Heat Exchanger', 'Reactor', 'Condenser']
+
+
+def write_sample(path, rows, seed=0):
+    """Write a CSV with the required columns, an extra column and some bad values"""
+    rng = np.random.default_rng(seed)
+    types = rng.choice(TYPES, rows)
+    df = pd.DataFrame({
+        'Equipment Name': [f"{t}-{i % 500}" for i, t in enumerate(types)],
+        'Type': types,
+        'Flowrate': rng.normal(150, 40, rows).round(2),
+        'Pressure': rng.normal(6, 1.5, rows).round(2),
+        'Temperature': rng.normal(110, 25, rows).round(1),
+        'Notes': 'ok',
+    })
+    # A few empty cells, as real exports have
+    df.loc[rng.integers(0, rows, rows // 1000), 'Pressure'] = np.nan
+    df.to_csv(path, index=False)
+
+
+def parse_inferred(path):
+    """The original path: infer every column, then coerce the numeric ones"""
+    df = pd.read_csv(path)
+    for col in NUMERIC_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df.dropna(subset=NUMERIC_COLUMNS)
+
+
+def parse_declared(path, engine, float_dtype='float64'):
+    dtypes = dict(COLUMN_DTYPES, **{col: float_dtype for col in NUMERIC_COLUMNS})
+    df = pd.read_csv(path, engine=engine, usecols=REQUIRED_COLUMNS, dtype=dtypes)
+    return clean_dataframe(df)
+
+
+def measure(parse, runs):
+    """Return (median seconds, memory of the result in bytes)"""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        df = parse()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), int(df.memory_usage(deep=True).sum())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000, help='Rows in the generated file (default 1000000)')
+    parser.add_argument('--runs', type=int, default=3, help='Runs per mode (default 3)')
+    parser.add_argument('--file', help='Benchmark an existing CSV instead of a generated one')
+    args = parser.parse_args()
+
+    if args.file:
+        path = args.file
+    else:
+        fd, path = tempfile.mkstemp(prefix='chemequip_bench_', suffix='.csv')
+        os.close(fd)
+        write_sample(path, args.rows)
+
+    modes = [('inferred, C engine', lambda: parse_inferred(path))]
+    modes.append(('declared dtypes, C engine', lambda: parse_declared(path, 'c')))
+    if pyarrow is not None:
+        modes.append(('declared dtypes, pyarrow', lambda: parse_declared(path, 'pyarrow')))
+        modes.append(('declared float32, pyarrow', lambda: parse_declared(path, 'pyarrow', 'float32')))
+    else:
+        modes.append(('declared float32, C engine', lambda: parse_declared(path, 'c', 'float32')))
+    modes.append(('read_csv_typed (default path)', lambda: clean_dataframe(read_csv_typed(path))))
+
+    try:
+        size = os.path.getsize(path) / (1024 * 1024)
+        print("=" * 72)
+        print(f"Parsing benchmark: {path} ({size:.1f} MB), median of {args.runs} runs")
+        print("=" * 72)
+
+        baseline = None
+        for name, parse in modes:
+            seconds, memory = measure(parse, args.runs)
+            baseline = baseline or seconds
+            print(f"  {name:<32} {seconds * 1000:8.0f} ms  {baseline / seconds:5.2f}x  "
+                  f"{memory / (1024 * 1024):7.1f} MB in memory")
+        if pyarrow is None:
+            print("-" * 72)
+            print("  pyarrow is not installed; install it to benchmark the pyarrow engine")
+    finally:
+        if not args.file:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+"""
+Dictionary-encoded columnar form of equipment data
+
+Parsed data is stored and sent as one list per column instead of one
+dictionary per row. String columns are dictionary encoded: each distinct
+value is stored once in 'dictionary' and rows hold integer 'codes' into
+it (-1 for a missing value), the same layout as a pandas Categorical.
+A timestamp column holds milliseconds since 1970-01-01 UTC (None when
+missing) and decodes to ISO 8601 text:
+
+    {
+        'length': 3,
+        'columns': {
+            'Timestamp': {'timestamps': [1704067200000, 1704067260000, 1704067320000]},
+            'Type': {'dictionary': ['Pump', 'Valve'], 'codes': [0, 1, 0]},
+            'Flowrate': [120.0, 95.5, 130.2],
+            ...
+        }
+    }
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def dataframe_to_columns(df):
+    """
+    Convert a DataFrame to the columnar form.
+
+    Categorical columns keep their categories and codes; other non-numeric
+    columns are encoded the same way. Missing numbers become None.
+
+    Args:
+        df: pandas.DataFrame
+
+    Returns:
+        dict: {'length': int, 'columns': {name: list or {'dictionary', 'codes'}}}
+    """
+    columns = {}
+    for name in df.columns:
+        series = df[name]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            milliseconds = series.to_numpy(dtype='datetime64[ms]')
+            values = milliseconds.astype(np.int64).tolist()
+            if np.isnat(milliseconds).any():
+                values = [None if missing else value for missing, value in zip(np.isnat(milliseconds), values)]
+            columns[name] = {'timestamps': values}
+            continue
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            values = series.astype('float64')
+            if values.hasnans:
+                columns[name] = [None if pd.isna(value) else value for value in values.tolist()]
+            else:
+                columns[name] = values.tolist()
+            continue
+        if not isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.astype('category')
+        columns[name] = {
+            'dictionary': [str(value) for value in series.cat.categories],
+            'codes': series.cat.codes.tolist(),
+        }
+    return {'length': int(len(df)), 'columns': columns}
+
+
+def records_to_columns(records):
+    """Convert a list of row dictionaries (the older storage format) to the columnar form"""
+    return dataframe_to_columns(pd.DataFrame.from_records(records))
+
+
+def columns_to_dataframe(data):
+    """
+    Rebuild a DataFrame from the columnar form.
+
+    Dictionary-encoded columns become categoricals without expanding
+    their values, and timestamp columns datetime64[ms].
+
+    Args:
+        data: Columnar dict as built by dataframe_to_columns
+
+    Returns:
+        pandas.DataFrame
+    """
+    columns = {}
+    for name, column in data['columns'].items():
+        if isinstance(column, dict) and 'timestamps' in column:
+            # float64 holds millisecond times exactly; None becomes NaN, then NaT
+            milliseconds = np.array(column['timestamps'], dtype=np.float64)
+            columns[name] = pd.to_datetime(milliseconds, unit='ms').astype('datetime64[ms]')
+        elif isinstance(column, dict):
+            columns[name] = pd.Categorical.from_codes(column['codes'], column['dictionary'])
+        else:
+            # None (missing) becomes NaN
+            columns[name] = np.array(column, dtype=np.float64)
+    return pd.DataFrame(columns, index=pd.RangeIndex(data['length']))
+
+
+def format_timestamps(milliseconds):
+    """ISO 8601 text of millisecond times (None stays None)"""
+    present = [value for value in milliseconds if value is not None]
+    # Whole seconds (the usual case) are written without milliseconds
+    unit = 'ms' if any(value % 1000 for value in present) else 's'
+    values = np.array([np.iinfo(np.int64).min if value is None else value for value in milliseconds],
+                      dtype=np.int64).astype('datetime64[ms]')
+    return [None if text == 'NaT' else text for text in np.datetime_as_string(values, unit=unit).tolist()]
+
+
+def decode_column(column, limit=None):
+    """
+    Expand one column into plain values.
+
+    Args:
+        column: A list of values, a {'dictionary', 'codes'} dict or a
+            {'timestamps'} dict
+        limit: Only decode the first `limit` values
+
+    Returns:
+        list: Values of the column (None where missing)
+    """
+    if isinstance(column, dict) and 'timestamps' in column:
+        return format_timestamps(column['timestamps'][:limit])
+    if isinstance(column, dict):
+        dictionary = column['dictionary']
+        return [dictionary[code] if code >= 0 else None for code in column['codes'][:limit]]
+    return column[:limit]
+
+
+def rows_at(data, indexes):
+    """
+    Decode selected rows of the columnar form.
+
+    Args:
+        data: Columnar dict as built by dataframe_to_columns
+        indexes: Row numbers to decode
+
+    Returns:
+        list: One dictionary per index
+    """
+    names = list(data['columns'])
+    values = []
+    for name in names:
+        column = data['columns'][name]
+        if isinstance(column, dict) and 'timestamps' in column:
+            values.append(format_timestamps([column['timestamps'][i] for i in indexes]))
+        elif isinstance(column, dict):
+            dictionary, codes = column['dictionary'], column['codes']
+            values.append([dictionary[codes[i]] if codes[i] >= 0 else None for i in indexes])
+        else:
+            values.append([column[i] for i in indexes])
+    return [dict(zip(names, row)) for row in zip(*values)]
+
+
+def columns_to_records(data, limit=None):
+    """
+    Convert the columnar form back into a list of row dictionaries.
+
+    Args:
+        data: Columnar dict as built by dataframe_to_columns
+        limit: Only convert the first `limit` rows
+
+    Returns:
+        list: One dictionary per row
+    """
+    names = list(data['columns'])
+    values = [decode_column(data['columns'][name], limit) for name in names]
+    return [dict(zip(names, row)) for row in zip(*values)]
@@ -0,0 +1,417 @@
+"""
+Streaming decompression of compressed CSV uploads
+
+Each decoder takes the compressed bytes in chunks as they arrive and
+yields the decompressed bytes in pieces of bounded size, so neither the
+compressed nor the plain file has to be held in memory and a caller can
+stop as soon as the output grows too large.
+"""
+
+import struct
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# Largest piece of decompressed output produced at a time
+OUTPUT_PIECE_SIZE = 256 * 1024
+
+
+class IdentityDecoder:
+    """Plain CSV: passes the bytes through unchanged"""
+
+    extension = '.csv'
+    encoding = None
+
+    def decode(self, data):
+        if data:
+            yield data
+
+    def finish(self):
+        return iter(())
+
+
+class GzipDecoder:
+    """Decodes .csv.gz files, including ones made of several gzip members"""
+
+    extension = '.csv.gz'
+    encoding = 'gzip'
+
+    def __init__(self):
+        self.decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self.started = False
+
+    def decode(self, data):
+        while True:
+            if data:
+                self.started = True
+            try:
+                piece = self.decompressor.decompress(data, OUTPUT_PIECE_SIZE)
+            except zlib.error:
+                raise ValueError("Invalid gzip file")
+            if piece:
+                yield piece
+            if self.decompressor.eof:
+                # Concatenated gzip members decode to concatenated data
+                data = self.decompressor.unused_data
+                self.decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                self.started = False
+                if not data:
+                    return
+                continue
+            data = self.decompressor.unconsumed_tail
+            if not data and len(piece) < OUTPUT_PIECE_SIZE:
+                return
+
+    def finish(self):
+        if self.started:
+            raise ValueError("Compressed file is incomplete")
+        return iter(())
+
+
+class ZstdDecoder:
+    """
+    Decodes .csv.zst files (needs the optional zstandard package).
+
+    zstandard's decompressobj has no output limit, so the frame and block
+    headers of the zstd format (RFC 8878) are followed here and each call
+    is given input that completes at most one block. A block never
+    decompresses to more than 128 KiB, so the output of every call stays
+    bounded whatever the input, while the input is still passed on in the
+    pieces it arrived in. Concatenated frames are decoded one after the
+    other and skippable frames are ignored.
+    """
+
+    extension = '.csv.zst'
+    encoding = 'zstd'
+
+    FRAME_MAGIC = b'\x28\xb5\x2f\xfd'
+    # Skippable frames start with 0x184D2A50 to 0x184D2A5F (little-endian)
+    SKIPPABLE_MAGIC_MASK = 0xFFFFFFF0
+    SKIPPABLE_MAGIC = 0x184D2A50
+    BLOCK_HEADER_SIZE = 3
+    MAX_BLOCK_SIZE = 128 * 1024
+    CHECKSUM_SIZE = 4
+    # Frame_Content_Size field size by its flag (the first entry is 1
+    # for single-segment frames)
+    CONTENT_SIZE_FIELD = (0, 2, 4, 8)
+    DICTIONARY_ID_FIELD = (0, 1, 2, 4)
+
+    def __init__(self):
+        self.context = zstandard.ZstdDecompressor()
+        # Decompressor of the current frame; None between frames
+        self.decompressor = None
+        # Header being collected, the bytes it needs and what it is
+        self.header = bytearray()
+        self.needed = 4
+        self.state = 'magic'
+        # Header bytes not yet given to the decompressor; they produce no
+        # output and are sent along with the next block
+        self.unsent = bytearray()
+        # Bytes left of the current block (or skippable frame)
+        self.remaining = 0
+        self.last_block = False
+        self.has_checksum = False
+
+    def decode(self, data):
+        position = 0
+        while position < len(data):
+            if self.state in ('block', 'skip'):
+                take = min(self.remaining, len(data) - position)
+                if self.state == 'block':
+                    yield from self.feed(data[position:position + take])
+                position += take
+                self.remaining -= take
+                if self.remaining == 0:
+                    yield from self.end_block()
+                continue
+
+            take = min(self.needed - len(self.header), len(data) - position)
+            self.header += data[position:position + take]
+            position += take
+            if len(self.header) == self.needed:
+                yield from self.read_header()
+
+    def read_header(self):
+        """Act on a complete header (magic, frame or block header, checksum)"""
+        header = bytes(self.header)
+        self.header.clear()
+        self.needed = 0
+
+        if self.state == 'magic':
+            magic = int.from_bytes(header, 'little')
+            if magic & self.SKIPPABLE_MAGIC_MASK == self.SKIPPABLE_MAGIC:
+                self.state, self.needed = 'skip_size', 4
+                return
+            if header != self.FRAME_MAGIC:
+                raise ValueError("Invalid zstd file")
+            self.decompressor = self.context.decompressobj(write_size=OUTPUT_PIECE_SIZE)
+            self.unsent += header
+            self.state, self.needed = 'descriptor', 1
+        elif self.state == 'descriptor':
+            descriptor = header[0]
+            single_segment = bool(descriptor & 0x20)
+            content_size = self.CONTENT_SIZE_FIELD[descriptor >> 6] or int(single_segment)
+            self.has_checksum = bool(descriptor & 0x04)
+            self.unsent += header
+            self.state = 'frame_header'
+            self.needed = ((0 if single_segment else 1) + content_size
+                           + self.DICTIONARY_ID_FIELD[descriptor & 0x03])
+            if self.needed == 0:
+                self.state, self.needed = 'block_header', self.BLOCK_HEADER_SIZE
+        elif self.state == 'frame_header':
+            self.unsent += header
+            self.state, self.needed = 'block_header', self.BLOCK_HEADER_SIZE
+        elif self.state == 'block_header':
+            value = int.from_bytes(header, 'little')
+            self.last_block = bool(value & 1)
+            block_type, block_size = (value >> 1) & 0x3, value >> 3
+            if block_type == 3 or block_size > self.MAX_BLOCK_SIZE:
+                raise ValueError("Invalid zstd file")
+            self.unsent += header
+            # An RLE block holds one byte repeated block_size times
+            self.state, self.remaining = 'block', 1 if block_type == 1 else block_size
+            if self.remaining == 0:
+                yield from self.end_block()
+        elif self.state == 'checksum':
+            self.unsent += header
+            yield from self.end_frame()
+        elif self.state == 'skip_size':
+            self.state, self.remaining = 'skip', int.from_bytes(header, 'little')
+            if self.remaining == 0:
+                self.state, self.needed = 'magic', 4
+
+    def end_block(self):
+        """Move on once the current block (or skippable frame) is complete"""
+        if self.state == 'skip':
+            self.state, self.needed = 'magic', 4
+        elif not self.last_block:
+            self.state, self.needed = 'block_header', self.BLOCK_HEADER_SIZE
+        elif self.has_checksum:
+            self.state, self.needed = 'checksum', self.CHECKSUM_SIZE
+        else:
+            yield from self.end_frame()
+
+    def end_frame(self):
+        if self.unsent:
+            yield from self.feed(b'')
+        if not self.decompressor.eof:
+            raise ValueError("Invalid zstd file")
+        self.decompressor = None
+        self.state, self.needed = 'magic', 4
+
+    def feed(self, data):
+        """Decompress input that completes at most one block"""
+        if self.unsent:
+            data = bytes(self.unsent) + data
+            self.unsent.clear()
+        try:
+            piece = self.decompressor.decompress(data)
+        except zstandard.ZstdError:
+            raise ValueError("Invalid zstd file")
+        if piece:
+            yield piece
+
+    def finish(self):
+        if self.state != 'magic' or self.header:
+            raise ValueError("Compressed file is incomplete")
+        return iter(())
+
+
+class ZipDecoder:
+    """
+    Decodes a .zip archive holding a single CSV file.
+
+    The archive is read front to back from its local file headers, so it
+    can be decoded while it arrives; the central directory at the end is
+    not needed. Directory entries and macOS metadata (__MACOSX/) are
+    skipped. Stored and deflated members are supported.
+    """
+
+    extension = '.zip'
+    encoding = 'zip'
+
+    LOCAL_HEADER = struct.Struct('<IHHHHHIIIHH')
+    LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+    DATA_DESCRIPTOR_SIGNATURE = b'PK\x07\x08'
+    # Central directory or end of central directory record: no more members
+    END_SIGNATURES = (b'PK\x01\x02', b'PK\x05\x06')
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.state = 'header'
+        self.member = None
+        self.csv_found = False
+
+    def decode(self, data):
+        self.buffer += data
+        while True:
+            if self.state == 'header':
+                if not self.read_header():
+                    return
+            elif self.state == 'data':
+                yield from self.read_data()
+                if self.state == 'data':
+                    return
+            elif self.state == 'descriptor':
+                if not self.read_descriptor():
+                    return
+            else:
+                # Central directory: nothing left to decode
+                self.buffer.clear()
+                return
+
+    def read_header(self):
+        """Parse the next local file header; False if more bytes are needed"""
+        if len(self.buffer) < 4:
+            return False
+        signature = bytes(self.buffer[:4])
+        if signature in self.END_SIGNATURES:
+            self.state = 'done'
+            return True
+        if signature != self.LOCAL_HEADER_SIGNATURE:
+            raise ValueError("Invalid ZIP file")
+        if len(self.buffer) < self.LOCAL_HEADER.size:
+            return False
+
+        (_, _, flags, method, _, _, crc, compressed_size, _,
+         name_length, extra_length) = self.LOCAL_HEADER.unpack_from(self.buffer)
+        header_length = self.LOCAL_HEADER.size + name_length + extra_length
+        if len(self.buffer) < header_length:
+            return False
+
+        name = bytes(self.buffer[self.LOCAL_HEADER.size:self.LOCAL_HEADER.size + name_length])
+        name = name.decode('utf-8' if flags & 0x800 else 'cp437')
+        del self.buffer[:header_length]
+
+        if flags & 0x1:
+            raise ValueError("Encrypted ZIP files are not supported")
+        has_descriptor = bool(flags & 0x8)
+        if method == 8:
+            decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        elif method == 0 and not has_descriptor:
+            decompressor = None
+        else:
+            raise ValueError("Unsupported ZIP compression method")
+
+        skipped = name.endswith('/') or name.startswith('__MACOSX/')
+        if not skipped:
+            if self.csv_found or not name.endswith('.csv'):
+                raise ValueError("ZIP archive must contain a single CSV file")
+            self.csv_found = True
+
+        self.member = {
+            'skipped': skipped,
+            'decompressor': decompressor,
+            'remaining': compressed_size,
+            'has_descriptor': has_descriptor,
+            'crc': crc,
+            'computed_crc': 0,
+        }
+        self.state = 'data'
+        return True
+
+    def read_data(self):
+        """Decode as much of the current member as is buffered"""
+        member = self.member
+        decompressor = member['decompressor']
+
+        if decompressor is None:
+            # Stored: the data is the member's bytes as is
+            piece = bytes(self.buffer[:member['remaining']])
+            del self.buffer[:len(piece)]
+            member['remaining'] -= len(piece)
+            for start in range(0, len(piece), OUTPUT_PIECE_SIZE):
+                yield from self.emit(piece[start:start + OUTPUT_PIECE_SIZE])
+            if member['remaining'] == 0:
+                self.end_member()
+            return
+
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        while True:
+            try:
+                piece = decompressor.decompress(data, OUTPUT_PIECE_SIZE)
+            except zlib.error:
+                raise ValueError("Invalid ZIP file")
+            yield from self.emit(piece)
+            if decompressor.eof:
+                self.buffer += decompressor.unused_data
+                self.end_member()
+                return
+            data = decompressor.unconsumed_tail
+            if not data and len(piece) < OUTPUT_PIECE_SIZE:
+                return
+
+    def emit(self, piece):
+        if piece and not self.member['skipped']:
+            self.member['computed_crc'] = zlib.crc32(piece, self.member['computed_crc'])
+            yield piece
+
+    def end_member(self):
+        if self.member['has_descriptor']:
+            self.state = 'descriptor'
+        else:
+            self.check_crc(self.member['crc'])
+            self.state = 'header'
+
+    def read_descriptor(self):
+        """Skip the data descriptor that follows a streamed member"""
+        offset = 4 if bytes(self.buffer[:4]) == self.DATA_DESCRIPTOR_SIGNATURE else 0
+        if len(self.buffer) < offset + 12:
+            return False
+        crc, = struct.unpack_from('<I', self.buffer, offset)
+        del self.buffer[:offset + 12]
+        self.check_crc(crc)
+        self.state = 'header'
+        return True
+
+    def check_crc(self, crc):
+        if not self.member['skipped'] and self.member['computed_crc'] != crc:
+            raise ValueError("ZIP file is corrupted (checksum mismatch)")
+        self.member = None
+
+    def finish(self):
+        if self.state not in ('header', 'done') or self.buffer:
+            raise ValueError("Compressed file is incomplete")
+        if not self.csv_found:
+            raise ValueError("ZIP archive must contain a single CSV file")
+        return iter(())
+
+
+def available_decoders():
+    """Decoder classes usable in this installation, plain CSV first"""
+    decoders = [IdentityDecoder, GzipDecoder]
+    if zstandard is not None:
+        decoders.append(ZstdDecoder)
+    decoders.append(ZipDecoder)
+    return decoders
+
+
+def supported_extensions():
+    """File extensions accepted for CSV data, e.g. ['.csv', '.csv.gz', ...]"""
+    return [decoder.extension for decoder in available_decoders()]
+
+
+def supported_encodings():
+    """Names of the supported compression formats, e.g. ['gzip', 'zip']"""
+    return [decoder.encoding for decoder in available_decoders() if decoder.encoding]
+
+
+def decoder_for(filename):
+    """
+    Pick the decoder for a file name.
+
+    Args:
+        filename: Name of the uploaded file
+
+    Returns:
+        A new decoder, or None if the extension is not supported
+    """
+    for decoder in available_decoders():
+        if filename.endswith(decoder.extension):
+            return decoder()
+    return None
@@ -0,0 +1,405 @@
+"""
+Mergeable streaming sketches for percentiles, histograms and correlations
+
+The sketches see each value once, in blocks of any size, and keep a
+bounded amount of state however many values they have seen. Two
+sketches of the same kind can be merged, so blocks, files or worker
+processes can be summarised separately and combined afterwards.
+"""
+
+import math
+import numpy as np
+import pandas as pd
+
+
+# Percentiles reported in dataset summaries
+PERCENTILES = (5, 25, 50, 75, 95, 99)
+
+# Bins of the histograms in dataset summaries
+HISTOGRAM_BINS = 32
+
+# Rows kept by a RowSample, used for rank (Spearman) correlation
+ROW_SAMPLE_SIZE = 10000
+
+# Values added to a KLLSketch at a time, so no more than this many are
+# ever sorted together
+UPDATE_BLOCK_SIZE = 65536
+
+
+class KLLSketch:
+    """
+    KLL quantile sketch (Karnin, Lang and Liberty, 2016).
+
+    Values are kept in levels; a value on level h stands for 2**h input
+    values. When a level holds more than its capacity it is sorted and
+    every other value, starting at a random offset, moves up a level. The
+    rank error of a quantile is about 1.7 / k of the count, whatever the
+    count; with the default k = 400 that is under 0.5%. Up to k values
+    are kept exactly.
+
+    The random offsets come from a seeded generator, so the same values
+    in the same order always give the same sketch.
+    """
+
+    def __init__(self, k=400, seed=0):
+        self.k = k
+        self.count = 0
+        self.levels = [np.empty(0)]
+        self.rng = np.random.default_rng(seed)
+
+    def capacity(self, level):
+        """Values a level may hold; lower levels hold geometrically fewer"""
+        depth = len(self.levels) - level - 1
+        return max(int(math.ceil(self.k * (2 / 3) ** depth)), 8)
+
+    def update(self, values):
+        """
+        Add values (NaN values are ignored).
+
+        Args:
+            values: Array-like of numbers
+        """
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        self.count += len(values)
+        for start in range(0, len(values), UPDATE_BLOCK_SIZE):
+            self.levels[0] = np.concatenate((self.levels[0], values[start:start + UPDATE_BLOCK_SIZE]))
+            self.compress()
+
+    def merge(self, other):
+        """Add all values seen by another KLLSketch"""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate((self.levels[level], items))
+        self.count += other.count
+        self.compress()
+
+    def compress(self):
+        """Compact every level that is over capacity, from the bottom up"""
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self.capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # An odd value out stays on this level
+                kept = items[:len(items) % 2]
+                items = items[len(items) % 2:]
+                promoted = items[self.rng.integers(2)::2]
+                self.levels[level] = kept
+                self.levels[level + 1] = np.concatenate((self.levels[level + 1], promoted))
+            level += 1
+
+    def quantiles(self, fractions):
+        """
+        Estimate quantiles.
+
+        Args:
+            fractions: Sequence of quantiles between 0 and 1
+
+        Returns:
+            list: One estimate per fraction (None if no values were seen)
+        """
+        if not self.count:
+            return [None] * len(fractions)
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([
+            np.full(len(items), 2 ** level, dtype=np.int64) for level, items in enumerate(self.levels)
+        ])
+        order = np.argsort(values, kind='stable')
+        values = values[order]
+        cumulative = np.cumsum(weights[order])
+        targets = np.asarray(fractions, dtype=np.float64) * cumulative[-1]
+        positions = np.searchsorted(cumulative, targets, side='left')
+        positions = np.minimum(positions, len(values) - 1)
+        return [float(value) for value in values[positions]]
+
+
+class StreamingHistogram:
+    """
+    Histogram with a fixed number of bins whose range follows the data.
+
+    Bin widths are powers of two and bin edges are multiples of the
+    width, so the bins of two histograms always line up once the
+    narrower one is widened. When a value falls outside the bins, the
+    width doubles (pairs of bins merge) until everything fits. Counts are
+    exact; only the bin width depends on the data seen so far.
+    """
+
+    def __init__(self, bins=HISTOGRAM_BINS):
+        self.bins = bins
+        # Bin i covers [(start + i) * width, (start + i + 1) * width)
+        self.width = None
+        self.start = 0
+        self.counts = np.zeros(bins, dtype=np.int64)
+
+    def update(self, values, weights=None):
+        """
+        Add values (NaN and infinite values are ignored).
+
+        Args:
+            values: Array-like of numbers
+            weights: Optional count for each value
+        """
+        values = np.asarray(values, dtype=np.float64)
+        finite = np.isfinite(values)
+        values = values[finite]
+        if weights is not None:
+            weights = np.asarray(weights, dtype=np.int64)[finite]
+        if not len(values):
+            return
+
+        low, high = values.min(), values.max()
+        if self.width is None:
+            span = max(high - low, abs(low) * 1e-9, 1e-12)
+            self.width = 2.0 ** math.ceil(math.log2(span / self.bins))
+            self.start = math.floor(low / self.width)
+        self.fit(low, high)
+
+        indexes = np.floor(values / self.width).astype(np.int64) - self.start
+        self.counts += np.bincount(indexes, weights=weights, minlength=self.bins).astype(np.int64)
+
+    def merge(self, other):
+        """Add all values counted by another StreamingHistogram"""
+        if other.width is None:
+            return
+        if self.width is None:
+            self.width, self.start, self.counts = other.width, other.start, other.counts.copy()
+            return
+        if other.width > self.width:
+            self.rebin(other.width, math.floor(self.start * self.width / other.width))
+        used = np.flatnonzero(other.counts)
+        # The lower edge of each bin of the narrower histogram falls in the
+        # matching bin of the wider one
+        self.update((other.start + used) * other.width, other.counts[used])
+
+    def fit(self, low, high):
+        """Widen and shift the bins until [low, high] and all counts fit"""
+        while True:
+            first = math.floor(low / self.width)
+            last = math.floor(high / self.width)
+            used = np.flatnonzero(self.counts)
+            if len(used):
+                first = min(first, self.start + int(used[0]))
+                last = max(last, self.start + int(used[-1]))
+            if last - first < self.bins:
+                if first != self.start:
+                    self.rebin(self.width, first)
+                return
+            self.rebin(self.width * 2, math.floor(self.start / 2))
+
+    def rebin(self, width, start):
+        """Move the counts to bins of another (equal or wider) width"""
+        used = np.flatnonzero(self.counts)
+        shift = int(round(math.log2(width / self.width)))
+        indexes = ((self.start + used) >> shift) - start
+        counts = np.zeros(self.bins, dtype=np.int64)
+        np.add.at(counts, indexes, self.counts[used])
+        self.width, self.start, self.counts = width, start, counts
+
+    def to_dict(self):
+        """Bin edges and counts, trimmed to the bins between the first and last value"""
+        used = np.flatnonzero(self.counts)
+        if self.width is None or not len(used):
+            return {'edges': [], 'counts': []}
+        first, last = int(used[0]), int(used[-1])
+        edges = (self.start + np.arange(first, last + 2)) * self.width
+        return {'edges': edges.tolist(), 'counts': self.counts[first:last + 1].tolist()}
+
+
+class CoMoments:
+    """
+    Running means and co-moments of several columns.
+
+    Blocks are combined with the pairwise update of Chan, Golub and
+    LeVeque, which stays numerically stable for large counts, so the
+    result is the exact covariance and Pearson correlation of all rows
+    and accumulators of different blocks merge exactly.
+    """
+
+    def __init__(self, dimensions):
+        self.count = 0
+        self.mean = np.zeros(dimensions)
+        # Sums of products of deviations from the mean
+        self.comoments = np.zeros((dimensions, dimensions))
+
+    @classmethod
+    def from_values(cls, values):
+        """CoMoments of a 2-D array"""
+        moments = cls(values.shape[1])
+        moments.update(values)
+        return moments
+
+    def update(self, values):
+        """
+        Add a block of rows.
+
+        Args:
+            values: 2-D array, one column per dimension, without NaN
+        """
+        if len(values):
+            mean = values.mean(axis=0)
+            deviations = values - mean
+            self.combine(len(values), mean, deviations.T @ deviations)
+
+    def merge(self, other):
+        """Add the rows seen by another CoMoments"""
+        if other.count:
+            self.combine(other.count, other.mean, other.comoments)
+
+    def combine(self, count, mean, comoments):
+        total = self.count + count
+        delta = mean - self.mean
+        self.comoments = self.comoments + comoments + np.outer(delta, delta) * (self.count * count / total)
+        self.mean = self.mean + delta * (count / total)
+        self.count = total
+
+    def covariance(self):
+        """Sample covariance matrix (NaN with fewer than two rows)"""
+        if self.count < 2:
+            return np.full(self.comoments.shape, np.nan)
+        return self.comoments / (self.count - 1)
+
+    def correlation(self):
+        """Pearson correlation matrix (NaN for a constant column)"""
+        scale = np.sqrt(np.diag(self.comoments))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.comoments / np.outer(scale, scale)
+
+
+class RowSample:
+    """
+    Uniform random sample of rows, of fixed size and mergeable.
+
+    Each row gets a random priority and the rows with the lowest
+    priorities are kept (bottom-k sampling). Merging two samples and
+    keeping the lowest priorities again is a uniform sample of all rows
+    seen by both. The priorities come from a seeded generator.
+    """
+
+    def __init__(self, size=ROW_SAMPLE_SIZE, seed=0):
+        self.size = size
+        self.rows = None
+        self.priorities = np.empty(0)
+        self.rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        """Offer a block of rows (2-D array)"""
+        self.keep(values, self.rng.random(len(values)))
+
+    def merge(self, other):
+        """Combine with the sample of another RowSample"""
+        if other.rows is not None:
+            self.keep(other.rows, other.priorities)
+
+    def keep(self, rows, priorities):
+        if self.rows is not None:
+            rows = np.concatenate((self.rows, rows))
+            priorities = np.concatenate((self.priorities, priorities))
+        if len(priorities) > self.size:
+            lowest = np.argpartition(priorities, self.size)[:self.size]
+            rows, priorities = rows[lowest], priorities[lowest]
+        self.rows, self.priorities = rows, priorities
+
+    def rank_correlation(self):
+        """Spearman rank correlation matrix of the sampled rows"""
+        if self.rows is None or len(self.rows) < 2:
+            return None
+        ranks = pd.DataFrame(self.rows).rank().to_numpy()
+        return CoMoments.from_values(ranks).correlation()
+
+
+class SummaryAccumulator:
+    """
+    Percentile, histogram and correlation sketches of a set of numeric
+    columns.
+
+    update() takes the data a block at a time as it is parsed. Rows with
+    a missing or non-numeric value in any required column are skipped, the
+    same rows clean_dataframe() drops, so the result matches the cleaned
+    data without another pass over it. Gaps in the other columns are left
+    out of the sketches of those columns, and correlations use the rows
+    with a value in every column.
+    """
+
+    def __init__(self, columns, required=None):
+        self.columns = list(columns)
+        # Columns whose missing values drop the row (all of them by default)
+        self.required = [self.columns.index(col) for col in (self.columns if required is None else required)]
+        self.sketches = {col: KLLSketch() for col in self.columns}
+        self.histograms = {col: StreamingHistogram() for col in self.columns}
+        self.moments = CoMoments(len(self.columns))
+        self.sample = RowSample()
+
+    def update(self, df):
+        """
+        Add a block of rows.
+
+        Args:
+            df: pandas.DataFrame holding (at least) the numeric columns
+        """
+        values = np.column_stack([
+            pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+            for col in self.columns
+        ])
+        values = values[~np.isnan(values[:, self.required]).any(axis=1)]
+        missing = np.isnan(values)
+        for index, col in enumerate(self.columns):
+            column = values[:, index]
+            if missing[:, index].any():
+                column = column[~missing[:, index]]
+            self.sketches[col].update(column)
+            self.histograms[col].update(column)
+        # Correlations need a value in every column
+        if missing.any():
+            values = values[~missing.any(axis=1)]
+        self.moments.update(values)
+        self.sample.update(values)
+
+    def merge(self, other):
+        """Add the rows seen by another SummaryAccumulator"""
+        for col in self.columns:
+            self.sketches[col].merge(other.sketches[col])
+            self.histograms[col].merge(other.histograms[col])
+        self.moments.merge(other.moments)
+        self.sample.merge(other.sample)
+
+    def result(self):
+        """
+        Summary fields computed from the sketches.
+
+        Returns:
+            dict: 'percentiles' ({column: {'p50': ..., ...}}),
+            'histograms' ({column: {'edges', 'counts'}}) and 'correlation'
+            ({'columns', 'pearson', 'spearman', 'covariance'}: matrices in
+            the order of 'columns', None where undefined)
+        """
+        fractions = [p / 100 for p in PERCENTILES]
+        percentiles = {}
+        for col, sketch in self.sketches.items():
+            estimates = sketch.quantiles(fractions)
+            percentiles[col] = {
+                f"p{p}": None if value is None else round(value, 2)
+                for p, value in zip(PERCENTILES, estimates)
+            }
+        return {
+            'percentiles': percentiles,
+            'histograms': {col: histogram.to_dict() for col, histogram in self.histograms.items()},
+            'correlation': {
+                'columns': self.columns,
+                'pearson': matrix_to_json(self.moments.correlation()),
+                # Exact ranks need every row at once; the sample's ranks
+                # estimate it to within a few hundredths
+                'spearman': matrix_to_json(self.sample.rank_correlation()),
+                'covariance': matrix_to_json(self.moments.covariance()),
+            },
+        }
+
+
+def matrix_to_json(matrix, digits=4):
+    """Nested lists of rounded floats, None for NaN (or for no matrix)"""
+    if matrix is None:
+        return None
+    return [[None if np.isnan(value) else round(float(value), digits) for value in row] for row in matrix]
@@ -0,0 +1,147 @@
+"""
+Incremental CSV parsing for data that arrives in chunks
+"""
+
+import io
+import pandas as pd
+from .analysis import NUMERIC_COLUMNS, TIMESTAMP_COLUMNS, clean_dataframe, detect_extra_columns, read_csv_typed
+from .sketches import SummaryAccumulator
+
+
+# Bytes of complete records collected before a block is parsed
+BLOCK_SIZE = 1024 * 1024
+
+
+def find_record_boundary(buffer):
+    """
+    Find the last newline in a buffer that ends a CSV record.
+
+    A newline inside a quoted field does not end a record. The buffer is
+    assumed to start at a record boundary, so a newline ends a record when
+    an even number of quote characters precede it.
+
+    Args:
+        buffer: bytes or bytearray starting at a record boundary
+
+    Returns:
+        int: Index of the newline, or -1 if no complete record was found
+    """
+    newline = buffer.rfind(b'\n')
+    if newline < 0:
+        return -1
+    quotes = buffer.count(b'"', 0, newline)
+    while quotes % 2:
+        # Inside a quoted field: step back to the previous newline
+        previous = buffer.rfind(b'\n', 0, newline)
+        if previous < 0:
+            return -1
+        quotes -= buffer.count(b'"', previous, newline)
+        newline = previous
+    return newline
+
+
+class CSVBlockParser:
+    """
+    Parses CSV bytes as they arrive, one block of complete records at a time.
+
+    feed() can be called with chunks split anywhere, even inside a quoted
+    field. Whenever BLOCK_SIZE bytes are pending, the complete records
+    among them are parsed with pandas (the header line is prepended to
+    every block), so most of the parsing overlaps with receiving the data.
+    finish() parses the rest and applies the same cleaning as
+    parse_csv_file.
+
+    Extra numeric and timestamp columns are detected in the first block (unless given)
+    and every later block is read with the same columns.
+    """
+
+    def __init__(self, block_size=BLOCK_SIZE, extra_columns=None):
+        self.block_size = block_size
+        # Extra numeric columns as configured, and as found in the file
+        self.extra_columns = extra_columns
+        self.columns = None
+        self.header = None
+        self.pending = bytearray()
+        self.frames = []
+        # Percentile and histogram sketches, updated as blocks are parsed
+        # (created with the first block, once the columns are known); pass
+        # to calculate_summary() with the finished DataFrame
+        self.accumulator = None
+
+    def feed(self, data):
+        """
+        Add the next chunk of bytes.
+
+        Raises:
+            ValueError: If a block is not valid CSV
+        """
+        self.pending += data
+        if len(self.pending) >= self.block_size:
+            boundary = find_record_boundary(self.pending)
+            if boundary >= 0:
+                block = bytes(self.pending[:boundary + 1])
+                del self.pending[:boundary + 1]
+                self.parse_block(block)
+
+    def parse_block(self, block):
+        """Parse complete records; the first block also supplies the header"""
+        if self.header is None:
+            header_end = block.find(b'\n')
+            while header_end >= 0 and block.count(b'"', 0, header_end) % 2:
+                header_end = block.find(b'\n', header_end + 1)
+            if header_end < 0:
+                self.header = block + b'\n'
+                return
+            self.header = block[:header_end + 1]
+            block = block[header_end + 1:]
+            if not block.strip():
+                return
+
+        try:
+            source = io.BytesIO(self.header + block)
+            if self.columns is None:
+                self.columns = detect_extra_columns(source, self.extra_columns)
+            frame = read_csv_typed(source, extra_columns=self.columns)
+        except pd.errors.ParserError:
+            raise ValueError("Invalid CSV format")
+        except Exception as e:
+            raise ValueError(f"Error parsing CSV: {str(e)}")
+        self.frames.append(frame)
+        # Without the numeric columns finish() reports the missing columns
+        if all(col in frame.columns for col in NUMERIC_COLUMNS):
+            if self.accumulator is None:
+                columns = NUMERIC_COLUMNS + [col for col in self.columns if col not in TIMESTAMP_COLUMNS]
+                self.accumulator = SummaryAccumulator(columns, required=NUMERIC_COLUMNS)
+            self.accumulator.update(frame)
+
+    def finish(self):
+        """
+        Parse the remaining bytes and return the cleaned data.
+
+        Returns:
+            pandas.DataFrame: Parsed data
+
+        Raises:
+            ValueError: If CSV is invalid or missing required columns
+        """
+        if self.pending.strip():
+            self.parse_block(bytes(self.pending))
+        self.pending = bytearray()
+
+        if self.header is None or not self.header.strip():
+            raise ValueError("CSV file is empty")
+
+        try:
+            if self.frames:
+                # Blocks with different Type categories concatenate as
+                # strings; clean_dataframe() makes it a category again
+                df = pd.concat(self.frames, ignore_index=True)
+            else:
+                # Header only
+                df = pd.read_csv(io.BytesIO(self.header))
+            self.frames = []
+            return clean_dataframe(df)
+        except pd.errors.EmptyDataError:
+            raise ValueError("CSV file is empty")
+        except Exception as e:
+            raise ValueError(f"Error parsing CSV: {str(e)}")
@@ -0,0 +1,110 @@
+"""
+Resampling of time-stamped equipment data into fixed time buckets
+"""
+
+import numpy as np
+from .analysis import numeric_columns, timestamp_column
+from .columnar import format_timestamps
+
+
+# Bucket widths offered for resampling, in milliseconds
+RESAMPLE_INTERVALS = {
+    '1min': 60 * 1000,
+    '1h': 60 * 60 * 1000,
+    '1d': 24 * 60 * 60 * 1000,
+}
+
+# Statistics computed for every numeric column in each bucket
+RESAMPLE_STATISTICS = ['mean', 'min', 'max']
+
+
+def choose_interval(start, end, max_buckets=500):
+    """
+    Finest interval that splits a time span into at most max_buckets buckets.
+
+    Args:
+        start, end: ISO 8601 times, as in a summary's 'time_range'
+        max_buckets: Upper bound on the number of buckets
+
+    Returns:
+        str: Key of RESAMPLE_INTERVALS (the widest one for very long spans)
+    """
+    span = int((np.datetime64(end, 'ms') - np.datetime64(start, 'ms')).astype(np.int64))
+    for interval, width in RESAMPLE_INTERVALS.items():
+        if span // width < max_buckets:
+            return interval
+    return list(RESAMPLE_INTERVALS)[-1]
+
+
+def resample(df, interval, columns=None):
+    """
+    Aggregate rows into time buckets of a fixed width.
+
+    Buckets start at multiples of the width since 1970-01-01 UTC. The rows
+    are stored in time order, so each bucket is one contiguous run of rows
+    and every statistic is a single NumPy reduceat over all columns at
+    once. Only buckets holding rows are returned; rows without a time are
+    left out.
+
+    Args:
+        df: Cleaned pandas.DataFrame with a timestamp column
+        interval: Key of RESAMPLE_INTERVALS
+        columns: Numeric columns to aggregate (all of them by default)
+
+    Returns:
+        dict: 'interval', 'column' (the timestamp column), 'buckets' (start
+        of each bucket, ISO 8601 UTC), 'counts' (rows per bucket) and
+        'columns' ({column: {'mean': [...], 'min': [...], 'max': [...]}};
+        None for a bucket where the column has no values)
+
+    Raises:
+        ValueError: If the interval is unknown or df has no timestamp column
+    """
+    if interval not in RESAMPLE_INTERVALS:
+        raise ValueError(f"interval must be one of: {', '.join(RESAMPLE_INTERVALS)}")
+    time_column = timestamp_column(df)
+    if time_column is None:
+        raise ValueError("Dataset has no timestamp column")
+    if columns is None:
+        columns = numeric_columns(df)
+
+    times = df[time_column].to_numpy(dtype='datetime64[ms]')
+    present = ~np.isnat(times)
+    times = times[present].astype(np.int64)
+    values = np.vstack([df[col].to_numpy(dtype=np.float64)[present] for col in columns])
+    if len(times) and np.any(times[1:] < times[:-1]):
+        # Data stored before rows were kept in time order
+        order = np.argsort(times, kind='stable')
+        times, values = times[order], values[:, order]
+
+    result = {'interval': interval, 'column': time_column, 'buckets': [], 'counts': [], 'columns': {}}
+    if not len(times):
+        result['columns'] = {col: {stat: [] for stat in RESAMPLE_STATISTICS} for col in columns}
+        return result
+
+    # A bucket starts wherever the bucket number changes
+    width = RESAMPLE_INTERVALS[interval]
+    buckets = times // width
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+
+    # Gaps (NaN) count for neither the sums nor the extremes
+    missing = np.isnan(values)
+    counts = np.add.reduceat(~missing, starts, axis=1)
+    sums = np.add.reduceat(np.where(missing, 0.0, values), starts, axis=1)
+    lows = np.minimum.reduceat(np.where(missing, np.inf, values), starts, axis=1)
+    highs = np.maximum.reduceat(np.where(missing, -np.inf, values), starts, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        means = sums / counts
+    empty = counts == 0
+    statistics = {'mean': means, 'min': lows, 'max': highs}
+
+    result['buckets'] = format_timestamps((buckets[starts] * width).tolist())
+    result['counts'] = np.diff(np.append(starts, len(times))).tolist()
+    for index, col in enumerate(columns):
+        result['columns'][col] = {}
+        for stat in RESAMPLE_STATISTICS:
+            rounded = np.round(statistics[stat][index], 4)
+            result['columns'][col][stat] = [
+                None if gap else value for gap, value in zip(empty[index], rounded.tolist())
+            ]
+    return result
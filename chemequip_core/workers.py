@@ -0,0 +1,59 @@
+"""
+Functions run in worker processes to analyse many CSV files in parallel
+
+They take and return plain data (paths, dicts and lists) so they can be
+used with concurrent.futures.ProcessPoolExecutor.
+"""
+
+import hashlib
+from .analysis import calculate_equipment_statistics, calculate_summary
+from .anomalies import detect_anomalies
+from .columnar import dataframe_to_columns
+from .decompression import IdentityDecoder, decoder_for
+from .streaming import BLOCK_SIZE, CSVBlockParser
+
+
+def analyze_file(path, filename=None, extra_columns=None):
+    """
+    Parse and summarise one CSV file, which may be compressed.
+
+    Args:
+        path: Path of the file on disk
+        filename: Name that decides the compression format (defaults to path)
+        extra_columns: Numeric columns to keep besides the required ones
+            (detected from the first rows when None)
+
+    Returns:
+        dict: 'summary', 'data' (columnar), 'anomalies', 'equipment', 'rows', 'size' (bytes read) and 'sha256'
+        (of the decompressed CSV) on success, otherwise 'error'
+    """
+    decoder = decoder_for(filename or path) or IdentityDecoder()
+    parser = CSVBlockParser(extra_columns=extra_columns)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(BLOCK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                for piece in decoder.decode(chunk):
+                    digest.update(piece)
+                    parser.feed(piece)
+        for piece in decoder.finish():
+            digest.update(piece)
+            parser.feed(piece)
+        df = parser.finish()
+    except (OSError, ValueError) as e:
+        return {'error': str(e)}
+
+    return {
+        'summary': calculate_summary(df, parser.accumulator),
+        'data': dataframe_to_columns(df),
+        'anomalies': detect_anomalies(df),
+        'equipment': calculate_equipment_statistics(df),
+        'rows': len(df),
+        'size': size,
+        'sha256': digest.hexdigest(),
+    }
@@ -1,23 +1,25 @@
 # -*- mode: python ; coding: utf-8 -*-
-from PyInstaller.utils.hooks import collect_all
+from PyInstaller.utils.hooks import collect_data_files, collect_submodules, copy_metadata
 
 datas = [('ui', 'ui')]
 binaries = []
-hiddenimports = ['PyQt5', 'PyQt5.QtCore', 'PyQt5.QtGui', 'PyQt5.QtWidgets', 'matplotlib', 'matplotlib.backends.backend_qt5agg', 'pandas', 'requests']
-tmp_ret = collect_all('matplotlib')
-datas += tmp_ret[0]; binaries += tmp_ret[1]; hiddenimports += tmp_ret[2]
+hiddenimports = ['PyQt5', 'PyQt5.QtCore', 'PyQt5.QtGui', 'PyQt5.QtWidgets', 'matplotlib', 'matplotlib.backends.backend_qt5agg', 'requests', 'chemequip_core', 'pandas', 'keyring']
+hiddenimports += collect_submodules('keyring.backends')
+datas += collect_data_files('matplotlib')
+datas += copy_metadata('keyring')
+excludes = ['tkinter', 'IPython', 'jupyter', 'notebook', 'pytest', 'scipy', 'matplotlib.tests', 'numpy.tests', 'matplotlib.backends.backend_tkagg', 'matplotlib.backends.backend_tkcairo', 'matplotlib.backends.backend_gtk3agg', 'matplotlib.backends.backend_gtk4agg', 'matplotlib.backends.backend_wxagg', 'matplotlib.backends.backend_webagg', 'matplotlib.backends.backend_macosx', 'matplotlib.backends.backend_qt5cairo', 'PyQt5.QtWebEngine', 'PyQt5.QtWebEngineCore', 'PyQt5.QtWebEngineWidgets', 'PyQt5.QtQml', 'PyQt5.QtQuick', 'PyQt5.QtMultimedia', 'PyQt5.QtBluetooth', 'PyQt5.QtNetwork', 'PyQt5.QtSql', 'PyQt5.QtTest']
 
 
 a = Analysis(
     ['main.py'],
-    pathex=[],
+    pathex=['..'],
     binaries=binaries,
     datas=datas,
     hiddenimports=hiddenimports,
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=excludes,
     noarchive=False,
     optimize=0,
 )
@@ -33,7 +35,7 @@ exe = EXE(
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
+    upx=False,
     upx_exclude=[],
     runtime_tmpdir=None,
     console=False,
@@ -2,9 +2,15 @@
 API Client for communicating with the Django backend
 """
 
+import hashlib
+import os
+import time
 import requests
-from typing import Dict, Optional, List
-from config import ENDPOINTS
+from typing import Callable, Dict, Optional
+from config import (ENDPOINTS, TOKEN_VERIFY_TIMEOUT, RESUMABLE_UPLOAD_THRESHOLD,
+                    UPLOAD_CHUNK_RETRIES, UPLOAD_RETRY_DELAY, UPLOAD_CHUNK_TIMEOUT)
+from multipart_stream import MultipartFileStream, UploadCancelled, gzip_to_tempfile, file_size, hash_file
+import upload_sessions
 
 
 class APIClient:
@@ -13,6 +19,7 @@ class APIClient:
     def __init__(self):
         self.token: Optional[str] = None
         self.headers: Dict[str, str] = {}
+        self.upload_options: Optional[Dict] = None
     
     def set_token(self, token: str):
         """Set authentication token"""
@@ -79,35 +86,99 @@ class APIClient:
         except requests.exceptions.RequestException as e:
             return {'success': False, 'error': str(e)}
     
-    def upload_dataset(self, file_path: str) -> Dict:
+    def verify_token(self) -> Dict:
+        """
+        Check that the current token is still accepted by the server
+        
+        Cheap compared to login: the server only looks up the token and
+        does not run the password hash check.
+        
+        Returns:
+            Dictionary with user info; on failure 'invalid' is True when
+            the server rejected the token (as opposed to being unreachable)
+        """
+        try:
+            response = requests.get(
+                ENDPOINTS['verify_token'],
+                headers=self.headers,
+                timeout=TOKEN_VERIFY_TIMEOUT
+            )
+            if response.status_code in (401, 403):
+                return {'success': False, 'invalid': True, 'error': 'Session expired'}
+            response.raise_for_status()
+            return {'success': True, 'data': response.json()}
+        except requests.exceptions.RequestException as e:
+            return {'success': False, 'invalid': False, 'error': str(e)}
+    
+    def get_upload_options(self) -> Dict:
+        """
+        Get what the upload endpoint accepts (cached after the first call)
+        
+        Returns:
+            Dictionary with max_file_size, accepted_extensions and
+            content_encodings; empty if the server does not advertise them
+        """
+        if self.upload_options is None:
+            try:
+                response = requests.get(ENDPOINTS['upload_options'], headers=self.headers)
+                response.raise_for_status()
+                self.upload_options = response.json()
+            except (requests.exceptions.RequestException, ValueError):
+                # Older servers: plain CSV only; ask again next time
+                return {}
+        return self.upload_options
+    
+    def upload_dataset(self, file_path: str,
+                       progress_callback: Optional[Callable[[int, int], None]] = None,
+                       cancel_event=None) -> Dict:
         """
         Upload a CSV file
         
+        The request body is streamed from disk in chunks, so memory use
+        does not grow with the file size. When the server advertises gzip
+        support the file is compressed on the way out. Files over
+        RESUMABLE_UPLOAD_THRESHOLD go through upload_dataset_resumable
+        when the server supports it.
+        
         Args:
             file_path: Path to the CSV file
+            progress_callback: Called with (bytes_sent, total_bytes)
+            cancel_event: threading.Event; setting it aborts the upload
             
         Returns:
             Dictionary with upload result
         """
+        source = None
         try:
-            with open(file_path, 'rb') as f:
-                files = {'file': f}
-                response = requests.post(
-                    ENDPOINTS['upload'],
-                    files=files,
-                    headers=self.headers
-                )
-                
-                if response.status_code != 201 and response.status_code != 200:
-                    try:
-                        error_data = response.json()
-                        error_msg = error_data.get('detail', error_data.get('error', response.text))
-                    except:
-                        error_msg = response.text or f"HTTP {response.status_code}"
-                    return {'success': False, 'error': error_msg}
-                
-                response.raise_for_status()
-                return {'success': True, 'data': response.json()}
+            if (self.get_upload_options().get('resumable')
+                    and os.path.getsize(file_path) > RESUMABLE_UPLOAD_THRESHOLD):
+                return self.upload_dataset_resumable(file_path, progress_callback, cancel_event)
+            
+            source, filename, content_type = self.open_upload_source(file_path, cancel_event)
+            body = MultipartFileStream(
+                'file', filename, source, file_size(source),
+                content_type=content_type,
+                progress_callback=progress_callback,
+                cancel_event=cancel_event
+            )
+            response = requests.post(
+                ENDPOINTS['upload'],
+                data=body,
+                headers={**self.headers, 'Content-Type': body.content_type}
+            )
+            
+            if response.status_code != 201 and response.status_code != 200:
+                try:
+                    error_data = response.json()
+                    error_msg = error_data.get('detail', error_data.get('error', response.text))
+                except:
+                    error_msg = response.text or f"HTTP {response.status_code}"
+                return {'success': False, 'error': error_msg}
+            
+            response.raise_for_status()
+            return {'success': True, 'data': response.json()}
+        except UploadCancelled:
+            return {'success': False, 'cancelled': True, 'error': 'Upload cancelled'}
         except requests.exceptions.RequestException as e:
             error_msg = str(e)
             if hasattr(e, 'response') and e.response is not None:
@@ -119,18 +190,219 @@ class APIClient:
             return {'success': False, 'error': error_msg}
         except IOError as e:
             return {'success': False, 'error': f'File error: {str(e)}'}
+        finally:
+            if source is not None:
+                source.close()
+    
+    def upload_dataset_resumable(self, file_path: str,
+                                 progress_callback: Optional[Callable[[int, int], None]] = None,
+                                 cancel_event=None) -> Dict:
+        """
+        Upload a CSV file in chunks that survive connection failures
+        
+        The file (gzipped like in upload_dataset) is sent as numbered chunks which the server checks
+        against their SHA-256. A plain CSV is hashed as a whole while it is
+        read, so the server can also check the reassembled file. A failed
+        chunk is retried with a growing delay. If the upload still fails or is cancelled, the next upload
+        of the unchanged file (even after a restart) only sends the chunks
+        the server does not have yet.
+        
+        Args:
+            file_path: Path to the CSV file
+            progress_callback: Called with (bytes_sent, total_bytes)
+            cancel_event: threading.Event; setting it stops after the
+                          current chunk
+            
+        Returns:
+            Dictionary with upload result
+        """
+        source = None
+        try:
+            digest = hashlib.sha256()
+            source, filename, _ = self.open_upload_source(file_path, cancel_event, digest)
+            size = file_size(source)
+            
+            session = self.find_upload_session(file_path)
+            if session is not None and (session['filename'], session['size']) != (filename, size):
+                # Started with other upload options; begin a new session
+                session = None
+            if session is None:
+                request = {'filename': filename, 'size': size}
+                if file_path.endswith('.csv'):
+                    # The server hashes the decompressed file, which is only
+                    # known here for plain CSV
+                    request['sha256'] = digest.hexdigest()
+                response = requests.post(
+                    ENDPOINTS['upload_sessions'],
+                    json=request,
+                    headers=self.headers,
+                    timeout=UPLOAD_CHUNK_TIMEOUT
+                )
+                if response.status_code != 201:
+                    return {'success': False, 'error': self.response_error(response)}
+                session = response.json()
+                upload_sessions.remember_session(file_path, session['upload_id'])
+            
+            upload_id = session['upload_id']
+            chunk_size = session['chunk_size']
+            sent = session['received_bytes']
+            if progress_callback:
+                progress_callback(sent, session['size'])
+            
+            for index in session['missing_chunks']:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise UploadCancelled()
+                source.seek(index * chunk_size)
+                chunk = source.read(chunk_size)
+                error = self.send_chunk(upload_id, index, chunk, cancel_event)
+                if error is not None:
+                    return {'success': False, 'error': error}
+                sent += len(chunk)
+                if progress_callback:
+                    progress_callback(sent, session['size'])
+            
+            response = requests.post(
+                ENDPOINTS['upload_complete'].format(id=upload_id),
+                headers=self.headers
+            )
+            if response.status_code != 201:
+                return {'success': False, 'error': self.response_error(response)}
+            
+            upload_sessions.forget_session(file_path)
+            return {'success': True, 'data': response.json()}
+        except UploadCancelled:
+            return {'success': False, 'cancelled': True, 'error': 'Upload cancelled'}
+        except requests.exceptions.RequestException as e:
+            return {'success': False, 'error': str(e)}
+        except IOError as e:
+            return {'success': False, 'error': f'File error: {str(e)}'}
+        finally:
+            if source is not None:
+                source.close()
+    
+    def open_upload_source(self, file_path: str, cancel_event=None, digest=None):
+        """
+        Open the bytes to send for a file
+        
+        Plain CSV files are gzipped first when the server accepts gzip
+        (CSV typically shrinks 5-10x); files that are already compressed
+        are sent as they are.
+        
+        Args:
+            file_path: Path to the file
+            cancel_event: threading.Event checked while compressing
+            digest: Optional hashlib object fed with the contents of a
+                    plain CSV file
+        
+        Returns:
+            Tuple of (binary file object, upload filename, content type)
+        """
+        filename = os.path.basename(file_path)
+        if (filename.endswith('.csv')
+                and 'gzip' in self.get_upload_options().get('content_encodings', [])):
+            return gzip_to_tempfile(file_path, cancel_event, digest), filename + '.gz', 'application/gzip'
+        content_type = 'text/csv' if filename.endswith('.csv') else 'application/octet-stream'
+        source = open(file_path, 'rb')
+        if digest is not None and filename.endswith('.csv'):
+            try:
+                hash_file(source, digest, cancel_event)
+            except BaseException:
+                source.close()
+                raise
+        return source, filename, content_type
     
-    def get_datasets(self) -> Dict:
+    def find_upload_session(self, file_path: str) -> Optional[Dict]:
+        """
+        Look up the server state of an earlier, unfinished upload of a file
+        
+        Returns:
+            Session description (with missing_chunks), or None if the file
+            has no upload the server still knows about
+        """
+        upload_id = upload_sessions.find_session(file_path)
+        if upload_id is None:
+            return None
+        
+        response = requests.get(
+            ENDPOINTS['upload_session'].format(id=upload_id),
+            headers=self.headers,
+            timeout=UPLOAD_CHUNK_TIMEOUT
+        )
+        if response.status_code == 404:
+            # Completed, cancelled or expired on the server
+            upload_sessions.forget_session(file_path)
+            return None
+        response.raise_for_status()
+        return response.json()
+    
+    def send_chunk(self, upload_id: str, index: int, chunk: bytes, cancel_event=None) -> Optional[str]:
+        """
+        PUT one chunk of a resumable upload, retrying on failure
+        
+        Returns:
+            None once the server has the chunk, otherwise the last error
+        """
+        url = ENDPOINTS['upload_chunk'].format(id=upload_id, index=index)
+        headers = {
+            **self.headers,
+            'Content-Type': 'application/octet-stream',
+            'X-Chunk-SHA256': hashlib.sha256(chunk).hexdigest(),
+        }
+        delay = UPLOAD_RETRY_DELAY
+        error = None
+        
+        for attempt in range(UPLOAD_CHUNK_RETRIES):
+            if attempt:
+                if cancel_event is not None:
+                    if cancel_event.wait(delay):
+                        raise UploadCancelled()
+                else:
+                    time.sleep(delay)
+                delay *= 2
+            
+            try:
+                response = requests.put(url, data=chunk, headers=headers, timeout=UPLOAD_CHUNK_TIMEOUT)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                error = str(e)
+                continue
+            
+            if response.status_code == 200:
+                return None
+            error = self.response_error(response)
+            # 400 means the chunk arrived damaged; anything else below 500
+            # (session gone, signed out) will not improve by retrying
+            if response.status_code != 400 and response.status_code < 500:
+                break
+        
+        return error
+    
+    @staticmethod
+    def response_error(response) -> str:
+        """Extract the error message from a failed API response"""
+        try:
+            error_data = response.json()
+            return error_data.get('detail', error_data.get('error', response.text))
+        except ValueError:
+            return response.text or f"HTTP {response.status_code}"
+    
+    def get_datasets(self, limit: Optional[int] = None, offset: int = 0) -> Dict:
         """
         Get list of all user's datasets
         
+        Args:
+            limit: Page size; when given the server returns a page
+                   ({count, next, previous, results}) instead of a list
+            offset: Number of datasets to skip
+            
         Returns:
-            Dictionary with datasets list
+            Dictionary with datasets list (or page)
         """
+        params = {'limit': limit, 'offset': offset} if limit else None
         try:
             response = requests.get(
                 ENDPOINTS['datasets'],
-                headers=self.headers
+                headers=self.headers,
+                params=params
             )
             response.raise_for_status()
             return {'success': True, 'data': response.json()}
@@ -141,6 +413,9 @@ class APIClient:
         """
         Get detailed information about a specific dataset
         
+        The data comes as dictionary-encoded columns, which are much
+        smaller to transfer and to hold than one dictionary per row.
+        
         Args:
             dataset_id: ID of the dataset
             
@@ -149,7 +424,7 @@ class APIClient:
         """
         try:
             url = ENDPOINTS['dataset_detail'].format(id=dataset_id)
-            response = requests.get(url, headers=self.headers)
+            response = requests.get(url, headers=self.headers, params={'layout': 'columnar'})
             response.raise_for_status()
             return {'success': True, 'data': response.json()}
         except requests.exceptions.RequestException as e:
@@ -0,0 +1,66 @@
+"""
+Startup benchmark for the desktop app
+Measures wall-clock time from process launch until the login window is ready
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def measure_once(command, env):
+    """Launch the app once and return seconds until the login window was ready"""
+    fd, marker_path = tempfile.mkstemp(prefix='chemequip_startup_')
+    os.close(fd)
+    os.remove(marker_path)
+    
+    run_env = dict(env, CHEMEQUIP_STARTUP_MARKER=marker_path)
+    started = time.time()
+    try:
+        subprocess.run(command, env=run_env, timeout=120, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        with open(marker_path) as f:
+            ready = float(f.read())
+    finally:
+        if os.path.exists(marker_path):
+            os.remove(marker_path)
+    
+    return ready - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5, help='Number of launches (default 5)')
+    parser.add_argument('--exe', help='Benchmark a built executable instead of "python main.py"')
+    parser.add_argument('--offscreen', action='store_true',
+                        help='Use the Qt offscreen platform (for machines without a display)')
+    args = parser.parse_args()
+    
+    here = os.path.dirname(os.path.abspath(__file__))
+    command = [args.exe] if args.exe else [sys.executable, os.path.join(here, 'main.py')]
+    env = dict(os.environ)
+    if args.offscreen:
+        env['QT_QPA_PLATFORM'] = 'offscreen'
+    
+    print("=" * 60)
+    print(f"Startup benchmark: {' '.join(command)}")
+    print("=" * 60)
+    
+    timings = []
+    for run in range(1, args.runs + 1):
+        elapsed = measure_once(command, env)
+        timings.append(elapsed)
+        print(f"  Run {run}: {elapsed * 1000:.0f} ms to login window")
+    
+    print("-" * 60)
+    print(f"  min {min(timings) * 1000:.0f} ms | "
+          f"median {statistics.median(timings) * 1000:.0f} ms | "
+          f"max {max(timings) * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
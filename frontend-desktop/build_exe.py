@@ -6,10 +6,49 @@ This script uses PyInstaller to create a standalone Windows executable
 import os
 import sys
 import shutil
+import argparse
 import subprocess
 
-def build_executable():
-    """Build the Windows executable using PyInstaller"""
+# Modules the app never imports; leaving them out shrinks the bundle and
+# the amount of data a one-file build unpacks at every launch
+EXCLUDED_MODULES = [
+    'tkinter',
+    'IPython',
+    'jupyter',
+    'notebook',
+    'pytest',
+    'scipy',
+    'matplotlib.tests',
+    'numpy.tests',
+    'matplotlib.backends.backend_tkagg',
+    'matplotlib.backends.backend_tkcairo',
+    'matplotlib.backends.backend_gtk3agg',
+    'matplotlib.backends.backend_gtk4agg',
+    'matplotlib.backends.backend_wxagg',
+    'matplotlib.backends.backend_webagg',
+    'matplotlib.backends.backend_macosx',
+    'matplotlib.backends.backend_qt5cairo',
+    'PyQt5.QtWebEngine',
+    'PyQt5.QtWebEngineCore',
+    'PyQt5.QtWebEngineWidgets',
+    'PyQt5.QtQml',
+    'PyQt5.QtQuick',
+    'PyQt5.QtMultimedia',
+    'PyQt5.QtBluetooth',
+    'PyQt5.QtNetwork',
+    'PyQt5.QtSql',
+    'PyQt5.QtTest',
+]
+
+def build_executable(onedir=False):
+    """
+    Build the Windows executable using PyInstaller
+    
+    Args:
+        onedir: Build an unpacked folder instead of a single file. The
+                one-file build extracts itself to a temp folder on every
+                launch; the folder build starts noticeably faster.
+    """
     
     print("=" * 60)
     print("Building Chemical Equipment Visualizer Desktop App")
@@ -46,7 +85,8 @@ def build_executable():
         'pyinstaller',
         '--name=ChemEquipVisualizer',
         '--windowed',  # No console window
-        '--onefile',   # Single executable file
+        '--onedir' if onedir else '--onefile',
+        '--noupx',     # UPX-compressed binaries must be decompressed at every launch
         '--icon=NONE', # You can add an icon file path here if you have one
         '--add-data=ui;ui',  # Include ui folder
         '--hidden-import=PyQt5',
@@ -55,17 +95,30 @@ def build_executable():
         '--hidden-import=PyQt5.QtWidgets',
         '--hidden-import=matplotlib',
         '--hidden-import=matplotlib.backends.backend_qt5agg',
-        '--hidden-import=pandas',
         '--hidden-import=requests',
-        '--collect-all=matplotlib',
-        'main.py'
+        '--hidden-import=chemequip_core',
+        '--hidden-import=pandas',  # Loaded lazily by local (offline) analysis
+        '--hidden-import=keyring',
+        '--collect-submodules=keyring.backends',  # Backends are found through entry points
+        '--copy-metadata=keyring',
+        '--paths=..',  # Shared chemequip_core package at the repository root
+        '--collect-data=matplotlib',  # mpl-data (fonts, styles) only, not every submodule
     ]
+    command += [f'--exclude-module={module}' for module in EXCLUDED_MODULES]
+    command.append('main.py')
     
     try:
         subprocess.check_call(command)
         print("\n" + "=" * 60)
         print("✓ Build completed successfully!")
         print("=" * 60)
+        
+        if onedir:
+            print(f"\nApplication folder: {os.path.abspath('dist/ChemEquipVisualizer')}")
+            print("Run ChemEquipVisualizer.exe from that folder (keep the folder together).")
+            print("The one-file download in the backend static folder was not changed.")
+            return
+        
         print(f"\nExecutable location: {os.path.abspath('dist/ChemEquipVisualizer.exe')}")
         print(f"File size: {os.path.getsize('dist/ChemEquipVisualizer.exe') / (1024*1024):.2f} MB")
         
@@ -108,4 +161,8 @@ def build_executable():
         sys.exit(1)
 
 if __name__ == '__main__':
-    build_executable()
+    parser = argparse.ArgumentParser(description="Build the ChemEquip Visualizer desktop app")
+    parser.add_argument('--onedir', action='store_true',
+                        help="Build an unpacked folder (faster startup) instead of a single .exe")
+    args = parser.parse_args()
+    build_executable(onedir=args.onedir)
@@ -2,6 +2,8 @@
 Configuration settings for the desktop application
 """
 
+import os
+
 # API Configuration
 API_BASE_URL = "http://localhost:8000/api"
 
@@ -9,7 +11,13 @@ API_BASE_URL = "http://localhost:8000/api"
 ENDPOINTS = {
     'login': f"{API_BASE_URL}/login/",
     'signup': f"{API_BASE_URL}/signup/",
+    'verify_token': f"{API_BASE_URL}/auth/verify/",
     'upload': f"{API_BASE_URL}/upload/",
+    'upload_options': f"{API_BASE_URL}/upload/options/",
+    'upload_sessions': f"{API_BASE_URL}/uploads/",
+    'upload_session': f"{API_BASE_URL}/uploads/{{id}}/",
+    'upload_chunk': f"{API_BASE_URL}/uploads/{{id}}/chunks/{{index}}/",
+    'upload_complete': f"{API_BASE_URL}/uploads/{{id}}/complete/",
     'datasets': f"{API_BASE_URL}/datasets/",
     'dataset_detail': f"{API_BASE_URL}/datasets/{{id}}/",
     'dataset_delete': f"{API_BASE_URL}/datasets/{{id}}/delete/",
@@ -21,6 +29,34 @@ APP_TITLE = "ChemEquip Visualizer"
 WINDOW_WIDTH = 1200
 WINDOW_HEIGHT = 800
 
+# Per-user application data (stored sign-in token)
+APP_DATA_DIR = os.path.join(os.path.expanduser("~"), ".chemequip")
+
+# Service name for the stored token in the OS keyring (when available)
+KEYRING_SERVICE = "ChemEquipVisualizer"
+
+# Seconds to wait for the server when checking a stored token at startup
+TOKEN_VERIFY_TIMEOUT = 3
+
+# History list: datasets fetched per page as the user scrolls
+HISTORY_PAGE_SIZE = 50
+
+# Upload queue: number of files sent at the same time
+UPLOAD_PARALLELISM = 3
+
+# Files larger than this are sent in resumable chunks when the server
+# supports it, so a dropped connection only costs the current chunk
+RESUMABLE_UPLOAD_THRESHOLD = 2 * 1024 * 1024
+
+# Attempts per chunk before a resumable upload gives up (it can still be
+# resumed later), and the wait before the first retry in seconds (doubled
+# after every failure)
+UPLOAD_CHUNK_RETRIES = 5
+UPLOAD_RETRY_DELAY = 1
+
+# Seconds to wait for the server while sending one chunk
+UPLOAD_CHUNK_TIMEOUT = 60
+
 # Color Theme (matching web frontend)
 COLORS = {
     'primary': '#ef4444',
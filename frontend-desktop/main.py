@@ -3,11 +3,54 @@ Chemical Equipment Parameter Visualizer - Desktop Application
 Main entry point for the PyQt5 desktop application
 """
 
+import os
 import sys
+import time
 from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QTimer
 from PyQt5.QtGui import QFont
+
+# Make the shared chemequip_core package (repository root) importable when
+# running from source; frozen builds bundle it directly
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+
+import token_store
+from api_client import APIClient
 from ui.login_window import LoginWindow
 
+
+def report_startup_ready(app, marker_path):
+    """
+    Startup benchmark hook (see bench_startup.py).
+    Writes the wall-clock time the first window became ready, then quits.
+    """
+    with open(marker_path, 'w') as f:
+        f.write(repr(time.time()))
+    app.quit()
+
+
+def create_first_window():
+    """
+    Open the main window directly when a stored token is still valid,
+    otherwise the login window
+    """
+    stored = token_store.load_token()
+    if stored:
+        api_client = APIClient()
+        api_client.set_token(stored['token'])
+        result = api_client.verify_token()
+        if result['success']:
+            from ui.main_window import MainWindow
+            username = result['data'].get('username', stored['username'])
+            return MainWindow(api_client, username)
+        if result.get('invalid'):
+            # Revoked or expired; keep it when the server is just unreachable
+            token_store.clear_token()
+    return LoginWindow()
+
+
 def main():
     """Initialize and run the application"""
     app = QApplication(sys.argv)
@@ -21,9 +64,14 @@ def main():
     app.setOrganizationName("ChemEquip")
     app.setApplicationVersion("1.0.0")
     
-    # Create and show login window
-    login_window = LoginWindow()
-    login_window.show()
+    # Skip the login (and the server's password check) for a valid stored token
+    window = create_first_window()
+    window.show()
+    
+    # Runs once the event loop has processed the first show/paint events
+    marker_path = os.environ.get('CHEMEQUIP_STARTUP_MARKER')
+    if marker_path:
+        QTimer.singleShot(0, lambda: report_startup_ready(app, marker_path))
     
     sys.exit(app.exec_())
 
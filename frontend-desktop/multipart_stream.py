@@ -0,0 +1,152 @@
+"""
+Streaming multipart/form-data encoder for large file uploads
+"""
+
+import gzip
+import os
+import tempfile
+import uuid
+from typing import BinaryIO, Callable, Optional
+
+
+# Bytes read from disk per chunk while encoding or compressing
+CHUNK_SIZE = 256 * 1024
+
+
+class UploadCancelled(Exception):
+    """Raised from inside the request body when the user cancels an upload"""
+
+
+class MultipartFileStream:
+    """
+    File-like multipart body for a single file field.
+
+    requests reads the body through read() while sending, so only one
+    chunk of the file is held in memory at a time. The total length is
+    known up front, which lets requests send a normal Content-Length
+    header instead of chunked transfer encoding.
+    """
+
+    def __init__(self, field_name: str, filename: str, fileobj: BinaryIO, size: int,
+                 content_type: str = 'text/csv',
+                 progress_callback: Optional[Callable[[int, int], None]] = None,
+                 cancel_event=None):
+        self.boundary = uuid.uuid4().hex
+        self.fileobj = fileobj
+        self.progress_callback = progress_callback
+        self.cancel_event = cancel_event
+
+        self.head = (
+            f'--{self.boundary}\r\n'
+            f'Content-Disposition: form-data; name="{field_name}"; filename="{filename}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'
+        ).encode('utf-8')
+        self.tail = f'\r\n--{self.boundary}--\r\n'.encode('utf-8')
+
+        self.total = len(self.head) + size + len(self.tail)
+        self.position = 0
+        self.reported = 0
+
+    @property
+    def content_type(self) -> str:
+        """Content-Type header value for the request"""
+        return f'multipart/form-data; boundary={self.boundary}'
+
+    def __len__(self):
+        return self.total
+
+    def read(self, size: int = -1) -> bytes:
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise UploadCancelled()
+
+        if size is None or size < 0:
+            size = CHUNK_SIZE
+
+        chunk = b''
+        head_end = len(self.head)
+        file_end = self.total - len(self.tail)
+
+        if self.position < head_end:
+            chunk = self.head[self.position:self.position + size]
+        elif self.position < file_end:
+            chunk = self.fileobj.read(min(size, file_end - self.position))
+            if not chunk:
+                raise IOError('File changed size during upload')
+        elif self.position < self.total:
+            offset = self.position - file_end
+            chunk = self.tail[offset:offset + size]
+
+        self.position += len(chunk)
+        self.report_progress()
+        return chunk
+
+    def report_progress(self):
+        """Report progress every CHUNK_SIZE bytes and once at the end"""
+        if self.progress_callback is None:
+            return
+        if self.position - self.reported >= CHUNK_SIZE or self.position == self.total:
+            self.reported = self.position
+            self.progress_callback(self.position, self.total)
+
+
+def gzip_to_tempfile(file_path: str, cancel_event=None, digest=None) -> BinaryIO:
+    """
+    Gzip a file chunk by chunk into an anonymous temporary file.
+
+    Memory use stays at one chunk regardless of the file size.
+
+    Args:
+        file_path: Path of the file to compress
+        cancel_event: Optional threading.Event checked between chunks
+        digest: Optional hashlib object updated with the uncompressed chunks
+
+    Returns:
+        Temporary file positioned at the start of the compressed data
+    """
+    compressed = tempfile.TemporaryFile()
+    try:
+        with open(file_path, 'rb') as source, \
+                gzip.GzipFile(filename=os.path.basename(file_path), mode='wb',
+                              fileobj=compressed, mtime=0) as target:
+            while True:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise UploadCancelled()
+                chunk = source.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                if digest is not None:
+                    digest.update(chunk)
+                target.write(chunk)
+    except BaseException:
+        compressed.close()
+        raise
+
+    compressed.seek(0)
+    return compressed
+
+
+def hash_file(fileobj: BinaryIO, digest, cancel_event=None):
+    """
+    Feed an open file to a hashlib object chunk by chunk.
+
+    The file is left positioned at the start.
+
+    Args:
+        fileobj: Binary file to hash
+        digest: hashlib object to update
+        cancel_event: Optional threading.Event checked between chunks
+    """
+    fileobj.seek(0)
+    while True:
+        if cancel_event is not None and cancel_event.is_set():
+            raise UploadCancelled()
+        chunk = fileobj.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        digest.update(chunk)
+    fileobj.seek(0)
+
+
+def file_size(fileobj: BinaryIO) -> int:
+    """Return the size of an open file without reading it"""
+    return os.fstat(fileobj.fileno()).st_size
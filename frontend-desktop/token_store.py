@@ -0,0 +1,171 @@
+"""
+Persistent storage for the sign-in token
+
+The token is kept in the operating system keyring (Windows Credential
+Manager, macOS Keychain or the Secret Service on Linux). Without a usable
+keyring it is encrypted for the current Windows account with DPAPI, and
+on other systems it is written to a file only the owner may read (like
+~/.netrc), which offers no protection beyond file permissions. The
+username and the kind of storage are always kept in session.json.
+"""
+
+import base64
+import json
+import os
+import sys
+from typing import Dict, Optional
+from config import APP_DATA_DIR, KEYRING_SERVICE
+
+try:
+    import keyring
+    from keyring.errors import KeyringError
+except ImportError:
+    keyring = None
+
+
+SESSION_FILE = os.path.join(APP_DATA_DIR, 'session.json')
+
+if sys.platform == 'win32':
+    import ctypes
+    from ctypes import wintypes
+
+    class DataBlob(ctypes.Structure):
+        """DATA_BLOB structure taken and returned by the DPAPI functions"""
+        _fields_ = [('cbData', wintypes.DWORD), ('pbData', ctypes.POINTER(ctypes.c_char))]
+
+    # Fail instead of prompting the user
+    CRYPTPROTECT_UI_FORBIDDEN = 0x01
+
+    def dpapi_call(function, data: bytes) -> bytes:
+        """Run CryptProtectData or CryptUnprotectData over bytes"""
+        buffer = ctypes.create_string_buffer(data, len(data))
+        blob_in = DataBlob(len(data), ctypes.cast(buffer, ctypes.POINTER(ctypes.c_char)))
+        blob_out = DataBlob()
+        if not function(ctypes.byref(blob_in), None, None, None, None,
+                        CRYPTPROTECT_UI_FORBIDDEN, ctypes.byref(blob_out)):
+            raise ctypes.WinError()
+        try:
+            return ctypes.string_at(blob_out.pbData, blob_out.cbData)
+        finally:
+            ctypes.windll.kernel32.LocalFree(blob_out.pbData)
+
+    def dpapi_encrypt(token: str) -> Optional[str]:
+        """Encrypt the token for the current Windows account (base64 text)"""
+        try:
+            encrypted = dpapi_call(ctypes.windll.crypt32.CryptProtectData, token.encode('utf-8'))
+        except OSError:
+            return None
+        return base64.b64encode(encrypted).decode('ascii')
+
+    def dpapi_decrypt(text: str) -> Optional[str]:
+        """Decrypt a token from dpapi_encrypt(); None if it cannot be read"""
+        try:
+            return dpapi_call(ctypes.windll.crypt32.CryptUnprotectData, base64.b64decode(text)).decode('utf-8')
+        except (OSError, ValueError):
+            return None
+else:
+    dpapi_encrypt = dpapi_decrypt = None
+
+
+def write_private_file(path: str, data: Dict):
+    """Write JSON to a file readable and writable by the owner only"""
+    os.makedirs(APP_DATA_DIR, mode=0o700, exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        json.dump(data, f)
+    # O_CREAT only applies the mode to new files
+    os.chmod(path, 0o600)
+
+
+def keyring_set(username: str, token: str) -> bool:
+    """Store the token in the keyring; returns False if no keyring is usable"""
+    if keyring is None:
+        return False
+    try:
+        keyring.set_password(KEYRING_SERVICE, username, token)
+        return True
+    except KeyringError:
+        return False
+
+
+def save_token(username: str, token: str):
+    """
+    Remember the token for the next application start
+
+    Args:
+        username: User the token belongs to
+        token: Authentication token returned by login/signup
+    """
+    session = {'username': username}
+    if keyring_set(username, token):
+        session['storage'] = 'keyring'
+    elif sys.platform == 'win32':
+        encrypted = dpapi_encrypt(token)
+        if encrypted is None:
+            # File permissions do not make a plain file private on
+            # Windows, so the user signs in again at the next start
+            clear_token()
+            return
+        session['storage'] = 'dpapi'
+        session['token'] = encrypted
+    else:
+        session['storage'] = 'file'
+        session['token'] = token
+    write_private_file(SESSION_FILE, session)
+
+
+def load_token() -> Optional[Dict[str, str]]:
+    """
+    Load the stored token
+
+    Returns:
+        Dictionary with 'username' and 'token', or None if nothing is stored
+    """
+    try:
+        with open(SESSION_FILE) as f:
+            session = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    username = session.get('username')
+    if session.get('storage') == 'keyring':
+        if keyring is None:
+            return None
+        try:
+            token = keyring.get_password(KEYRING_SERVICE, username)
+        except KeyringError:
+            return None
+    elif session.get('storage') == 'dpapi':
+        if dpapi_decrypt is None:
+            return None
+        token = dpapi_decrypt(session.get('token', ''))
+    elif sys.platform == 'win32':
+        # Plain-text token left by an older version; sign in again
+        clear_token()
+        return None
+    else:
+        token = session.get('token')
+
+    if not username or not token:
+        return None
+    return {'username': username, 'token': token}
+
+
+def clear_token():
+    """Forget the stored token (on logout or when the server rejects it)"""
+    try:
+        with open(SESSION_FILE) as f:
+            session = json.load(f)
+    except (OSError, ValueError):
+        session = {}
+
+    if session.get('storage') == 'keyring' and keyring is not None:
+        try:
+            keyring.delete_password(KEYRING_SERVICE, session.get('username'))
+        except KeyringError:
+            pass
+
+    try:
+        os.remove(SESSION_FILE)
+    except FileNotFoundError:
+        pass
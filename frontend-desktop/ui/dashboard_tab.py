@@ -8,9 +8,9 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont
 from config import COLORS
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
+
+# matplotlib and its Qt backend are imported inside the chart methods so
+# they only load when the first dataset is displayed, not at startup.
 
 
 class DashboardTab(QWidget):
@@ -91,6 +91,12 @@ class DashboardTab(QWidget):
         filename_label.setStyleSheet(f"color: {COLORS['text_primary']};")
         header_layout.addWidget(filename_label)
         
+        if dataset.get('id') is None:
+            # Parsed on this machine; not (yet) stored on the server
+            local_label = QLabel("💻 Local analysis")
+            local_label.setStyleSheet(f"color: {COLORS['text_secondary']}; font-size: 13px; margin-left: 10px;")
+            header_layout.addWidget(local_label)
+        
         header_layout.addStretch()
         
         download_btn = QPushButton("📥 Download PDF")
@@ -111,6 +117,12 @@ class DashboardTab(QWidget):
         trends_group = self.create_trends_section(dataset)
         self.content_layout.addWidget(trends_group)
         
+        # Correlation section (summaries from before it was computed have none)
+        correlation = dataset.get('summary', {}).get('correlation')
+        if correlation and correlation.get('pearson'):
+            correlation_group = self.create_correlation_section(correlation)
+            self.content_layout.addWidget(correlation_group)
+        
         self.content_layout.addStretch()
     
     def create_summary_section(self, dataset):
@@ -250,18 +262,98 @@ class DashboardTab(QWidget):
         
         data = dataset.get('data', [])
         
-        # Debug output
-        print(f"DEBUG - Data length: {len(data) if data else 0}")
+        # Line chart - Parameter Trends (zoom/pan re-decimates the visible range)
+        from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
         
-        # Line chart - Parameter Trends
         line_canvas = self.create_line_chart(data)
+        toolbar = NavigationToolbar(line_canvas, group)
+        toolbar.setStyleSheet(f"background-color: {COLORS['bg_tertiary']}; border: none;")
+        layout.addWidget(toolbar)
         layout.addWidget(line_canvas)
         
         group.setLayout(layout)
         return group
     
+    def create_correlation_section(self, correlation):
+        """Create parameter correlation section with a heatmap"""
+        group = QGroupBox("Parameter Correlation")
+        group.setStyleSheet(f"""
+            QGroupBox {{
+                background-color: {COLORS['bg_secondary']};
+                border: 1px solid {COLORS['border']};
+                border-radius: 8px;
+                font-size: 16px;
+                font-weight: bold;
+                color: {COLORS['text_primary']};
+                padding: 20px;
+                margin-top: 10px;
+            }}
+            QGroupBox::title {{
+                subcontrol-origin: margin;
+                left: 15px;
+                padding: 0 5px;
+            }}
+        """)
+        
+        layout = QHBoxLayout()
+        layout.setSpacing(20)
+        
+        # Pearson (linear) and Spearman (rank) side by side
+        pearson_canvas = self.create_heatmap(correlation['columns'], correlation['pearson'],
+                                             'Pearson Correlation')
+        layout.addWidget(pearson_canvas)
+        
+        if correlation.get('spearman'):
+            spearman_canvas = self.create_heatmap(correlation['columns'], correlation['spearman'],
+                                                  'Spearman Rank Correlation')
+            layout.addWidget(spearman_canvas)
+        
+        group.setLayout(layout)
+        return group
+    
+    def create_heatmap(self, columns, matrix, title):
+        """Create heatmap of a correlation matrix"""
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+        from matplotlib.figure import Figure
+        
+        fig = Figure(figsize=(6, 5))
+        fig.patch.set_facecolor(COLORS['bg_secondary'])
+        ax = fig.add_subplot(111)
+        ax.set_facecolor(COLORS['bg_secondary'])
+        
+        # Undefined coefficients (constant columns) are left blank
+        values = [[float('nan') if value is None else value for value in row] for row in matrix]
+        heatmap = ax.imshow(values, cmap='RdBu_r', vmin=-1, vmax=1)
+        colorbar = fig.colorbar(heatmap, ax=ax, fraction=0.046, pad=0.04)
+        colorbar.ax.tick_params(colors=COLORS['text_primary'])
+        
+        for i, row in enumerate(matrix):
+            for j, value in enumerate(row):
+                if value is not None:
+                    ax.text(j, i, f'{value:.2f}', ha='center', va='center',
+                           fontsize=11, fontweight='bold',
+                           color='white' if abs(value) > 0.6 else 'black')
+        
+        ax.set_xticks(range(len(columns)))
+        ax.set_yticks(range(len(columns)))
+        ax.set_xticklabels(columns, rotation=45, ha='right')
+        ax.set_yticklabels(columns)
+        ax.tick_params(colors=COLORS['text_primary'])
+        
+        ax.set_title(title, color=COLORS['text_primary'],
+                    fontsize=14, fontweight='bold', pad=15)
+        
+        fig.tight_layout()
+        canvas = FigureCanvas(fig)
+        canvas.setMinimumHeight(400)
+        canvas.setStyleSheet(f"background-color: {COLORS['bg_secondary']};")
+        return canvas
+    
     def create_pie_chart(self, type_distribution):
         """Create pie chart for equipment type distribution"""
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+        from matplotlib.figure import Figure
+        
         fig = Figure(figsize=(10, 6))
         fig.patch.set_facecolor(COLORS['bg_secondary'])
         ax = fig.add_subplot(111)
@@ -309,6 +401,9 @@ class DashboardTab(QWidget):
     
     def create_bar_chart(self, type_distribution):
         """Create bar chart for equipment count by type"""
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+        from matplotlib.figure import Figure
+        
         fig = Figure(figsize=(10, 6))
         fig.patch.set_facecolor(COLORS['bg_secondary'])
         ax = fig.add_subplot(111)
@@ -327,7 +422,9 @@ class DashboardTab(QWidget):
             ax.set_axisbelow(True)
             
             if len(types) > 5:
-                plt.setp(ax.xaxis.get_majorticklabels(), rotation=45, ha='right')
+                for label in ax.xaxis.get_majorticklabels():
+                    label.set_rotation(45)
+                    label.set_horizontalalignment('right')
             
             for bar in bars:
                 height = bar.get_height()
@@ -355,43 +452,10 @@ class DashboardTab(QWidget):
         return canvas
     
     def create_line_chart(self, data):
-        """Create line chart for parameter trends"""
-        fig = Figure(figsize=(10, 6))
-        fig.patch.set_facecolor(COLORS['bg_secondary'])
-        ax = fig.add_subplot(111)
-        ax.set_facecolor(COLORS['bg_secondary'])
+        """Create line chart for parameter trends over every row"""
+        from ui.trend_chart import TrendCanvas
         
-        if data:
-            limited_data = data[:20]
-            indices = list(range(len(limited_data)))
-            
-            flowrates = [item.get('Flowrate', 0) for item in limited_data]
-            pressures = [item.get('Pressure', 0) for item in limited_data]
-            temperatures = [item.get('Temperature', 0) for item in limited_data]
-            
-            ax.plot(indices, flowrates, marker='o', linewidth=2, markersize=4,
-                   label='Flowrate', color='#3b82f6')
-            ax.plot(indices, pressures, marker='s', linewidth=2, markersize=4,
-                   label='Pressure', color='#ef4444')
-            ax.plot(indices, temperatures, marker='^', linewidth=2, markersize=4,
-                   label='Temperature', color='#10b981')
-            
-            ax.set_xlabel('Equipment Index', color=COLORS['text_primary'], fontsize=11, fontweight='bold')
-            ax.set_ylabel('Value', color=COLORS['text_primary'], fontsize=11, fontweight='bold')
-            ax.tick_params(colors=COLORS['text_primary'])
-            ax.legend(facecolor=COLORS['bg_tertiary'], edgecolor=COLORS['border'],
-                     labelcolor=COLORS['text_primary'])
-            ax.grid(alpha=0.3, linestyle='--', color=COLORS['border'])
-            ax.set_axisbelow(True)
-        
-        ax.set_title('Parameter Trends (First 20 Items)', color=COLORS['text_primary'],
-                    fontsize=14, fontweight='bold', pad=15)
-        
-        fig.tight_layout()
-        canvas = FigureCanvas(fig)
-        canvas.setMinimumHeight(400)
-        canvas.setStyleSheet(f"background-color: {COLORS['bg_secondary']};")
-        return canvas
+        return TrendCanvas(data)
     
     def download_pdf(self):
         """Download PDF report"""
@@ -403,6 +467,15 @@ class DashboardTab(QWidget):
             )
             return
         
+        if self.current_dataset.get('id') is None:
+            QMessageBox.information(
+                self,
+                "Not Synced",
+                "PDF reports are generated by the server. The report can be "
+                "downloaded once this file has been uploaded."
+            )
+            return
+        
         filename = self.current_dataset.get('filename', 'report')
         if filename.endswith('.csv'):
             filename = filename[:-4]
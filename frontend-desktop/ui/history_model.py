@@ -0,0 +1,236 @@
+"""
+History Model - Paged table model and row-action delegate for the History tab
+"""
+
+from PyQt5.QtWidgets import QStyledItemDelegate, QStyle
+from PyQt5.QtCore import (Qt, QAbstractTableModel, QModelIndex, QRect, QEvent,
+                          QObject, QRunnable, QThreadPool, pyqtSignal)
+from PyQt5.QtGui import QColor, QPainter, QPen
+from config import COLORS, HISTORY_PAGE_SIZE
+from datetime import datetime
+
+
+def format_upload_date(upload_date):
+    """Format an ISO upload date in the local timezone"""
+    if not upload_date:
+        return 'Unknown date'
+    try:
+        # Parse ISO format datetime with timezone
+        dt = datetime.fromisoformat(upload_date.replace('Z', '+00:00'))
+        # Convert to local timezone
+        return dt.astimezone().strftime('%b %d, %Y %I:%M %p')
+    except ValueError:
+        return upload_date
+
+
+class PageSignals(QObject):
+    """Signals emitted by a PageFetchTask (delivered on the UI thread)"""
+
+    finished = pyqtSignal(int, int, dict)  # (generation, offset, APIClient.get_datasets result)
+
+
+class PageFetchTask(QRunnable):
+    """Fetches one page of the dataset history on a QThreadPool thread"""
+
+    def __init__(self, api_client, generation, offset, limit):
+        super().__init__()
+        self.api_client = api_client
+        self.generation = generation
+        self.offset = offset
+        self.limit = limit
+        self.signals = PageSignals()
+
+    def run(self):
+        try:
+            result = self.api_client.get_datasets(limit=self.limit, offset=self.offset)
+        except Exception as e:
+            result = {'success': False, 'error': str(e)}
+        self.signals.finished.emit(self.generation, self.offset, result)
+
+
+class DatasetHistoryModel(QAbstractTableModel):
+    """
+    Table model over the user's dataset history.
+
+    Rows are fetched page by page from the paginated datasets endpoint;
+    the view calls fetchMore() as the user scrolls towards the end. Pages
+    are requested on a worker thread and inserted when they arrive, so
+    scrolling never waits for the network; only one page is in flight
+    at a time.
+    """
+
+    COLUMNS = ['Filename', 'Uploaded', 'Entries', 'Actions']
+    FILENAME_COLUMN, DATE_COLUMN, ENTRIES_COLUMN, ACTIONS_COLUMN = range(4)
+
+    load_failed = pyqtSignal(str)
+    # Emitted once the first page after reload() has arrived (or failed)
+    reloaded = pyqtSignal()
+
+    def __init__(self, api_client, page_size=HISTORY_PAGE_SIZE, parent=None):
+        super().__init__(parent)
+        self.api_client = api_client
+        self.page_size = page_size
+        self.datasets = []
+        self.total = 0
+        self.loading = False
+        # Bumped by reload() so pages requested before it are dropped
+        self.generation = 0
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(1)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.datasets)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        dataset = self.datasets[index.row()]
+        column = index.column()
+
+        if role == Qt.DisplayRole:
+            if column == self.FILENAME_COLUMN:
+                return f"📄 {dataset.get('filename', 'Unknown')}"
+            if column == self.DATE_COLUMN:
+                return dataset['display_date']
+            if column == self.ENTRIES_COLUMN:
+                return f"{dataset.get('entry_count', 0):,} entries"
+        elif role == Qt.ForegroundRole:
+            if column == self.ENTRIES_COLUMN:
+                return QColor(COLORS['primary'])
+            if column == self.DATE_COLUMN:
+                return QColor(COLORS['text_secondary'])
+        elif role == Qt.UserRole:
+            return dataset
+
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.loading and len(self.datasets) < self.total
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.loading:
+            return
+        self.request_page(len(self.datasets))
+
+    def request_page(self, offset):
+        """Start fetching the page at offset on the worker thread"""
+        self.loading = True
+        task = PageFetchTask(self.api_client, self.generation, offset, self.page_size)
+        task.signals.finished.connect(self.handle_page)
+        self.thread_pool.start(task)
+
+    def handle_page(self, generation, offset, result):
+        """Append a fetched page, updating the total count"""
+        if generation != self.generation:
+            # Requested before the last reload
+            return
+        self.loading = False
+
+        if not result['success']:
+            # Stop further fetches until the next reload
+            self.total = len(self.datasets)
+            self.load_failed.emit(result.get('error', 'Unknown error'))
+            if offset == 0:
+                self.reloaded.emit()
+            return
+
+        data = result['data']
+        if isinstance(data, list):
+            # Server without pagination support returns everything at once
+            page, self.total = data, offset + len(data)
+        else:
+            page, self.total = data.get('results', []), data.get('count', 0)
+
+        for dataset in page:
+            dataset['display_date'] = format_upload_date(dataset.get('upload_date', ''))
+
+        if page:
+            first = len(self.datasets)
+            self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+            self.datasets.extend(page)
+            self.endInsertRows()
+        if offset == 0:
+            self.reloaded.emit()
+
+    def reload(self):
+        """Drop all rows and fetch the first page again (reloaded is emitted when it arrives)"""
+        self.beginResetModel()
+        self.generation += 1
+        self.datasets = []
+        self.total = 0
+        self.loading = False
+        self.endResetModel()
+        self.request_page(0)
+
+    def dataset_at(self, row):
+        """Return the dataset dictionary shown in a row"""
+        return self.datasets[row]
+
+
+class DatasetActionsDelegate(QStyledItemDelegate):
+    """Paints View / PDF / Delete buttons in a cell and reports clicks"""
+
+    ACTIONS = [('view', '👁 View'), ('pdf', '📥 PDF'), ('delete', '🗑 Delete')]
+    BUTTON_WIDTH = 90
+    BUTTON_SPACING = 8
+
+    action_triggered = pyqtSignal(str, int)  # (action, row)
+
+    def button_rects(self, cell_rect):
+        """Return (action, label, rect) for each button in a cell"""
+        height = min(cell_rect.height() - 12, 32)
+        top = cell_rect.top() + (cell_rect.height() - height) // 2
+        left = cell_rect.left() + self.BUTTON_SPACING
+
+        buttons = []
+        for action, label in self.ACTIONS:
+            buttons.append((action, label, QRect(left, top, self.BUTTON_WIDTH, height)))
+            left += self.BUTTON_WIDTH + self.BUTTON_SPACING
+        return buttons
+
+    def paint(self, painter, option, index):
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(option.rect, QColor(COLORS['bg_hover']))
+
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        for action, label, rect in self.button_rects(option.rect):
+            if action == 'view':
+                painter.setPen(Qt.NoPen)
+                painter.setBrush(QColor(COLORS['primary']))
+                text_color = QColor('white')
+            else:
+                border = COLORS['error'] if action == 'delete' else COLORS['border']
+                painter.setPen(QPen(QColor(border), 1))
+                painter.setBrush(QColor(COLORS['bg_tertiary']))
+                text_color = QColor(COLORS['error'] if action == 'delete' else COLORS['text_secondary'])
+            painter.drawRoundedRect(rect, 6, 6)
+            painter.setPen(text_color)
+            painter.drawText(rect, Qt.AlignCenter, label)
+        painter.restore()
+
+    def preferred_width(self):
+        """Width needed to fit every button"""
+        return len(self.ACTIONS) * (self.BUTTON_WIDTH + self.BUTTON_SPACING) + self.BUTTON_SPACING
+
+    def sizeHint(self, option, index):
+        size = super().sizeHint(option, index)
+        size.setWidth(self.preferred_width())
+        return size
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            for action, _, rect in self.button_rects(option.rect):
+                if rect.contains(event.pos()):
+                    self.action_triggered.emit(action, index.row())
+                    return True
+        return super().editorEvent(event, model, option, index)
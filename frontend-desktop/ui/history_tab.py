@@ -3,11 +3,12 @@ History Tab - Shows list of uploaded datasets
 """
 
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
-                             QPushButton, QScrollArea, QMessageBox)
+                             QPushButton, QTableView, QHeaderView,
+                             QAbstractItemView, QMessageBox)
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont
 from config import COLORS
-from datetime import datetime
+from ui.history_model import DatasetHistoryModel, DatasetActionsDelegate
 
 
 class HistoryTab(QWidget):
@@ -43,13 +44,69 @@ class HistoryTab(QWidget):
         
         layout.addLayout(header_layout)
         
-        # Scroll area for dataset list
-        scroll = QScrollArea()
-        scroll.setWidgetResizable(True)
-        scroll.setStyleSheet(f"""
-            QScrollArea {{
+        # Status label for empty history and load errors
+        self.status_label = QLabel()
+        self.status_label.setAlignment(Qt.AlignCenter)
+        self.status_label.hide()
+        layout.addWidget(self.status_label)
+        
+        # Dataset table; rows are fetched page by page as the user scrolls
+        self.model = DatasetHistoryModel(self.api_client, parent=self)
+        self.model.load_failed.connect(self.show_load_error)
+        self.model.reloaded.connect(self.show_empty_history)
+        
+        self.actions_delegate = DatasetActionsDelegate(self)
+        self.actions_delegate.action_triggered.connect(self.handle_row_action)
+        
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setItemDelegateForColumn(DatasetHistoryModel.ACTIONS_COLUMN, self.actions_delegate)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.table.setShowGrid(False)
+        self.table.setWordWrap(False)
+        self.table.doubleClicked.connect(lambda index: self.handle_row_action('view', index.row()))
+        
+        # Fixed row heights let the view skip measuring every row
+        vertical_header = self.table.verticalHeader()
+        vertical_header.hide()
+        vertical_header.setSectionResizeMode(QHeaderView.Fixed)
+        vertical_header.setDefaultSectionSize(56)
+        
+        horizontal_header = self.table.horizontalHeader()
+        horizontal_header.setSectionResizeMode(DatasetHistoryModel.FILENAME_COLUMN, QHeaderView.Stretch)
+        horizontal_header.setSectionResizeMode(DatasetHistoryModel.DATE_COLUMN, QHeaderView.Fixed)
+        horizontal_header.setSectionResizeMode(DatasetHistoryModel.ENTRIES_COLUMN, QHeaderView.Fixed)
+        horizontal_header.setSectionResizeMode(DatasetHistoryModel.ACTIONS_COLUMN, QHeaderView.Fixed)
+        self.table.setColumnWidth(DatasetHistoryModel.DATE_COLUMN, 200)
+        self.table.setColumnWidth(DatasetHistoryModel.ENTRIES_COLUMN, 130)
+        self.table.setColumnWidth(
+            DatasetHistoryModel.ACTIONS_COLUMN,
+            self.actions_delegate.preferred_width()
+        )
+        
+        self.table.setStyleSheet(f"""
+            QTableView {{
+                background-color: {COLORS['bg_secondary']};
+                color: {COLORS['text_primary']};
+                border: 1px solid {COLORS['border']};
+                border-radius: 8px;
+                font-size: 14px;
+                selection-background-color: {COLORS['bg_hover']};
+                selection-color: {COLORS['text_primary']};
+            }}
+            QTableView::item {{
+                border-bottom: 1px solid {COLORS['border']};
+                padding: 0 10px;
+            }}
+            QHeaderView::section {{
+                background-color: {COLORS['bg_tertiary']};
+                color: {COLORS['text_secondary']};
                 border: none;
-                background-color: {COLORS['bg_primary']};
+                padding: 8px 10px;
+                font-weight: bold;
             }}
             QScrollBar:vertical {{
                 background-color: {COLORS['bg_secondary']};
@@ -65,152 +122,50 @@ class HistoryTab(QWidget):
             }}
         """)
         
-        # Content widget for datasets
-        self.content_widget = QWidget()
-        self.content_layout = QVBoxLayout()
-        self.content_layout.setSpacing(10)
-        self.content_layout.setAlignment(Qt.AlignTop)
-        
-        self.content_widget.setLayout(self.content_layout)
-        scroll.setWidget(self.content_widget)
-        
-        layout.addWidget(scroll)
+        layout.addWidget(self.table)
         self.setLayout(layout)
     
     def load_history(self):
-        """Load and display upload history"""
-        # Clear existing content
-        while self.content_layout.count():
-            item = self.content_layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
-        
-        # Fetch datasets
-        result = self.api_client.get_datasets()
-        
-        if result['success']:
-            datasets = result['data']
-            
-            if not datasets:
-                empty_label = QLabel("No datasets uploaded yet.")
-                empty_label.setStyleSheet(f"""
-                    color: {COLORS['text_secondary']};
-                    font-size: 16px;
-                    padding: 40px;
-                """)
-                empty_label.setAlignment(Qt.AlignCenter)
-                self.content_layout.addWidget(empty_label)
-            else:
-                for dataset in datasets:
-                    dataset_widget = self.create_dataset_row(dataset)
-                    self.content_layout.addWidget(dataset_widget)
-        else:
-            error_label = QLabel(f"Error loading history: {result.get('error', 'Unknown error')}")
-            error_label.setStyleSheet(f"color: {COLORS['error']}; padding: 20px;")
-            self.content_layout.addWidget(error_label)
+        """Reload upload history from the first page"""
+        if self.main_window.offline:
+            self.status_label.setText("Working offline. Sign in to see your upload history.")
+            self.status_label.setStyleSheet(f"""
+                color: {COLORS['text_secondary']};
+                font-size: 16px;
+                padding: 40px;
+            """)
+            self.status_label.show()
+            return
+        
+        self.status_label.hide()
+        self.model.reload()
     
-    def create_dataset_row(self, dataset):
-        """Create a horizontal row widget for a dataset"""
-        widget = QWidget()
-        widget.setStyleSheet(f"""
-            QWidget {{
-                background-color: {COLORS['bg_secondary']};
-                border: 1px solid {COLORS['border']};
-                border-radius: 8px;
-                padding: 15px;
-            }}
-            QWidget:hover {{
-                background-color: {COLORS['bg_hover']};
-                border-color: {COLORS['primary']};
-            }}
-        """)
-        
-        layout = QHBoxLayout()
-        layout.setSpacing(15)
-        
-        # Icon
-        icon_label = QLabel("📄")
-        icon_label.setFont(QFont("Inter", 24))
-        layout.addWidget(icon_label)
-        
-        # Info section
-        info_layout = QVBoxLayout()
-        info_layout.setSpacing(5)
-        
-        filename = QLabel(dataset.get('filename', 'Unknown'))
-        filename.setFont(QFont("Inter", 16, QFont.Bold))
-        filename.setStyleSheet(f"color: {COLORS['text_primary']};")
-        info_layout.addWidget(filename)
-        
-        # Date and entry count
-        meta_layout = QHBoxLayout()
-        
-        upload_date = dataset.get('upload_date', '')
-        if upload_date:
-            try:
-                # Parse ISO format datetime with timezone
-                dt = datetime.fromisoformat(upload_date.replace('Z', '+00:00'))
-                # Convert to local timezone
-                local_dt = dt.astimezone()
-                date_str = local_dt.strftime('%b %d, %Y %I:%M %p')
-            except:
-                date_str = upload_date
-        else:
-            date_str = 'Unknown date'
-        
-        date_label = QLabel(f"📅 {date_str}")
-        date_label.setStyleSheet(f"color: {COLORS['text_secondary']}; font-size: 15px;")
-        meta_layout.addWidget(date_label)
-        
-        entry_count = dataset.get('entry_count', 0)
-        count_badge = QLabel(f"{entry_count} entries")
-        count_badge.setStyleSheet(f"""
-            color: {COLORS['primary']};
-            background-color: {COLORS['bg_tertiary']};
-            padding: 4px 10px;
-            border-radius: 12px;
-            font-size: 14px;
-            font-weight: bold;
-        """)
-        meta_layout.addWidget(count_badge)
-        
-        meta_layout.addStretch()
-        info_layout.addLayout(meta_layout)
-        
-        layout.addLayout(info_layout)
-        layout.addStretch()
-        
-        # Action buttons
-        view_btn = QPushButton("👁 View")
-        view_btn.setFixedWidth(100)
-        view_btn.clicked.connect(lambda: self.view_dataset(dataset['id']))
-        layout.addWidget(view_btn)
-        
-        download_btn = QPushButton("📥 PDF")
-        download_btn.setObjectName("secondary")
-        download_btn.setFixedWidth(100)
-        download_btn.clicked.connect(lambda: self.download_pdf(dataset))
-        layout.addWidget(download_btn)
-        
-        delete_btn = QPushButton("🗑 Delete")
-        delete_btn.setObjectName("secondary")
-        delete_btn.setFixedWidth(100)
-        delete_btn.setStyleSheet(f"""
-            QPushButton#secondary {{
-                background-color: {COLORS['bg_tertiary']};
-                color: {COLORS['error']};
-                border: 1px solid {COLORS['error']};
-            }}
-            QPushButton#secondary:hover {{
-                background-color: {COLORS['error']};
-                color: white;
-            }}
-        """)
-        delete_btn.clicked.connect(lambda: self.delete_dataset(dataset['id']))
-        layout.addWidget(delete_btn)
-        
-        widget.setLayout(layout)
-        return widget
+    def show_empty_history(self):
+        """Tell the user when the first page of the history came back empty"""
+        if self.model.rowCount() == 0 and self.status_label.isHidden():
+            self.status_label.setText("No datasets uploaded yet.")
+            self.status_label.setStyleSheet(f"""
+                color: {COLORS['text_secondary']};
+                font-size: 16px;
+                padding: 40px;
+            """)
+            self.status_label.show()
+    
+    def show_load_error(self, error):
+        """Show a history loading error above the table"""
+        self.status_label.setText(f"Error loading history: {error}")
+        self.status_label.setStyleSheet(f"color: {COLORS['error']}; padding: 20px;")
+        self.status_label.show()
+    
+    def handle_row_action(self, action, row):
+        """Dispatch a View / PDF / Delete click on a table row"""
+        dataset = self.model.dataset_at(row)
+        if action == 'view':
+            self.view_dataset(dataset['id'])
+        elif action == 'pdf':
+            self.download_pdf(dataset)
+        elif action == 'delete':
+            self.delete_dataset(dataset['id'])
     
     def view_dataset(self, dataset_id):
         """View dataset in dashboard"""
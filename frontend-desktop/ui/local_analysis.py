@@ -0,0 +1,47 @@
+"""
+Local Analysis - Parses a CSV on this machine without contacting the server
+"""
+
+import os
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+
+
+class LocalAnalysisSignals(QObject):
+    """Signals emitted by a LocalAnalysisTask (delivered on the UI thread)"""
+
+    finished = pyqtSignal(dict)  # {'success': bool, 'data' | 'error'}
+
+
+class LocalAnalysisTask(QRunnable):
+    """
+    Parses and summarises one CSV file on a QThreadPool thread.
+
+    Uses the same chemequip_core code as the backend, so the dashboard
+    shows exactly what the server would compute after an upload. The
+    result has the shape of a columnar dataset detail response with 'id'
+    set to None and 'local_path' pointing at the file.
+    """
+
+    def __init__(self, file_path):
+        super().__init__()
+        self.file_path = file_path
+        self.signals = LocalAnalysisSignals()
+
+    def run(self):
+        try:
+            # Imported here so pandas only loads once a local file is opened
+            from chemequip_core import parse_csv_file, calculate_summary, dataframe_to_columns
+
+            df = parse_csv_file(self.file_path)
+            dataset = {
+                'id': None,
+                'filename': os.path.basename(self.file_path),
+                'local_path': self.file_path,
+                'entry_count': int(len(df)),
+                'summary': calculate_summary(df),
+                'data': dataframe_to_columns(df),
+            }
+            result = {'success': True, 'data': dataset}
+        except Exception as e:
+            result = {'success': False, 'error': str(e)}
+        self.signals.finished.emit(result)
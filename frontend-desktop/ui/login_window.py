@@ -7,6 +7,7 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
 from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtGui import QFont
 from api_client import APIClient
+import token_store
 from config import COLORS, WINDOW_WIDTH, WINDOW_HEIGHT
 
 
@@ -15,9 +16,11 @@ class LoginWindow(QWidget):
     
     login_successful = pyqtSignal(str, str)  # Signal emits (token, username)
     
-    def __init__(self):
+    def __init__(self, pending_uploads=None):
         super().__init__()
         self.api_client = APIClient()
+        # Local files analysed offline; uploaded once the user signs in
+        self.pending_uploads = list(pending_uploads or [])
         self.init_ui()
     
     def init_ui(self):
@@ -155,6 +158,12 @@ class LoginWindow(QWidget):
         
         layout.addLayout(signup_layout)
         
+        # Offline mode: analyse local files without the server
+        offline_btn = QPushButton("Work offline")
+        offline_btn.setObjectName("secondary")
+        offline_btn.clicked.connect(self.handle_work_offline)
+        layout.addWidget(offline_btn)
+        
         widget.setLayout(layout)
         return widget
     
@@ -241,15 +250,33 @@ class LoginWindow(QWidget):
         
         if result['success']:
             token = result['data'].get('token')
+            self.remember_token(username, token)
             # Open main window
             from ui.main_window import MainWindow
-            self.main_window = MainWindow(self.api_client, username)
+            self.main_window = MainWindow(self.api_client, username, self.pending_uploads)
             self.main_window.show()
             self.close()
         else:
             error_msg = result.get('error', 'Login failed')
             QMessageBox.critical(self, "Login Failed", f"Error: {error_msg}")
     
+    def remember_token(self, username, token):
+        """Store the token so the next start skips the login window"""
+        if not token:
+            return
+        try:
+            token_store.save_token(username, token)
+        except OSError as e:
+            # Not fatal: the user just has to log in again next time
+            print(f"Could not store token: {e}")
+    
+    def handle_work_offline(self):
+        """Open the main window without signing in"""
+        from ui.main_window import MainWindow
+        self.main_window = MainWindow(self.api_client, "", self.pending_uploads)
+        self.main_window.show()
+        self.close()
+    
     def handle_signup(self):
         """Handle signup button click"""
         username = self.signup_username.text().strip()
@@ -264,9 +291,10 @@ class LoginWindow(QWidget):
         
         if result['success']:
             token = result['data'].get('token')
+            self.remember_token(username, token)
             # Open main window
             from ui.main_window import MainWindow
-            self.main_window = MainWindow(self.api_client, username)
+            self.main_window = MainWindow(self.api_client, username, self.pending_uploads)
             self.main_window.show()
             self.close()
         else:
@@ -4,23 +4,32 @@ Main Application Window
 
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QLabel, QPushButton, QTabWidget, QMessageBox,
-                             QFileDialog)
-from PyQt5.QtCore import Qt
+                             QFileDialog, QApplication)
+from PyQt5.QtCore import Qt, QThreadPool
 from PyQt5.QtGui import QFont
 from api_client import APIClient
+import token_store
 from config import COLORS, WINDOW_WIDTH, WINDOW_HEIGHT
 from ui.dashboard_tab import DashboardTab
 from ui.history_tab import HistoryTab
+from ui.upload_queue import UploadQueueDialog
+from ui.local_analysis import LocalAnalysisTask
 
 
 class MainWindow(QMainWindow):
     """Main application window with tabs"""
     
-    def __init__(self, api_client: APIClient, username: str):
+    def __init__(self, api_client: APIClient, username: str, pending_uploads=None):
         super().__init__()
         self.api_client = api_client
         self.username = username
+        # Without a token the window works on local files only
+        self.offline = api_client.token is None
+        # Locally analysed files that still have to be uploaded
+        self.pending_uploads = list(pending_uploads or [])
         self.current_dataset = None
+        self.upload_queue = None
+        self.thread_pool = QThreadPool(self)
         self.init_ui()
         self.load_initial_data()
     
@@ -114,15 +123,27 @@ class MainWindow(QMainWindow):
         header_layout.addStretch()
         
         # User info and actions
-        user_label = QLabel(f"👤 {self.username}")
+        user_text = "📴 Offline" if self.offline else f"👤 {self.username}"
+        user_label = QLabel(user_text)
         user_label.setStyleSheet(f"color: {COLORS['text_secondary']}; font-size: 14px; margin-right: 15px;")
         header_layout.addWidget(user_label)
         
-        upload_btn = QPushButton("📁 Upload CSV")
-        upload_btn.clicked.connect(self.handle_upload)
-        header_layout.addWidget(upload_btn)
+        self.sync_label = QLabel()
+        self.sync_label.setStyleSheet(f"color: {COLORS['text_secondary']}; font-size: 13px; margin-right: 15px;")
+        header_layout.addWidget(self.sync_label)
+        self.update_sync_label()
         
-        logout_btn = QPushButton("Logout")
+        open_local_btn = QPushButton("📂 Open Local CSV")
+        open_local_btn.setObjectName("secondary")
+        open_local_btn.clicked.connect(self.handle_open_local)
+        header_layout.addWidget(open_local_btn)
+        
+        if not self.offline:
+            upload_btn = QPushButton("📁 Upload CSV")
+            upload_btn.clicked.connect(self.handle_upload)
+            header_layout.addWidget(upload_btn)
+        
+        logout_btn = QPushButton("Sign In" if self.offline else "Logout")
         logout_btn.setObjectName("secondary")
         logout_btn.clicked.connect(self.handle_logout)
         header_layout.addWidget(logout_btn)
@@ -145,7 +166,15 @@ class MainWindow(QMainWindow):
         central_widget.setLayout(main_layout)
     
     def load_initial_data(self):
-        """Load initial data (most recent dataset)"""
+        """Load initial data (most recent dataset) and sync pending local files"""
+        if self.offline:
+            return
+        
+        if self.pending_uploads:
+            pending, self.pending_uploads = self.pending_uploads, []
+            self.queue_uploads(pending, show_queue=False)
+            self.update_sync_label()
+        
         result = self.api_client.get_datasets()
         
         if result['success'] and result['data']:
@@ -156,61 +185,110 @@ class MainWindow(QMainWindow):
                 self.load_dataset(most_recent['id'])
     
     def handle_upload(self):
-        """Handle CSV file upload"""
-        file_path, _ = QFileDialog.getOpenFileName(
+        """Handle CSV file upload (several files can be selected)"""
+        file_paths, _ = QFileDialog.getOpenFileNames(
             self,
-            "Select CSV File",
+            "Select CSV Files",
             "",
-            "CSV Files (*.csv);;All Files (*)"
+            "CSV Files (*.csv *.csv.gz *.csv.zst *.zip);;All Files (*)"
         )
         
-        if file_path:
-            try:
-                # Check if file exists and is readable
-                import os
-                if not os.path.exists(file_path):
-                    QMessageBox.critical(
-                        self,
-                        "File Error",
-                        "Selected file does not exist."
-                    )
-                    return
-                
-                result = self.api_client.upload_dataset(file_path)
-                
-                if result['success']:
-                    QMessageBox.information(
-                        self,
-                        "Success",
-                        "Dataset uploaded successfully!"
-                    )
-                    # Load the new dataset
-                    dataset_id = result['data'].get('id')
-                    if dataset_id:
-                        self.load_dataset(dataset_id)
-                    # Refresh history
-                    self.history_tab.load_history()
-                else:
-                    error_msg = result.get('error', 'Upload failed')
-                    # Try to extract more details from error
-                    if 'response' in str(error_msg):
-                        try:
-                            import json
-                            error_data = json.loads(error_msg)
-                            error_msg = error_data.get('detail', error_msg)
-                        except:
-                            pass
-                    QMessageBox.critical(
-                        self,
-                        "Upload Failed",
-                        f"Error: {error_msg}\n\nPlease ensure:\n- Backend server is running\n- You are logged in\n- File is a valid CSV"
-                    )
-            except Exception as e:
+        if file_paths:
+            # Check if files exist and are readable
+            import os
+            missing = [path for path in file_paths if not os.path.exists(path)]
+            if missing:
                 QMessageBox.critical(
                     self,
-                    "Error",
-                    f"Failed to upload file: {str(e)}\n\nPlease check:\n- Backend is running at http://localhost:8000\n- File is accessible"
+                    "File Error",
+                    "Selected file does not exist:\n" + "\n".join(missing)
                 )
+                return
+            
+            self.queue_uploads(file_paths)
+    
+    def queue_uploads(self, file_paths, show_queue=True):
+        """Hand files to the upload queue (uploads run on worker threads)"""
+        if self.upload_queue is None:
+            self.upload_queue = UploadQueueDialog(self.api_client, self)
+            self.upload_queue.all_finished.connect(self.handle_uploads_finished)
+        self.upload_queue.add_files(file_paths)
+        if show_queue:
+            self.upload_queue.show()
+            self.upload_queue.raise_()
+    
+    def handle_open_local(self):
+        """Parse and chart a CSV file locally, without a server round trip"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self,
+            "Open Local CSV File",
+            "",
+            "CSV Files (*.csv);;All Files (*)"
+        )
+        
+        if not file_path:
+            return
+        
+        task = LocalAnalysisTask(file_path)
+        task.signals.finished.connect(self.handle_local_analysis_finished)
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        self.thread_pool.start(task)
+    
+    def handle_local_analysis_finished(self, result):
+        """Show a locally analysed dataset and schedule its upload"""
+        QApplication.restoreOverrideCursor()
+        
+        if not result['success']:
+            QMessageBox.critical(
+                self,
+                "Invalid CSV",
+                f"Could not analyse file: {result.get('error', 'Unknown error')}"
+            )
+            return
+        
+        self.current_dataset = result['data']
+        self.dashboard_tab.display_dataset(self.current_dataset)
+        self.tabs.setCurrentIndex(0)
+        
+        # Sync in the background now, or after the next sign in when offline
+        file_path = self.current_dataset['local_path']
+        if self.offline:
+            if file_path not in self.pending_uploads:
+                self.pending_uploads.append(file_path)
+            self.update_sync_label()
+        else:
+            self.queue_uploads([file_path], show_queue=False)
+    
+    def update_sync_label(self):
+        """Show how many local files are waiting to be uploaded"""
+        count = len(self.pending_uploads)
+        if count:
+            self.sync_label.setText(f"⏳ {count} local file{'s' if count != 1 else ''} to sync")
+            self.sync_label.show()
+        else:
+            self.sync_label.hide()
+    
+    def handle_uploads_finished(self, results):
+        """Refresh once after a batch of uploads and show the newest dataset"""
+        if not results:
+            return
+        
+        result = results[-1]
+        local_path = (self.current_dataset or {}).get('local_path')
+        if local_path:
+            # A local analysis is on screen: only replace it by its own server copy
+            synced = [r for r in results if r.get('file_path') == local_path]
+            if not synced:
+                self.history_tab.load_history()
+                return
+            result = synced[-1]
+        
+        # Load the most recently completed dataset
+        dataset_id = result['data'].get('dataset', {}).get('id')
+        if dataset_id:
+            self.load_dataset(dataset_id)
+        # Refresh history
+        self.history_tab.load_history()
     
     def load_dataset(self, dataset_id: int):
         """Load dataset details and update dashboard"""
@@ -230,7 +308,11 @@ class MainWindow(QMainWindow):
             )
     
     def handle_logout(self):
-        """Handle logout"""
+        """Handle logout (or sign in when working offline)"""
+        if self.offline:
+            self.show_login_window()
+            return
+        
         reply = QMessageBox.question(
             self,
             "Logout",
@@ -241,10 +323,14 @@ class MainWindow(QMainWindow):
         
         if reply == QMessageBox.Yes:
             self.api_client.clear_token()
-            
-            # Show login window
-            from ui.login_window import LoginWindow
-            self.login_window = LoginWindow()
-            self.login_window.show()
-            
-            self.close()
+            token_store.clear_token()
+            self.show_login_window()
+    
+    def show_login_window(self):
+        """Close this window and show the login window"""
+        from ui.login_window import LoginWindow
+        # Files still waiting to sync are uploaded after the next sign in
+        self.login_window = LoginWindow(pending_uploads=self.pending_uploads)
+        self.login_window.show()
+        
+        self.close()
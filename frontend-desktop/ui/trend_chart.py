@@ -0,0 +1,210 @@
+"""
+Trend Chart - Full-dataset parameter trends with min/max decimation
+"""
+
+import numpy as np
+import matplotlib.dates as mdates
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+from config import COLORS
+
+
+# (column, color, marker) for each plotted parameter
+TREND_SERIES = [
+    ('Flowrate', '#3b82f6', 'o'),
+    ('Pressure', '#ef4444', 's'),
+    ('Temperature', '#10b981', '^'),
+]
+
+# Markers are only drawn once the visible window is zoomed in this far
+MARKER_POINT_LIMIT = 60
+
+# Timestamps arrive in milliseconds; matplotlib dates count days since 1970
+MS_PER_DAY = 24 * 60 * 60 * 1000
+
+
+def row_count(data):
+    """Number of rows in columnar data ({'length', 'columns'}) or a list of rows"""
+    if isinstance(data, dict):
+        return data.get('length', 0)
+    return len(data) if data else 0
+
+
+def extract_series(data, columns):
+    """
+    Convert equipment data into one float64 array per column.
+
+    Args:
+        data: Columnar data ({'length', 'columns'}) or a list of row dictionaries
+        columns: Column names to extract
+
+    Returns:
+        dict: Column name -> numpy.ndarray (missing values become NaN)
+    """
+    count = row_count(data)
+    series = {}
+    for column in columns:
+        if isinstance(data, dict):
+            # Numeric columns are plain lists; None converts to NaN
+            series[column] = np.array(data['columns'].get(column, [None] * count), dtype=np.float64)
+            continue
+        values = (row.get(column) for row in data)
+        series[column] = np.fromiter(
+            (np.nan if value is None else value for value in values),
+            dtype=np.float64,
+            count=count
+        )
+    return series
+
+
+def extract_times(data):
+    """
+    Find the timestamp column of columnar data.
+
+    Args:
+        data: Columnar data ({'length', 'columns'}) or a list of row dictionaries
+
+    Returns:
+        numpy.ndarray: matplotlib date numbers (NaN where a row has no
+        time), or None when the data has no timestamp column
+    """
+    if not isinstance(data, dict):
+        return None
+    for column in data['columns'].values():
+        if isinstance(column, dict) and 'timestamps' in column:
+            return np.array(column['timestamps'], dtype=np.float64) / MS_PER_DAY
+    return None
+
+
+def minmax_decimate(x, y, buckets):
+    """
+    Reduce a series to the min and max of each bucket.
+
+    Each bucket maps to roughly one pixel column, so drawing the min/max
+    band of the buckets shows the same envelope as the full series.
+
+    Args:
+        x: Sorted x values
+        y: y values (same length as x)
+        buckets: Number of buckets (usually the axes width in pixels)
+
+    Returns:
+        tuple: (x, low, high) arrays; low and high are y itself when the
+        series is already small enough to plot point by point
+    """
+    count = len(y)
+    if buckets < 1 or count <= 2 * buckets:
+        return x, y, y
+
+    edges = np.linspace(0, count, buckets + 1).astype(np.intp)
+    starts = edges[:-1]
+    ends = edges[1:] - 1
+
+    lows = np.fmin.reduceat(y, starts)
+    highs = np.fmax.reduceat(y, starts)
+    centers = (x[starts] + x[ends]) / 2
+    return centers, lows, highs
+
+
+class TrendCanvas(FigureCanvas):
+    """Line chart of all rows that re-decimates to the visible range on zoom/pan"""
+
+    def __init__(self, data):
+        super().__init__(Figure(figsize=(10, 6)))
+        self.figure.patch.set_facecolor(COLORS['bg_secondary'])
+        self.ax = self.figure.add_subplot(111)
+        self.ax.set_facecolor(COLORS['bg_secondary'])
+
+        self.lines = {}
+        self.bands = {}
+        self.markers = {}
+        count = row_count(data)
+        self.x = np.arange(count, dtype=np.float64)
+        self.series = extract_series(data, [column for column, _, _ in TREND_SERIES]) if count else {}
+
+        # Time-stamped rows are stored in time order, those without a time
+        # last; those are left off a time axis
+        times = extract_times(data) if count else None
+        if times is not None:
+            timed = int(np.count_nonzero(~np.isnan(times)))
+            self.x = times[:timed]
+            self.series = {column: values[:timed] for column, values in self.series.items()}
+
+        if count:
+            for column, color, marker in TREND_SERIES:
+                line, = self.ax.plot([], [], linewidth=1.5, label=column, color=color,
+                                     marker=marker, markersize=4)
+                self.lines[column] = line
+                self.markers[column] = marker
+                # Filled min/max band; far cheaper for Agg than a zig-zag line
+                self.bands[column] = self.ax.fill_between([], [], [], color=color,
+                                                          alpha=0.35, linewidth=0)
+
+            self.set_full_limits()
+
+            if times is not None:
+                locator = mdates.AutoDateLocator()
+                self.ax.xaxis.set_major_locator(locator)
+                self.ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+                self.ax.set_xlabel('Time (UTC)', color=COLORS['text_primary'], fontsize=11, fontweight='bold')
+            else:
+                self.ax.set_xlabel('Equipment Index', color=COLORS['text_primary'], fontsize=11, fontweight='bold')
+            self.ax.set_ylabel('Value', color=COLORS['text_primary'], fontsize=11, fontweight='bold')
+            self.ax.tick_params(colors=COLORS['text_primary'])
+            self.ax.legend(facecolor=COLORS['bg_tertiary'], edgecolor=COLORS['border'],
+                           labelcolor=COLORS['text_primary'])
+            self.ax.grid(alpha=0.3, linestyle='--', color=COLORS['border'])
+            self.ax.set_axisbelow(True)
+
+            self.ax.callbacks.connect('xlim_changed', lambda ax: self.update_lines())
+            self.mpl_connect('resize_event', lambda event: self.update_lines())
+
+        self.ax.set_title(f'Parameter Trends ({count:,} Items)', color=COLORS['text_primary'],
+                          fontsize=14, fontweight='bold', pad=15)
+
+        self.figure.tight_layout()
+        self.update_lines()
+
+        self.setMinimumHeight(400)
+        self.setStyleSheet(f"background-color: {COLORS['bg_secondary']};")
+
+    def set_full_limits(self):
+        """Fit the axes to the whole dataset without scanning the plotted lines"""
+        if len(self.x) > 1:
+            self.ax.set_xlim(self.x[0], self.x[-1])
+        else:
+            self.ax.set_xlim(-1, 1)
+
+        lows = [np.nanmin(values) for values in self.series.values() if np.isfinite(values).any()]
+        highs = [np.nanmax(values) for values in self.series.values() if np.isfinite(values).any()]
+        if lows and highs:
+            low, high = min(lows), max(highs)
+            margin = (high - low) * 0.05 or 1.0
+            self.ax.set_ylim(low - margin, high + margin)
+
+    def update_lines(self):
+        """Decimate every series to the visible x range and the current pixel width"""
+        if not self.lines:
+            return
+
+        x0, x1 = self.ax.get_xlim()
+        start = max(int(np.searchsorted(self.x, x0, side='left')) - 1, 0)
+        stop = min(int(np.searchsorted(self.x, x1, side='right')) + 1, len(self.x))
+        buckets = max(int(self.ax.bbox.width), 1)
+        show_markers = (stop - start) <= MARKER_POINT_LIMIT
+
+        for column, line in self.lines.items():
+            xs, lows, highs = minmax_decimate(self.x[start:stop], self.series[column][start:stop], buckets)
+            band = self.bands[column]
+            if lows is highs:
+                line.set_data(xs, lows)
+                band.set_visible(False)
+            else:
+                # Midline keeps the trend visible where the band is thinner than a pixel
+                line.set_data(xs, (lows + highs) / 2)
+                band.set_verts([np.column_stack((np.concatenate((xs, xs[::-1])),
+                                                 np.concatenate((highs, lows[::-1]))))])
+                band.set_visible(True)
+            line.set_marker(self.markers[column] if show_markers else 'None')
+
+        self.draw_idle()
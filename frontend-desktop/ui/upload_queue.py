@@ -0,0 +1,242 @@
+"""
+Upload Queue - Uploads several CSV files concurrently with per-file progress
+"""
+
+import os
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+                             QTableWidget, QTableWidgetItem, QProgressBar, QHeaderView,
+                             QAbstractItemView)
+from PyQt5.QtCore import QThreadPool, pyqtSignal
+from PyQt5.QtGui import QColor
+from config import COLORS, UPLOAD_PARALLELISM
+from ui.upload_worker import UploadTask
+
+
+class UploadQueueDialog(QDialog):
+    """
+    Non-modal window listing queued uploads.
+
+    At most UPLOAD_PARALLELISM files are sent at the same time. Once every
+    file has finished (or been cancelled) all_finished is emitted once with
+    the results of the files that succeeded, so the caller refreshes the
+    history a single time per batch.
+    """
+
+    FILE_COLUMN, SIZE_COLUMN, PROGRESS_COLUMN, STATUS_COLUMN, ACTION_COLUMN = range(5)
+
+    all_finished = pyqtSignal(list)  # successful upload results (plus 'file_path'), in completion order
+
+    def __init__(self, api_client, parent=None, parallelism=UPLOAD_PARALLELISM):
+        super().__init__(parent)
+        self.api_client = api_client
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(parallelism)
+        self.entries = []
+        self.active = 0
+        self.batch_results = []
+        self.init_ui()
+
+    def init_ui(self):
+        """Initialize the user interface"""
+        self.setWindowTitle("Upload Queue")
+        self.resize(760, 360)
+        self.setStyleSheet(f"""
+            QDialog {{
+                background-color: {COLORS['bg_primary']};
+                color: {COLORS['text_primary']};
+            }}
+            QTableWidget {{
+                background-color: {COLORS['bg_secondary']};
+                color: {COLORS['text_primary']};
+                border: 1px solid {COLORS['border']};
+                border-radius: 8px;
+            }}
+            QHeaderView::section {{
+                background-color: {COLORS['bg_tertiary']};
+                color: {COLORS['text_secondary']};
+                border: none;
+                padding: 6px;
+                font-weight: bold;
+            }}
+            QTableWidget QPushButton {{
+                padding: 4px 8px;
+                min-width: 0px;
+                font-size: 12px;
+            }}
+            QProgressBar {{
+                background-color: {COLORS['bg_tertiary']};
+                border: 1px solid {COLORS['border']};
+                border-radius: 4px;
+                color: {COLORS['text_primary']};
+                text-align: center;
+            }}
+            QProgressBar::chunk {{
+                background-color: {COLORS['primary']};
+                border-radius: 4px;
+            }}
+        """)
+
+        layout = QVBoxLayout()
+        layout.setSpacing(12)
+
+        self.summary_label = QLabel()
+        self.summary_label.setStyleSheet(f"color: {COLORS['text_secondary']}; font-size: 13px;")
+        layout.addWidget(self.summary_label)
+
+        self.table = QTableWidget(0, 5)
+        self.table.setHorizontalHeaderLabels(['File', 'Size', 'Progress', 'Status', ''])
+        self.table.verticalHeader().hide()
+        self.table.verticalHeader().setDefaultSectionSize(40)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionMode(QAbstractItemView.NoSelection)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(self.FILE_COLUMN, QHeaderView.Stretch)
+        header.setSectionResizeMode(self.STATUS_COLUMN, QHeaderView.Stretch)
+        self.table.setColumnWidth(self.SIZE_COLUMN, 90)
+        self.table.setColumnWidth(self.PROGRESS_COLUMN, 160)
+        self.table.setColumnWidth(self.ACTION_COLUMN, 100)
+        layout.addWidget(self.table)
+
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        close_btn = QPushButton("Close")
+        close_btn.setObjectName("secondary")
+        close_btn.clicked.connect(self.hide)
+        button_layout.addWidget(close_btn)
+        layout.addLayout(button_layout)
+
+        self.setLayout(layout)
+        self.update_summary()
+
+    def add_files(self, file_paths):
+        """Queue files for upload and start sending them"""
+        for file_path in file_paths:
+            row = self.table.rowCount()
+            self.table.insertRow(row)
+
+            self.table.setItem(row, self.FILE_COLUMN, QTableWidgetItem(os.path.basename(file_path)))
+            size_mb = os.path.getsize(file_path) / (1024 * 1024)
+            self.table.setItem(row, self.SIZE_COLUMN, QTableWidgetItem(f"{size_mb:.1f} MB"))
+
+            progress_bar = QProgressBar()
+            progress_bar.setRange(0, 1000)
+            progress_bar.setFormat('%p%')
+            self.table.setCellWidget(row, self.PROGRESS_COLUMN, progress_bar)
+
+            action_btn = QPushButton()
+            action_btn.setObjectName("secondary")
+            action_btn.clicked.connect(lambda checked, r=row: self.handle_action(r))
+            self.table.setCellWidget(row, self.ACTION_COLUMN, action_btn)
+
+            self.entries.append({
+                'file_path': file_path,
+                'task': None,
+                'state': None,
+                'progress_bar': progress_bar,
+                'action_btn': action_btn,
+            })
+            self.start_upload(row)
+
+        self.update_summary()
+
+    def start_upload(self, row):
+        """Create an upload task for a row and hand it to the thread pool"""
+        entry = self.entries[row]
+        task = UploadTask(self.api_client, entry['file_path'])
+        task.signals.progress.connect(lambda sent, total, r=row: self.update_progress(r, sent, total))
+        task.signals.finished.connect(lambda result, r=row: self.handle_finished(r, result))
+
+        entry['task'] = task
+        entry['progress_bar'].setValue(0)
+        self.set_state(row, 'queued', "Queued")
+        self.active += 1
+        self.thread_pool.start(task)
+
+    def update_progress(self, row, sent, total):
+        """Update the progress bar of a row"""
+        entry = self.entries[row]
+        if entry['state'] == 'queued':
+            self.set_state(row, 'uploading', "Uploading...")
+        if total:
+            entry['progress_bar'].setValue(int(sent * 1000 / total))
+            if sent >= total:
+                self.set_state(row, 'uploading', "Processing on server...")
+
+    def handle_finished(self, row, result):
+        """Record the result of one upload"""
+        entry = self.entries[row]
+        entry['task'] = None
+
+        if result['success']:
+            entry['progress_bar'].setValue(1000)
+            self.set_state(row, 'done', "✓ Uploaded")
+            self.batch_results.append(dict(result, file_path=entry['file_path']))
+        elif result.get('cancelled'):
+            self.set_state(row, 'failed', "Cancelled")
+        else:
+            self.set_state(row, 'failed', f"✗ {result.get('error', 'Upload failed')}")
+
+        self.finish_one()
+
+    def handle_action(self, row):
+        """Cancel a pending upload or retry a failed one"""
+        entry = self.entries[row]
+        if entry['state'] in ('queued', 'uploading'):
+            task = entry['task']
+            if entry['state'] == 'queued' and self.thread_pool.tryTake(task):
+                # Never started, so no finished signal will arrive
+                entry['task'] = None
+                self.set_state(row, 'failed', "Cancelled")
+                self.finish_one()
+            else:
+                task.cancel()
+                self.set_state(row, 'uploading', "Cancelling...")
+        elif entry['state'] == 'failed':
+            self.start_upload(row)
+            self.update_summary()
+
+    def finish_one(self):
+        """Emit all_finished once nothing is queued or running"""
+        self.active -= 1
+        self.update_summary()
+        if self.active == 0:
+            results, self.batch_results = self.batch_results, []
+            self.all_finished.emit(results)
+
+    def set_state(self, row, state, status_text):
+        """Update the status cell and action button of a row"""
+        entry = self.entries[row]
+        entry['state'] = state
+
+        status_item = QTableWidgetItem(status_text)
+        status_item.setToolTip(status_text)
+        if state == 'done':
+            status_item.setForeground(QColor(COLORS['success']))
+        elif state == 'failed':
+            status_item.setForeground(QColor(COLORS['error']))
+        self.table.setItem(row, self.STATUS_COLUMN, status_item)
+
+        action_btn = entry['action_btn']
+        if state in ('queued', 'uploading'):
+            action_btn.setText("Cancel")
+            action_btn.setEnabled(True)
+        elif state == 'failed':
+            action_btn.setText("Retry")
+            action_btn.setEnabled(True)
+        else:
+            action_btn.setText("")
+            action_btn.setEnabled(False)
+
+    def update_summary(self):
+        """Update the counts shown above the table"""
+        done = sum(1 for entry in self.entries if entry['state'] == 'done')
+        failed = sum(1 for entry in self.entries if entry['state'] == 'failed')
+        self.summary_label.setText(
+            f"{len(self.entries)} files · {self.active} in progress · {done} uploaded · {failed} failed "
+            f"(up to {self.thread_pool.maxThreadCount()} at a time)"
+        )
+
+    def closeEvent(self, event):
+        """Keep uploads running in the background when the window is closed"""
+        self.hide()
+        event.ignore()
@@ -0,0 +1,39 @@
+"""
+Upload Worker - Runs dataset uploads off the UI thread
+"""
+
+import threading
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+
+
+class UploadSignals(QObject):
+    """Signals emitted by an UploadTask (delivered on the UI thread)"""
+
+    progress = pyqtSignal(object, object)  # (bytes_sent, total_bytes)
+    finished = pyqtSignal(dict)  # APIClient.upload_dataset result
+
+
+class UploadTask(QRunnable):
+    """Uploads one file through the API client on a QThreadPool thread"""
+
+    def __init__(self, api_client, file_path):
+        super().__init__()
+        self.api_client = api_client
+        self.file_path = file_path
+        self.cancel_event = threading.Event()
+        self.signals = UploadSignals()
+
+    def run(self):
+        try:
+            result = self.api_client.upload_dataset(
+                self.file_path,
+                progress_callback=self.signals.progress.emit,
+                cancel_event=self.cancel_event
+            )
+        except Exception as e:
+            result = {'success': False, 'error': str(e)}
+        self.signals.finished.emit(result)
+
+    def cancel(self):
+        """Ask the running upload to stop at the next chunk"""
+        self.cancel_event.set()
@@ -0,0 +1,63 @@
+"""
+Local record of unfinished resumable uploads
+
+Maps each file being uploaded to the server-side upload session, so an
+upload interrupted by a network failure, a cancel or an application
+restart continues with the chunks the server does not have yet. A file
+whose size or modification time changed starts a new session.
+"""
+
+import json
+import os
+import threading
+from typing import Optional
+from config import APP_DATA_DIR
+from token_store import write_private_file
+
+
+UPLOADS_FILE = os.path.join(APP_DATA_DIR, 'uploads.json')
+
+# Several uploads run at the same time on the queue's thread pool
+sessions_lock = threading.Lock()
+
+
+def file_key(file_path: str) -> str:
+    """Identify a file together with its current size and modification time"""
+    stat = os.stat(file_path)
+    return f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+
+
+def read_sessions() -> dict:
+    try:
+        with open(UPLOADS_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def find_session(file_path: str) -> Optional[str]:
+    """Return the upload id of an unfinished upload of this file, if any"""
+    with sessions_lock:
+        return read_sessions().get(file_key(file_path))
+
+
+def remember_session(file_path: str, upload_id: str):
+    """Record the upload session a file is being sent to"""
+    key = file_key(file_path)
+    path_prefix = os.path.abspath(file_path) + '|'
+    with sessions_lock:
+        # Sessions for older versions of the file can never be resumed
+        sessions = {
+            other_key: other_id for other_key, other_id in read_sessions().items()
+            if not other_key.startswith(path_prefix)
+        }
+        sessions[key] = upload_id
+        write_private_file(UPLOADS_FILE, sessions)
+
+
+def forget_session(file_path: str):
+    """Drop the record once the upload is complete or no longer usable"""
+    with sessions_lock:
+        sessions = read_sessions()
+        if sessions.pop(file_key(file_path), None) is not None:
+            write_private_file(UPLOADS_FILE, sessions)